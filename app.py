@@ -25,14 +25,51 @@
 #
 #------------------------------------------------------------------------------
 
+import io
 import os
 import json
 import requests
-from flask import Flask, render_template, request, jsonify, redirect, session, Response
+from flask import Flask, render_template, request, jsonify, redirect, session, Response, stream_with_context
 from flask_cors import CORS
-from flask_session import Session
 from dotenv import load_dotenv
 import tempfile
+import time
+import math
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from translation_cache import TRANSLATION_CACHE_CLEAR_ENABLED, translation_cache_key
+from translation_batch import translate_batch, BATCH_CONCURRENCY, BATCH_MAX_SEGMENTS
+from translation_stream import iter_source_lines, stream_translations
+from translation_fanout import translate_fanout, FANOUT_MAX_TARGETS
+from incremental_translation import IncrementalTranslations
+from translation_document import (
+    segment_document, assemble_document, DOCUMENT_MAX_CHARS, DOCUMENT_CHUNK_CHARS, DOCUMENT_CONCURRENCY
+)
+from session_store import init_session
+from metadata_cache import MetadataCache, credential_scope
+from single_flight import SingleFlight
+from rate_governor import RateLimited, BULK
+from tail_latency import CircuitOpen
+from metrics import Metrics, in_request
+from translation_upstream import (
+    TRANSLATOR_URL, TRANSLATION_KEY, GPT_URL, GPT_KEY, REGION, GPT_DEPLOYMENT_NAME, upstream, api_headers,
+    rate_governor, hedger, circuit_breakers, translation_cache, get_translate_params, get_translate_target,
+    translation_elements, post_translation
+)
+from client_disconnect import DisconnectWatcher, ClientDisconnected, in_scope
+from import_stream import (
+    ImportFormError, MultipartReader, PartStream, UploadBody, UploadCleaner, IMPORT_CHUNK_SIZE,
+    scan_upload, iter_cleaned_upload, iter_pipeline_file, multipart_boundary, validation_mode
+)
+from import_pipeline import ImportPipeline, ImportPipelines, ManifestError, PIPELINE_CONCURRENCY, parse_manifest
+from tsv_preprocess import TsvCleaner
+from request_shaping import TranslateCall, ImportForward, decode_metadata as decode_upstream_list
+from translation_memory import (
+    TranslationMemory, ImportMemoryLoader, TRANSLATION_MEMORY_ENABLED, split_by_memory, merge_with_memory
+)
+from reference_index import ReferenceIndex, REFERENCE_PAIRS_AUTO, inject_reference_pairs
+from job_poller import ImportJobPoller, JOB_POLL_MIN_INTERVAL
+from response_encoding import FastJSONProvider, JSON_MIMETYPE, can_relay, compress_response, loads
 
 # Load environment variables
 load_dotenv()
@@ -40,18 +77,31 @@ load_dotenv()
 app = Flask(__name__, 
             template_folder='webapp/templates',
             static_folder='webapp/static')
+# orjson-backed jsonify and request.json when orjson is installed
+app.json = FastJSONProvider(app)
 
 # Use a fixed secret key instead of a random one to ensure session persistence between restarts
 app.secret_key = os.getenv("SECRET_KEY", "adapct-secret-key-for-session")
 
-# Configure session to be more reliable using Flask-Session
-app.config['SESSION_TYPE'] = 'filesystem'
+# Configure server-side sessions: 'sqlite' (shared by all workers), 'memory' (single process)
+# or any Flask-Session type such as 'filesystem'
+app.config['SESSION_TYPE'] = os.getenv("SESSION_TYPE", "sqlite")
 app.config['SESSION_FILE_DIR'] = os.path.join(tempfile.gettempdir(), 'flask_session')
+app.config['SESSION_SQLITE_PATH'] = os.getenv("SESSION_SQLITE_PATH", os.path.join(tempfile.gettempdir(), 'adapct_sessions.sqlite3'))
+app.config['SESSION_MAX_ENTRIES'] = int(os.getenv("SESSION_MAX_ENTRIES", "10000"))
 app.config['SESSION_PERMANENT'] = True
 app.config['PERMANENT_SESSION_LIFETIME'] = 1800  # 30 minutes
-Session(app)  # Initialize Flask-Session
+init_session(app)  # Initialize the session backend
 CORS(app)  # Enable CORS for all routes
 
+# Per-route request metrics, published on /api/metrics
+metrics = Metrics()
+app.wsgi_app = metrics.wsgi_middleware(app.wsgi_app)
+
+@app.before_request
+def label_route_for_metrics():
+    request.environ['metrics.route'] = request.url_rule.rule if request.url_rule else None
+
 # Import authentication helper with all needed functions
 from auth_helper import (
     get_auth_url, get_token, get_auth_header, clear_token_cache,
@@ -61,12 +111,33 @@ from auth_helper import (
 
 # Environment variables
 API_URL = os.getenv("API_URL")
-TRANSLATOR_URL = os.getenv("TRANSLATOR_URL")
-TRANSLATION_KEY = os.getenv("TRANSLATION_KEY")
-GPT_URL = os.getenv("GPT_URL")
-GPT_KEY = os.getenv("GPT_KEY")
-REGION = os.getenv("REGION")
-GPT_DEPLOYMENT_NAME = os.getenv("GPT_DEPLOYMENT_NAME", "gpt-4o-mini")
+
+# Concurrent identical upstream reads from the same credential share one call
+upstream_flights = SingleFlight()
+
+# Cancels the upstream translate calls of clients that disconnect while waiting
+disconnect_watcher = DisconnectWatcher()
+
+# Exact-match translation memory fed by TSV imports (None when disabled)
+translation_memory = TranslationMemory() if TRANSLATION_MEMORY_ENABLED else None
+
+# BM25 index over the memory's pairs that picks ReferenceTextPairs (None when disabled)
+reference_index = (ReferenceIndex(translation_memory).start()
+                   if translation_memory is not None and REFERENCE_PAIRS_AUTO else None)
+
+# Last sentences and translations of each live-edited document, per session
+incremental_translations = IncrementalTranslations()
+
+# Per-credential cache of normalized workspace metadata
+metadata_cache = MetadataCache(flights=upstream_flights)
+
+# Documents are listed page by page; later pages are fetched concurrently
+DOCUMENTS_PAGE_SIZE = int(os.getenv("DOCUMENTS_PAGE_SIZE", "100"))
+DOCUMENTS_PAGE_CONCURRENCY = int(os.getenv("DOCUMENTS_PAGE_CONCURRENCY", "4"))
+DOCUMENTS_MAX_PAGES = int(os.getenv("DOCUMENTS_MAX_PAGES", "500"))
+
+# Seconds between keep-alive comments on import job event streams
+JOB_EVENTS_KEEPALIVE = float(os.getenv("JOB_EVENTS_KEEPALIVE", "15"))
 
 # Auth constants for PKCE
 from auth_helper import REDIRECT_URI, CLIENT_ID, AUTHORITY, SCOPES
@@ -143,16 +214,34 @@ def index():
 # API helper to get headers with authorization
 def get_api_headers():
     """Get headers for API requests."""
-    token = session.get("access_token", "")
-    return {
-        "Authorization": f"Bearer {token}",
-        "Ocp-Apim-Subscription-Key": TRANSLATION_KEY,
-        "Ocp-Apim-Subscription-Region": REGION,
-        "llm-endpoint": GPT_URL,
-        "llm-key": GPT_KEY,
-        "preview-api": "true",
-        "content-type": "application/json"
-    }
+    return api_headers.for_token(session.get("access_token", ""))
+
+@app.errorhandler(requests.exceptions.Timeout)
+def handle_upstream_timeout(e):
+    app.logger.error(f"Upstream request timed out: {e}")
+    return jsonify({"error": "Upstream request timed out"}), 504
+
+@app.errorhandler(requests.exceptions.ConnectionError)
+def handle_upstream_connection_error(e):
+    app.logger.error(f"Upstream connection failed: {e}")
+    return jsonify({"error": "Could not connect to upstream service"}), 502
+
+@app.errorhandler(RateLimited)
+def handle_rate_limited(e):
+    result = jsonify({"error": str(e)})
+    result.headers['Retry-After'] = str(math.ceil(e.retry_after))
+    return result, 429
+
+@app.errorhandler(CircuitOpen)
+def handle_circuit_open(e):
+    result = jsonify({"error": str(e)})
+    result.headers['Retry-After'] = str(math.ceil(e.retry_after))
+    return result, 503
+
+@app.errorhandler(ClientDisconnected)
+def handle_client_disconnected(e):
+    # Nobody reads this; 499 is the status proxies log for a client that closed the request
+    return jsonify({"error": str(e)}), 499
 
 
 @app.route('/api/user')
@@ -174,106 +263,238 @@ def get_user():
 def health_check():
     return Response(status=200)
 
+def extract_documents(data):
+    """Return the raw document list from a documents API response page."""
+    # Ensure we have a consistent format for the frontend
+    paginated = (data.get("paginatedDocuments") or {}) if isinstance(data, dict) else {}
+    if isinstance(paginated, dict) and 'documents' in paginated:
+        # Handle when API returns {documents: [...]}
+        return paginated['documents']
+    # Handle unexpected format
+    if data:  # If there's some data but not in expected format
+        app.logger.warning(f"Unexpected documents API response format: {data}")
+        return [data]  # Try to use it anyway
+    return []
+
+def normalize_document(doc):
+    """Normalize one document to have consistent properties, or return None if it is not a document."""
+    if not isinstance(doc, dict):
+        return None
+    doc_info = doc.get('documentInfo', doc)
+    lang_info = doc_info.get('languages', [])
+    return {
+        'id': doc_info.get('id', 'unknown'),
+        'name': doc_info.get('name', 'Unnamed Document'),
+        'type': doc_info.get('documentType', 'Unknown'),
+        'createdDate': doc_info.get('createdDate', ''),
+        'status': 'Available' if doc_info.get('isAvailable', True) else 'Unavailable',
+        'lp': '-'.join(lang['languageCode'] for lang in lang_info[:2]) if len(lang_info) >= 2 else ''
+    }
+
+def normalize_documents(data, document_type='Adaptive'):
+    """Flatten a documents API response into the list shape the frontend expects."""
+    normalized_docs = []
+    for doc in extract_documents(data):
+        normalized = normalize_document(doc)
+        if normalized and (document_type is None or normalized['type'] == document_type):
+            normalized_docs.append(normalized)
+    return normalized_docs
+
+def filter_documents(documents, document_type=None, source_lang=None, target_lang=None):
+    """Filter normalized documents by document type and language pair."""
+    filtered = []
+    for doc in documents:
+        if document_type and doc['type'] != document_type:
+            continue
+        source, _, target = doc['lp'].partition('-')
+        if (source_lang and source != source_lang) or (target_lang and target != target_lang):
+            continue
+        filtered.append(doc)
+    return filtered
+
+def normalize_indices(data):
+    """Flatten an index list API response into the list shape the frontend expects."""
+    # Ensure we have a consistent format for the frontend
+    if isinstance(data, dict) and 'indexes' in data:
+        # Handle when API returns {indices: [...]}
+        indexes = data["indexes"]
+    else:
+        # Handle unexpected format
+        indexes = []
+        if data:  # If there's some data but not in expected format
+            app.logger.warning(f"Unexpected indices API response format: {data}")
+            indexes = [data]  # Try to use it anyway
+
+    # Normalize each index to have consistent properties
+    normalized_indices = []
+    for index in indexes:
+        if isinstance(index, dict):
+            normalized_indices.append({
+                'id': index.get('id', 'unknown'),
+                'apiDomain': index.get('apiDomain', 'unknown'),
+                'createdDate': index.get('createdDate', ''),
+                'name': index.get('name', 'Unnamed Index'),
+                'status': 'Available' if index.get('isAvailable', True) else 'Unavailable'
+            })
+    return normalized_indices
+
+def decode_metadata(response, empty, normalize=None):
+    """request_shaping.decode_metadata for a requests response."""
+    return decode_upstream_list(response.status_code, response.content, empty, normalize, source=response.url)
+
+def relay_response(response, empty=None):
+    """
+    Mirror an upstream JSON response. In passthrough mode the body is forwarded
+    byte for byte; otherwise it is decoded and re-encoded, and an empty body
+    becomes `empty` ({} by default).
+    """
+    if can_relay(response.content, response.headers.get('Content-Type')):
+        return Response(response.content, status=response.status_code, mimetype=JSON_MIMETYPE)
+    if response.text:
+        try:
+            result = jsonify(loads(response.content))
+        except ValueError:
+            result = jsonify({"error": "Invalid JSON response from backend", "raw": response.text})
+    else:
+        result = jsonify({} if empty is None else empty)
+    result.status_code = response.status_code
+    return result
+
+def compressible(view):
+    """Compress the view's response with gzip or brotli when the client accepts it."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        response = app.make_response(view(*args, **kwargs))
+        return compress_response(response, request.headers.get('Accept-Encoding', ''))
+    return wrapper
+
+def cached_response(payload, status, cache_status):
+    result = jsonify(payload)
+    result.headers['X-Cache'] = cache_status
+    return result, status
+
 # Workspace endpoints
 @app.route('/api/workspaces', methods=['GET'])
 def get_workspaces():
     """Get all workspaces."""
-    response = requests.get(f"{API_URL}/api/texttranslator/v1.0/workspaces/", headers=get_api_headers())
-    if response.text:
-        try:
-            return jsonify(response.json())
-        except Exception:
-            return jsonify({"error": "Invalid JSON response from backend", "raw": response.text}), response.status_code
-    else:
-        return jsonify([])
+    token = session.get("access_token", "")
+    headers = api_headers.for_token(token)
+
+    def load():
+        response = upstream.get(f"{API_URL}/api/texttranslator/v1.0/workspaces/", headers=headers)
+        return decode_metadata(response, [])
+
+    (payload, status), cache_status = metadata_cache.get_or_load(
+        ('workspaces', credential_scope(token), None), load, force=bool(request.args.get('refresh')))
+    return cached_response(payload, status, cache_status)
 
 
 @app.route('/api/workspaces/<workspace_id>', methods=['GET'])
 def get_workspace(workspace_id):
     """Get a specific workspace by ID."""
-    response = requests.get(
-        f"{API_URL}/api/texttranslator/v1.0/workspaces/{workspace_id}", 
-        headers=get_api_headers()
+    headers = get_api_headers()
+    response = upstream_flights.do(
+        ('workspace', credential_scope(session.get("access_token", "")), workspace_id),
+        lambda: upstream.get(f"{API_URL}/api/texttranslator/v1.0/workspaces/{workspace_id}", headers=headers)
     )
-    if response.text:
-        try:
-            return jsonify(response.json()), response.status_code
-        except Exception:
-            return jsonify({"error": "Invalid JSON response from backend", "raw": response.text}), response.status_code
-    else:
-        return jsonify({}), response.status_code
+    return relay_response(response)
 
 # Document endpoints
+def get_document_page_count(data):
+    """Read the number of pages from a documents API response."""
+    paginated = (data.get("paginatedDocuments") or {}) if isinstance(data, dict) else {}
+    if not isinstance(paginated, dict):
+        return 1
+    if paginated.get("totalPageCount"):
+        return int(paginated["totalPageCount"])
+    if paginated.get("totalCount"):
+        return -(-int(paginated["totalCount"]) // DOCUMENTS_PAGE_SIZE)
+    return 1
+
+def fetch_all_documents(workspace_id, headers):
+    """
+    Fetch every page of a workspace's documents. The first page gives the page
+    count; the remaining pages are fetched concurrently.
+    Returns (documents, None), or (None, response) for the first failing page.
+    """
+    def fetch_page(page_index):
+        return upstream.get(
+            f"{API_URL}/api/texttranslator/v1.0/documents",
+            params={"workspaceId": workspace_id, "pageIndex": page_index, "limit": DOCUMENTS_PAGE_SIZE},
+            headers=headers
+        )
+
+    first = fetch_page(1)
+    if first.status_code != 200 or not first.text:
+        return None, first
+    data = loads(first.content)
+    documents = list(extract_documents(data))
+    page_count = min(get_document_page_count(data), DOCUMENTS_MAX_PAGES)
+
+    if page_count > 1:
+        with ThreadPoolExecutor(max_workers=DOCUMENTS_PAGE_CONCURRENCY) as pool:
+            for response in pool.map(in_request(fetch_page), range(2, page_count + 1)):
+                if response.status_code != 200 or not response.text:
+                    return None, response
+                documents.extend(extract_documents(loads(response.content)))
+    return documents, None
+
+def load_documents(workspace_id, headers):
+    """Fetch and normalize every document of a workspace for the metadata cache."""
+    try:
+        documents, failed = fetch_all_documents(workspace_id, headers)
+        if failed is not None:
+            app.logger.debug(f"Documents API response status: {failed.status_code}")
+            return decode_metadata(failed, [])
+        normalized_docs = [doc for doc in map(normalize_document, documents) if doc]
+    except ValueError as e:
+        app.logger.error(f"Error processing documents response: {e}")
+        return ({"error": "Invalid JSON response from backend"}, 502), False
+    except (KeyError, TypeError) as e:
+        app.logger.error(f"Unexpected documents response: {e!r}")
+        return ({"error": "Unexpected documents response from backend"}, 502), False
+    app.logger.debug(f"Fetched {len(normalized_docs)} documents for workspace {workspace_id}")
+    return (normalized_docs, 200), True
+
 @app.route('/api/documents', methods=['GET'])
+@compressible
 def get_documents():
-    """Get all documents in a workspace."""
+    """
+    Get all documents in a workspace, across every page.
+    Optional filters: documentType (default Adaptive, 'all' for any), sourceLanguage, targetLanguage.
+    Pass refresh=true to bypass the metadata cache.
+    """
     workspace_id = request.args.get('workspaceId')
-    page_index = 1 #request.args.get('pageIndex', 0) get all documents
-    
     if not workspace_id:
         return jsonify({"error": "workspaceId parameter is required"}), 400
-        
-    response = requests.get(
-        f"{API_URL}/api/texttranslator/v1.0/documents",
-        params={"workspaceId": workspace_id, "pageIndex": page_index, "limit": 100},
-        headers=get_api_headers()
+
+    document_type = request.args.get('documentType', 'Adaptive')
+    if document_type.lower() == 'all':
+        document_type = None
+
+    token = session.get("access_token", "")
+    headers = api_headers.for_token(token)
+    (payload, status), cache_status = metadata_cache.get_or_load(
+        ('documents', credential_scope(token), workspace_id),
+        lambda: load_documents(workspace_id, headers),
+        force=bool(request.args.get('refresh'))
     )
-    
-    app.logger.debug(f"Documents API response status: {response.status_code}")
-    
-    if response.text:
-        try:
-            data = response.json()
-            app.logger.debug(f"Documents API response type: {type(data)} \n {data}")
-            
-            # Ensure we have a consistent format for the frontend
-            if isinstance(data, dict) and 'documents' in data["paginatedDocuments"]:
-                # Handle when API returns {documents: [...]}
-                documents = data["paginatedDocuments"]['documents']
-            else:
-                # Handle unexpected format
-                documents = []
-                if data:  # If there's some data but not in expected format
-                    app.logger.warning(f"Unexpected documents API response format: {data}")
-                    documents = [data]  # Try to use it anyway
-            
-            #print(f"Documents API response: {documents}")
-
-            # Normalize each document to have consistent properties
-            normalized_docs = []
-            for doc in documents:
-                if isinstance(doc, dict):
-                    doc_info = doc.get('documentInfo', doc)
-                    lang_info = doc_info.get('languages', [])
-                    doc_type = doc_info.get('documentType', 'Unknown')
-                    if doc_type == 'Adaptive':
-                        normalized_docs.append({
-                        'id': doc_info.get('id', 'unknown'),
-                        'name': doc_info.get('name', 'Unnamed Document'),
-                        'type': doc_info.get('documentType', 'Unknown'),
-                        'createdDate': doc_info.get('createdDate', ''),
-                        'status': 'Available' if doc_info.get('isAvailable', True) else 'Unavailable',
-                        'lp': lang_info[0]['languageCode']+ '-' + lang_info[1]['languageCode']
-
-                        })
-
-                # print(f"Normalized document...: {normalized_docs[-1]}")
-            
-            return jsonify(normalized_docs), response.status_code
-        except Exception as e:
-            app.logger.error(f"Error processing documents response: {e}")
-            return jsonify({"error": "Invalid JSON response from backend", "raw": response.text}), response.status_code
-    else:
-        return jsonify([]), response.status_code
-        
+    if status != 200:
+        return cached_response(payload, status, cache_status)
+
+    return cached_response(filter_documents(
+        payload,
+        document_type=document_type,
+        source_lang=request.args.get('sourceLanguage'),
+        target_lang=request.args.get('targetLanguage')
+    ), status, cache_status)
+
 # Utility function to import a TSV file as a document (from curl example)
 def import_tsvFile(api_url, token, gpt_url, gpt_key, translation_key, region, workspace_id, document_name, tsv_file_path, tsv_file_name, source_lang):
     """
     Imports a TSV file as a document using a multipart/form-data POST request.
     Equivalent to the provided curl command.
     """
-    import requests
-    import json
 
     # Prepare DocumentDetails as a JSON string
     document_details = [
@@ -309,7 +530,7 @@ def import_tsvFile(api_url, token, gpt_url, gpt_key, translation_key, region, wo
         files = {
             'FILES': (tsv_file_name, f, 'text/tab-separated-values')
         }
-        response = requests.post(
+        response = upstream.post(
             f"{api_url}/api/texttranslator/v1.0/documents/import",
             params={"workspaceId": workspace_id},
             headers=headers,
@@ -320,130 +541,200 @@ def import_tsvFile(api_url, token, gpt_url, gpt_key, translation_key, region, wo
 
 
 @app.route('/api/documents/import', methods=['POST'])
-
 def import_document():
     """
-    Example endpoint to import a TSV file using the import TSV File utility.
-    Expects form fields: document_name, tsv_file (uploaded), source_lang
+    Import one or more documents by forwarding the client's multipart upload.
+    Expects form fields: DocumentDetails (JSON array) followed by one or more FILES parts.
+    The upload is streamed to the backend as it arrives; nothing is written to disk.
+    TSV files are validated and normalized on the way unless validate=off (see IMPORT_TSV_VALIDATION).
     """
 
     workspace_id = request.args.get('workspaceId')
-    document_details = request.form.get('DocumentDetails')
-    tsv_file = request.files.get('FILES')
-    document_name = json.loads(document_details)[0]['DocumentName']
-    source_lang = json.loads(document_details)[0]['FileDetails'][0]['LanguageCode']
-
-    # print(f"Importing TSV document: {workspace_id}, {document_details}, {tsv_file}, {document_name}, {source_lang}")
-
-    if not (workspace_id and document_details and tsv_file):
+    if not workspace_id:
         return jsonify({"error": "Missing required parameters"}), 400
 
-    # Save uploaded file temporarily
-    temp_path = os.path.join(tempfile.gettempdir(), tsv_file.filename)
-    tsv_file.save(temp_path)
+    # Validate only the head of the upload; the rest is read while it is being forwarded
+    stream = request.stream
+    try:
+        mode = validation_mode(request.args.get('validate'))
+        scanner = scan_upload(stream, request.content_type)
+    except ImportFormError as e:
+        return jsonify({"error": str(e)}), 400
+
+    token = session.get("access_token", "")
+    forward = ImportForward(mode, multipart_boundary(request.content_type), request.content_type,
+                            scanner.document_details, token, request.args, workspace_id, translation_memory)
+    headers = dict(api_headers.for_token(token, content_type=None))
+    headers["content-type"] = forward.content_type
+    if forward.cleaner is None:
+        body = UploadBody(scanner.head, stream, request.content_length)
+        # Without a client Content-Length the body is sent chunked
+        data = body if request.content_length else iter(body)
+    else:
+        # TSV files are validated and normalized while they are forwarded
+        data = iter_cleaned_upload(forward.cleaner, scanner.head, stream)
 
     try:
-        response = import_tsvFile(
-            api_url=API_URL,
-            token=session.get("access_token", ""),
-            gpt_url=GPT_URL,
-            gpt_key=GPT_KEY,
-            translation_key=TRANSLATION_KEY,
-            region=REGION,
-            workspace_id=workspace_id,
-            document_name=document_name,
-            tsv_file_path=temp_path,
-            tsv_file_name=tsv_file.filename,
-            source_lang=source_lang
+        response = upstream.post(
+            f"{API_URL}/api/texttranslator/v1.0/documents/import",
+            params={"workspaceId": workspace_id},
+            headers=headers,
+            data=data
         )
-        return jsonify(response.json()), response.status_code
-    finally:
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+    except Exception:
+        rejected = forward.failed()
+        if rejected is not None:
+            return jsonify({"error": str(rejected), "validation": rejected.report}), 422
+        raise
+    forward.settle(response.ok, metadata_cache)
+    result = relay_response(response)
+    if forward.validation_header() is not None:
+        result.headers['X-Import-Validation'] = forward.validation_header()
+    return result
+
+
+@app.route('/api/documents/import/validate', methods=['POST'])
+def validate_import():
+    """
+    Check TSV files without importing them: a multipart upload like /api/documents/import,
+    or a raw TSV request body. Returns the validation report of every TSV file.
+    """
+    stream = request.stream
+    boundary = multipart_boundary(request.content_type)
+    if boundary:
+        cleaner = UploadCleaner(boundary, strict=False)
+        try:
+            for _ in iter_cleaned_upload(cleaner, [], stream):
+                pass
+        except ValueError as e:
+            return jsonify({"error": f"Malformed multipart body: {e}"}), 400
+        return jsonify(cleaner.report())
 
+    tsv = TsvCleaner()
+    while True:
+        chunk = stream.read(IMPORT_CHUNK_SIZE)
+        if not chunk:
+            break
+        tsv.feed(chunk)
+    tsv.finish()
+    report = dict(name=request.args.get('filename', ''), **tsv.report())
+    return jsonify({"valid": report["errors"] == 0, "files": [report]})
+
+
+def fetch_import_job(job_id, headers):
+    return upstream.get(
+        f"{API_URL}/api/texttranslator/v1.0/documents/import/jobs/{job_id}",
+        headers=headers
+    )
+
+def on_import_job_done(scope, watch):
+    # A finished import changes the caller's document lists
+    metadata_cache.invalidate('documents', scope=scope)
+
+# One shared background poller per import job, feeding every waiting client
+import_job_poller = ImportJobPoller(fetch_import_job, on_done=on_import_job_done)
 
 @app.route('/api/documents/import/jobs/<job_id>', methods=['GET'])
 def get_import_job_status(job_id):
     """Get the status of a document import job."""
-    response = requests.get(
-        f"{API_URL}/api/texttranslator/v1.0/documents/import/jobs/{job_id}",
-        headers=get_api_headers()
-    )
-    if response.text:
+    token = session.get("access_token", "")
+    watch = import_job_poller.peek(credential_scope(token), job_id)
+    if watch is not None and watch.updated_at and (watch.done or time.monotonic() - watch.updated_at < JOB_POLL_MIN_INTERVAL):
+        # A shared poller fetched this job moments ago, or already saw it finish
+        snapshot = watch.snapshot()
+        return cached_response(snapshot["status"], snapshot["statusCode"], 'HIT')
+
+    response = fetch_import_job(job_id, api_headers.for_token(token))
+    return relay_response(response)
+
+@app.route('/api/documents/import/jobs/<job_id>/events', methods=['GET'])
+def stream_import_job_status(job_id):
+    """
+    Push import job status changes as Server-Sent Events.
+    Emits a 'status' event on every change and a final 'done' event once the job finishes.
+    """
+    token = session.get("access_token", "")
+    watch = import_job_poller.watch(credential_scope(token), job_id, api_headers.for_token(token))
+
+    def events():
+        watch.subscribe()
         try:
-            return jsonify(response.json()), response.status_code
-        except Exception:
-            return jsonify({"error": "Invalid JSON response from backend", "raw": response.text}), response.status_code
-    else:
-        return jsonify({}), response.status_code
+            version = 0
+            while True:
+                snapshot = watch.wait_for_change(version, timeout=JOB_EVENTS_KEEPALIVE)
+                if snapshot["version"] > version:
+                    version = snapshot["version"]
+                    event = 'done' if snapshot["done"] else 'status'
+                    yield f"event: {event}\nid: {version}\ndata: {json.dumps(snapshot)}\n\n"
+                    if snapshot["done"]:
+                        return
+                else:
+                    yield ": keep-alive\n\n"
+        finally:
+            watch.unsubscribe()
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/documents/import/jobs/<job_id>/wait', methods=['GET'])
+def wait_import_job_status(job_id):
+    """
+    Long-poll variant of the events stream: returns as soon as the job status
+    version moves past `since`, the job finishes, or `timeout` seconds pass.
+    """
+    since = request.args.get('since', 0, type=int)
+    timeout = min(request.args.get('timeout', 25, type=float), 60)
+    token = session.get("access_token", "")
+    watch = import_job_poller.watch(credential_scope(token), job_id, api_headers.for_token(token))
+    watch.subscribe()
+    try:
+        return jsonify(watch.wait_for_change(since, timeout=timeout))
+    finally:
+        watch.unsubscribe()
 
 # Index endpoints
 @app.route('/api/index', methods=['GET'])
+@compressible
 def get_all_indices():
     """Get all indices for a workspace."""
     workspace_id = request.args.get('workspaceId')
-    response = requests.get(
-        f"{API_URL}/api/texttranslator/v1.0/index",
-        params={"workspaceId": workspace_id},
-        headers=get_api_headers()
-    )
+    token = session.get("access_token", "")
+    headers = api_headers.for_token(token)
 
-    app.logger.debug(f"Documents API response status: {response.status_code}")
-    
-    if response.text:
-        try:
-            data = response.json()
-            app.logger.debug(f"Indices API response type: {type(data)} \n {data}")
-            
-            # Ensure we have a consistent format for the frontend
-            if isinstance(data, dict) and 'indexes' in data:
-                # Handle when API returns {indices: [...]}
-                indexes = data["indexes"]
-            else:
-                # Handle unexpected format
-                indexes = []
-                if data:  # If there's some data but not in expected format
-                    app.logger.warning(f"Unexpected indices API response format: {data}")
-                    indexes = [data]  # Try to use it anyway
-
-            # Normalize each index to have consistent properties
-            normalized_indices = []
-            for index in indexes:
-                if isinstance(index, dict):
-                    normalized_indices.append({
-                        'id': index.get('id', 'unknown'),
-                        'apiDomain': index.get('apiDomain', 'unknown'),
-                        'createdDate': index.get('createdDate', ''),
-                        'name': index.get('name', 'Unnamed Index'),
-                        'status': 'Available' if index.get('isAvailable', True) else 'Unavailable'
-                    })
-
-                # print(f"Normalized document...: {normalized_docs[-1]}")
-
-            return jsonify(normalized_indices), response.status_code
-        except Exception as e:
-            app.logger.error(f"Error processing documents response: {e}")
-            return jsonify({"error": "Invalid JSON response from backend", "raw": response.text}), response.status_code
-    else:
-        return jsonify([]), response.status_code
+    def load():
+        response = upstream.get(
+            f"{API_URL}/api/texttranslator/v1.0/index",
+            params={"workspaceId": workspace_id},
+            headers=headers
+        )
+        app.logger.debug(f"Indices API response status: {response.status_code}")
+        (payload, status), cacheable = decode_metadata(response, [], normalize_indices)
+        if cacheable and workspace_id and translation_memory is not None:
+            # Let translate calls naming an index use the pairs imported into its workspace
+            for index in payload:
+                for alias in (index['id'], index['apiDomain']):
+                    if alias != 'unknown':
+                        translation_memory.alias(credential_scope(token), alias, workspace_id)
+        return (payload, status), cacheable
+
+    (payload, status), cache_status = metadata_cache.get_or_load(
+        ('indices', credential_scope(token), workspace_id), load, force=bool(request.args.get('refresh')))
+    return cached_response(payload, status, cache_status)
 
 @app.route('/api/index/<index_id>', methods=['GET'])
 def get_index(index_id):
     """Get a specific index by ID."""
-    response = requests.get(
-        f"{API_URL}/api/texttranslator/v1.0/index/{index_id}",
-        headers=get_api_headers()
+    headers = get_api_headers()
+    response = upstream_flights.do(
+        ('index', credential_scope(session.get("access_token", "")), index_id),
+        lambda: upstream.get(f"{API_URL}/api/texttranslator/v1.0/index/{index_id}", headers=headers)
     )
-    if response.text:
-        try:
-            data = response.json()
-            app.logger.debug(f"Single index API response: {data}")
-            return data, response.status_code
-        except Exception as e:
-            app.logger.error(f"Error parsing JSON response for index {index_id}: {e}")
-            return jsonify({"error": "Invalid JSON response from backend", "raw": response.text}), response.status_code
-    else:
+    if not response.content:
         return jsonify({"error": "No data returned from API"}), 404
+    return relay_response(response)
 
 @app.route('/api/index', methods=['POST'])
 def create_index():
@@ -486,7 +777,7 @@ def create_index():
             # Send to API
             # with open(temp_file.name, 'rb') as f:
                 # files = [('TSV_FILE', (tsv_file.filename, f, 'text/tab-separated-values'))]
-            response = requests.post(
+            response = upstream.post(
                 f"{API_URL}/api/texttranslator/v1.0/index?workspaceId={workspace_id}",
                 # params={"workspaceId": workspace_id},
                 headers=get_api_headers(),
@@ -512,7 +803,7 @@ def create_index():
                 return jsonify({"error": f"Missing required field: {field}"}), 400
         
         # Send to API
-        response = requests.post(
+        response = upstream.post(
             f"{API_URL}/api/texttranslator/v1.0/index",
             params={"workspaceId": workspace_id},
             headers=get_api_headers(),
@@ -520,65 +811,561 @@ def create_index():
         )
     
     app.logger.debug(f"Index creation response status: {response.status_code}")
+    if response.ok:
+        metadata_cache.invalidate('indices', workspace_id)
     
-    if response.text:
-        try:
-            result = response.json()
-            app.logger.debug(f"Index creation response: {result}")
-            return jsonify(result), response.status_code
-        except Exception as e:
-            app.logger.error(f"Error parsing JSON response from index creation: {e}")
-            return jsonify({"error": "Invalid JSON response from backend", "raw": response.text}), response.status_code
-    else:
-        return jsonify({"message": "Index creation initiated - no content returned"}), response.status_code
+    return relay_response(response, {"message": "Index creation initiated - no content returned"})
 
 @app.route('/api/index/<index_id>', methods=['DELETE'])
 def delete_index(index_id):
     """Delete a specific index by ID."""
-    response = requests.delete(
+    response = upstream.delete(
         f"{API_URL}/api/texttranslator/v1.0/index/{index_id}",
         headers=get_api_headers()
     )
-    if response.text:
+    if response.ok:
+        # The index's workspace is not known here, so drop every cached index list
+        metadata_cache.invalidate('indices')
+    return relay_response(response)
+
+# Bulk import-and-index pipelines
+import_pipelines = ImportPipelines()
+
+@app.route('/api/pipelines', methods=['POST'])
+def start_pipeline():
+    """
+    Import many TSV files into a workspace and index them in one call.
+    Expects form fields: Manifest (JSON, see import_pipeline.parse_manifest) followed by one FILES part per file.
+    Each file is streamed to the backend as it arrives, validated like /api/documents/import; nothing is
+    written to disk. Its job is then followed by the shared import job poller, and each index is created
+    as soon as its documents are available. Returns 202 with the pipeline's progress.
+    """
+    workspace_id = request.args.get('workspaceId')
+    if not workspace_id:
+        return jsonify({"error": "Missing required parameters"}), 400
+    boundary = multipart_boundary(request.content_type)
+    if not boundary:
+        return jsonify({"error": "Expected a multipart/form-data upload"}), 400
+    upload = MultipartReader(request.stream, boundary)
+    try:
+        mode = validation_mode(request.args.get('validate'))
+        fields = upload.read_fields()
+        if 'Manifest' not in fields:
+            return jsonify({"error": "Manifest must precede the uploaded FILES"}), 400
+        entries, concurrency = parse_manifest(json.loads(fields['Manifest']))
+    except (ImportFormError, ManifestError) as e:
+        return jsonify({"error": str(e)}), 400
+    except ValueError:
+        return jsonify({"error": "Manifest must be valid JSON"}), 400
+
+    token = session.get("access_token", "")
+    cleaners = []
+
+    def import_file(entry, part):
+        file_event, data = part
+        loader = None
+        if translation_memory is not None and mode != 'off':
+            # Accepted pairs also feed the translation memory once the file is imported
+            loader = ImportMemoryLoader(
+                translation_memory, None, credential_scope(token), dataset=workspace_id,
+                source_lang=entry['sourceLanguage'], target_lang=entry['targetLanguage'])
+        cleaner = UploadCleaner(strict=(mode == 'strict'), clean=(mode != 'off'),
+                                sink_for=loader.sink_for if loader else None)
+        cleaners.append(cleaner)
+        headers = dict(api_headers.for_token(token, content_type=None))
+        headers["content-type"] = cleaner.content_type
+        document_details = [{
+            "DocumentName": entry['documentName'],
+            "DocumentType": "Adaptive",
+            "FileDetails": [{"Name": entry['file'], "LanguageCode": entry['sourceLanguage'],
+                             "OverwriteIfExists": False}]
+        }]
         try:
-            return jsonify(response.json()), response.status_code
+            response = upstream.post(
+                f"{API_URL}/api/texttranslator/v1.0/documents/import",
+                params={"workspaceId": workspace_id},
+                headers=headers,
+                data=iter_pipeline_file(cleaner, document_details, file_event, data)
+            )
         except Exception:
-            return jsonify({"error": "Invalid JSON response from backend", "raw": response.text}), response.status_code
-    else:
-        return jsonify({}), response.status_code
+            if loader is not None:
+                loader.rollback()
+            if cleaner.rejected is not None:
+                # A strict-mode file is cut off at its first invalid line
+                raise cleaner.rejected
+            raise
+        if loader is not None:
+            if response.ok:
+                loader.commit()
+            else:
+                loader.rollback()
+        if response.ok:
+            metadata_cache.invalidate('documents', workspace_id)
+        return response
+
+    def watch_job(job_id):
+        return import_job_poller.watch(credential_scope(token), job_id, api_headers.for_token(token))
+
+    def create_pipeline_index(name, source_lang, target_lang, document_ids):
+        response = upstream.post(
+            f"{API_URL}/api/texttranslator/v1.0/index",
+            params={"workspaceId": workspace_id},
+            headers=api_headers.for_token(token),
+            json={"documentIds": document_ids, "IndexName": name,
+                  "SourceLanguage": source_lang, "TargetLanguage": target_lang}
+        )
+        if response.ok:
+            metadata_cache.invalidate('indices', workspace_id)
+        return response
+
+    pipeline = import_pipelines.start(ImportPipeline(
+        credential_scope(token), workspace_id, entries, import_file, watch_job, create_pipeline_index,
+        concurrency=min(concurrency or PIPELINE_CONCURRENCY, PIPELINE_CONCURRENCY)
+    ))
+    try:
+        for file_event, data in upload.files():
+            entry = pipeline.entry_for(file_event.filename)
+            # Parts the manifest does not list are skipped
+            if entry is not None:
+                pipeline.import_entry(entry, (file_event, data))
+    except ImportFormError as e:
+        app.logger.warning(f"Pipeline {pipeline.id}: upload ended early: {e}")
+    finally:
+        pipeline.close()
+    result = jsonify(pipeline.snapshot())
+    result.headers['Location'] = f"/api/pipelines/{pipeline.id}"
+    if mode != 'off':
+        totals = {"files": 0, "pairs": 0, "duplicates": 0, "errors": 0}
+        for cleaner in cleaners:
+            for name, value in cleaner.summary().items():
+                totals[name] += value
+        result.headers['X-Import-Validation'] = json.dumps(totals)
+    return result, 202
+
+@app.route('/api/pipelines', methods=['GET'])
+def list_pipelines():
+    """List the caller's pipelines with their progress."""
+    pipelines = import_pipelines.list(credential_scope(session.get("access_token", "")))
+    summaries = []
+    for pipeline in pipelines:
+        snapshot = pipeline.snapshot()
+        summaries.append({name: snapshot[name] for name in (
+            'pipelineId', 'workspaceId', 'done', 'startedAt', 'elapsedSeconds', 'progress')})
+    return jsonify(summaries)
+
+@app.route('/api/pipelines/<pipeline_id>', methods=['GET'])
+def get_pipeline(pipeline_id):
+    """
+    Get a pipeline's progress and the state of each file and index.
+    With `since`, waits up to `timeout` seconds for the version to move past it.
+    """
+    pipeline = import_pipelines.get(credential_scope(session.get("access_token", "")), pipeline_id)
+    if pipeline is None:
+        return jsonify({"error": "Pipeline not found"}), 404
+    since = request.args.get('since', type=int)
+    if since is None:
+        return jsonify(pipeline.snapshot())
+    timeout = min(request.args.get('timeout', 25, type=float), 60)
+    return jsonify(pipeline.wait_for_change(since, timeout=timeout))
 
 # Translation endpoints
 @app.route('/api/translate', methods=['POST'])
 def translate_text():
-    """Translate text using the Adaptive CT API."""
-    params = {
-        'api-version': '2025-05-01-preview',
-        'trackperformance': 'true',
-        'from': request.args.get('from', 'en'),
-        'to': request.args.get('to', 'de'),
-        'texttype': request.args.get('texttype', 'Plain'),
-        'flight': 'experimental',
-        'option': 'nocache',
+    """
+    Translate text using the Adaptive CT API.
+    Segments with an exact match in the translation memory are answered locally;
+    only the rest are sent upstream (pass nomemory=true to skip the memory).
+    Targets without an AdaptiveDatasetId or ReferenceTextPairs get the most similar
+    pairs from the caller's dataset named by references=<datasetId>, when asked for.
+    Identical concurrent requests from the same credential share one upstream call,
+    which is cancelled when the client disconnects before it returns.
+    """
+    params = get_translate_params()
+    call = TranslateCall(params, request.json, session.get("access_token", ""), request.args,
+                         translation_cache, translation_memory, reference_index)
+    cached = call.cached()
+    if cached is not None:
+        result = Response(cached, mimetype=JSON_MIMETYPE) if isinstance(cached, bytes) else jsonify(cached)
+        result.headers['X-Cache'] = 'HIT'
+        return result, 200
+    answered = call.prepare()
+    if answered is not None:
+        result = jsonify(answered)
+        result.headers.update(call.response_headers())
+        return result, 200
+
+    headers = api_headers.for_token(call.token)
+    with disconnect_watcher.watch(request.environ):
+        response = upstream_flights.do(call.flight_key, lambda: post_translation(params, headers, call.body))
+    if not response.text:
+        return jsonify({}), response.status_code
+    if call.relays(response.content, response.headers.get('Content-Type')):
+        # Nothing to merge in: forward and cache the upstream bytes unchanged
+        if response.status_code == 200:
+            metrics.record_translator(response.headers, response.content)
+        call.finish(response.status_code, response.content, len(response.content), relayed=True)
+        result = Response(response.content, mimetype=JSON_MIMETYPE)
+    else:
+        try:
+            result = loads(response.content)
+        except ValueError:
+            return jsonify({"error": "Invalid JSON response from backend", "raw": response.text}), response.status_code
+        if response.status_code == 200:
+            metrics.record_translator(response.headers, result)
+        result = jsonify(call.finish(response.status_code, result, len(response.content)))
+    result.headers.update(call.response_headers(response.status_code, response.headers))
+    return result, response.status_code
+
+@app.route('/api/translate/batch', methods=['POST'])
+def translate_batch_route():
+    """
+    Translate a large array of segments in one call.
+    Expects the same element array as /api/translate; segments are packed into
+    size-bounded upstream requests sent concurrently, and results come back in
+    input order with per-segment errors.
+    """
+    params = get_translate_params()
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('Segments')
+    if not isinstance(data, list) or not data:
+        return jsonify({"error": "Request body must be a non-empty array of segments"}), 400
+    if len(data) > BATCH_MAX_SEGMENTS:
+        return jsonify({"error": f"Batch exceeds {BATCH_MAX_SEGMENTS} segments"}), 413
+
+    token = session.get("access_token", "")
+    headers = api_headers.for_token(token)
+    bypass_cache = bool(request.args.get('nocache'))
+    concurrency = min(request.args.get('concurrency', BATCH_CONCURRENCY, type=int), BATCH_CONCURRENCY)
+
+    def send(elements):
+        return post_translation(params, headers, elements, priority=BULK)
+
+    results, summary = translate_batch(
+        data,
+        in_request(send),
+        key_for=lambda item: translation_cache_key(params, [item], scope=token),
+        cache=None if bypass_cache else translation_cache,
+        concurrency=concurrency
+    )
+    return jsonify({"results": results, "summary": summary}), 200
+
+@app.route('/api/translate/fanout', methods=['POST'])
+def translate_fanout_route():
+    """
+    Translate one source into many targets in one call.
+    Expects {"Text", "Language", "TextType", "Targets": [...]}, where each target
+    names a Language and optionally an AdaptiveDatasetId or ReferenceTextPairs,
+    Tone, Grade, Gender or DeploymentName (the rest default like /api/translate/file).
+    Targets are packed into as few upstream requests as possible, the requests
+    run concurrently, and results come back in target order with per-target latency.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('Text'), str):
+        return jsonify({"error": "Request body must be an object with a Text field"}), 400
+    targets = data.get('Targets')
+    if not isinstance(targets, list) or not targets or not all(
+            isinstance(target, dict) and target.get('Language') for target in targets):
+        return jsonify({"error": "Targets must be a non-empty array of objects with a Language"}), 400
+    if len(targets) > FANOUT_MAX_TARGETS:
+        return jsonify({"error": f"Fan-out exceeds {FANOUT_MAX_TARGETS} targets"}), 413
+
+    params = get_translate_params()
+    defaults = get_translate_target()
+    del defaults['Language']
+    defaults.pop('AdaptiveDatasetId', None)
+    source = {
+        'Text': data['Text'],
+        'Script': data.get('Script', ''),
+        'Language': data.get('Language') or params['from'],
+        'TextType': data.get('TextType') or params['texttype'],
     }
-    
-    # Add nocache option if specified
-    if request.args.get('nocache'):
-        params['options'] = 'nocache'
-    
-    data = request.json
-    response = requests.post(
-        TRANSLATOR_URL,
-        params=params,
-        headers=get_api_headers(),
-        json=data
+    body = [dict(source, Targets=[dict(defaults, **target) for target in targets])]
+    reference_targets = None
+    token = session.get("access_token", "")
+    if reference_index is not None and request.args.get('references'):
+        body, reference_targets = inject_reference_pairs(reference_index, body, params, credential_scope(token),
+                                                         request.args['references'])
+
+    headers = api_headers.for_token(token)
+
+    def send(elements):
+        languages = sorted({target['Language'] for element in elements for target in element['Targets']})
+        return post_translation(dict(params, **{'from': source['Language'], 'to': languages}), headers, elements)
+
+    results, summary = translate_fanout(source, body[0]['Targets'], in_request(send))
+    result = jsonify({"results": results, "summary": summary})
+    if reference_targets is not None:
+        result.headers['X-Reference-Pairs'] = str(reference_targets)
+    return result, 200
+
+@app.route('/api/translate/document', methods=['POST'])
+def translate_document_route():
+    """
+    Translate a long Plain or HTML document.
+    Expects {"Text", "TextType"}; target options come from the query string as for
+    /api/translate/file. The text is split into sentences (keeping HTML tags in
+    place), packed into requests of at most DOCUMENT_CHUNK_CHARS characters that
+    are sent concurrently, and the translations are put back together in order.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('Text'), str):
+        return jsonify({"error": "Request body must be an object with a Text field"}), 400
+    if len(data['Text']) > DOCUMENT_MAX_CHARS:
+        return jsonify({"error": f"Document exceeds {DOCUMENT_MAX_CHARS} characters"}), 413
+
+    params = get_translate_params()
+    html = (data.get('TextType') or params['texttype']).lower() == 'html'
+    params['texttype'] = 'HTML' if html else 'Plain'
+    if data.get('Language'):
+        params['from'] = data['Language']
+    target = get_translate_target()
+    token = session.get("access_token", "")
+    headers = api_headers.for_token(token)
+    bypass_cache = bool(request.args.get('nocache'))
+
+    parts = segment_document(data['Text'], html=html)
+    texts = [piece for translate, piece in parts if translate]
+
+    def send(elements):
+        return post_translation(params, headers, elements)
+
+    results, summary = translate_batch(
+        translation_elements(texts, params, target),
+        in_request(send),
+        key_for=lambda item: translation_cache_key(params, [item], scope=token),
+        cache=None if bypass_cache else translation_cache,
+        max_chars=max([DOCUMENT_CHUNK_CHARS] + [len(text) for text in texts]),
+        concurrency=DOCUMENT_CONCURRENCY
     )
-    if response.text:
+    text, errors = assemble_document(parts, results)
+    return jsonify({"text": text, "errors": errors, "summary": summary}), 200
+
+@app.route('/api/translate/incremental', methods=['POST'])
+def translate_incremental():
+    """
+    Translate a text that is being edited, sending only the sentences that changed.
+    Takes and returns the same one-element array as /api/translate. The session
+    remembers the last version of each document (docId query parameter, default
+    'default') with its sentence translations; new sentences are translated in
+    parallel and merged with the remembered ones. New sentences with an exact
+    match in the caller's translation memory are answered from it (pass
+    nomemory=true to skip the memory).
+    """
+    data = request.get_json(silent=True)
+    element = data[0] if isinstance(data, list) and len(data) == 1 else None
+    if not isinstance(element, dict) or not isinstance(element.get('Text'), str):
+        return jsonify({"error": "Request body must be an array with one element with a Text field"}), 400
+    targets = [target for target in element.get('Targets') or [] if isinstance(target, dict)]
+    if not targets:
+        return jsonify({"error": "The element must have at least one target"}), 400
+    if len(element['Text']) > DOCUMENT_MAX_CHARS:
+        return jsonify({"error": f"Text exceeds {DOCUMENT_MAX_CHARS} characters"}), 413
+
+    params = get_translate_params()
+    token = session.get("access_token", "")
+    headers = api_headers.for_token(token)
+    bypass_cache = bool(request.args.get('nocache'))
+    html = (element.get('TextType') or params['texttype']).lower() == 'html'
+    key = (getattr(session, 'sid', None) or credential_scope(token), request.args.get('docId', 'default'))
+
+    def send(elements):
+        return post_translation(params, headers, elements)
+
+    use_memory = translation_memory is not None and not request.args.get('nomemory')
+
+    def translate_texts(sentences):
+        items, plan = [dict(element, Text=sentence) for sentence in sentences], None
+        if use_memory:
+            items, plan, _ = split_by_memory(translation_memory, items, params, credential_scope(token))
+            if not items:
+                translation_memory.record_short_circuit()
+                return merge_with_memory(plan, [])
+        results, _ = translate_batch(
+            items,
+            in_request(in_scope(send)),
+            key_for=lambda item: translation_cache_key(params, [item], scope=token),
+            cache=None if bypass_cache else translation_cache,
+            max_chars=max([DOCUMENT_CHUNK_CHARS] + [len(sentence) * len(targets) for sentence in sentences]),
+            concurrency=DOCUMENT_CONCURRENCY
+        )
+        return merge_with_memory(plan, results) if plan is not None else results
+
+    with disconnect_watcher.watch(request.environ):
+        texts, errors, counters = incremental_translations.translate(
+            key, translation_cache_key(params, [dict(element, Text='')], scope=token),
+            element['Text'], translate_texts, html=html, targets=len(targets)
+        )
+    if errors:
+        return jsonify({"error": "Some sentences could not be translated", "errors": errors}), 502
+    result = jsonify([{"translations": [{"text": text, "to": target.get('Language', params['to'])}
+                                        for text, target in zip(texts, targets)]}])
+    result.headers['X-Incremental-Sentences'] = str(counters['sentences'])
+    result.headers['X-Incremental-Reused'] = str(counters['reused'])
+    result.headers['X-Incremental-Sent'] = str(counters['sent'])
+    return result, 200
+
+@app.route('/api/translate/cancellations', methods=['GET'])
+def get_cancellation_stats():
+    """Get counters of translate calls that completed or were cancelled by a client disconnect."""
+    return jsonify(disconnect_watcher.stats())
+
+@app.route('/api/translate/incremental', methods=['GET'])
+def get_incremental_stats():
+    """Get counters of reused and re-sent sentences of incremental translation."""
+    return jsonify(incremental_translations.stats())
+
+@app.route('/api/translate/file', methods=['POST'])
+def translate_file():
+    """
+    Translate an uploaded TXT or TSV file line by line and stream the results back as NDJSON.
+    The file can be sent as the FILE field of a multipart form or as the raw request body.
+    Either way it is read as it is translated, so the first lines come back before the upload ends.
+    For TSV files the first column is translated.
+    """
+    params = get_translate_params()
+    target = get_translate_target()
+
+    boundary = multipart_boundary(request.content_type)
+    if boundary:
         try:
-            return jsonify(response.json()), response.status_code
-        except Exception:
-            return jsonify({"error": "Invalid JSON response from backend", "raw": response.text}), response.status_code
+            part = next(MultipartReader(request.stream, boundary).files(names=('FILE', 'FILES')), None)
+        except ImportFormError as e:
+            return jsonify({"error": str(e)}), 400
+        if part is None:
+            return jsonify({"error": "Missing FILE upload"}), 400
+        stream, filename = io.BufferedReader(PartStream(part[1])), part[0].filename
     else:
-        return jsonify({}), response.status_code
+        stream, filename = request.stream, request.args.get('filename', '')
+    is_tsv = request.args.get('format') == 'tsv' or filename.lower().endswith('.tsv')
+
+    token = session.get("access_token", "")
+    headers = api_headers.for_token(token)
+    bypass_cache = bool(request.args.get('nocache'))
+
+    def send(elements):
+        return post_translation(params, headers, elements, priority=BULK)
+
+    def translate_window(texts):
+        items = translation_elements(texts, params, target)
+        results, _ = translate_batch(
+            items,
+            in_request(send),
+            key_for=lambda item: translation_cache_key(params, [item], scope=token),
+            cache=None if bypass_cache else translation_cache,
+            concurrency=1
+        )
+        return results
+
+    lines = iter_source_lines(stream, tsv=is_tsv)
+    return Response(
+        stream_with_context(stream_translations(lines, in_request(translate_window))),
+        mimetype='application/x-ndjson',
+        headers={'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/documents/import/jobs/poller', methods=['GET'])
+def get_import_job_poller_stats():
+    """Get counters of the shared import job pollers."""
+    return jsonify(import_job_poller.stats())
+
+@app.route('/api/translate/memory', methods=['GET'])
+def get_translation_memory_stats():
+    """Get translation memory size, hit/miss counters and lookup latency."""
+    if translation_memory is None:
+        return jsonify({"error": "Translation memory is disabled"}), 404
+    return jsonify(translation_memory.stats())
+
+@app.route('/api/translate/memory', methods=['POST'])
+def load_translation_memory():
+    """
+    Bulk-load a raw TSV request body (source<TAB>target) into one of the caller's datasets.
+    Requires sourceLanguage, targetLanguage and datasetId (the workspace or dataset id);
+    the pairs only answer requests sent with the same credential.
+    """
+    if translation_memory is None:
+        return jsonify({"error": "Translation memory is disabled"}), 404
+    token = session.get("access_token")
+    if not token:
+        return jsonify({"error": "Not authenticated"}), 401
+    source_lang = request.args.get('sourceLanguage')
+    target_lang = request.args.get('targetLanguage')
+    dataset = request.args.get('datasetId')
+    if not (source_lang and target_lang and dataset):
+        return jsonify({"error": "Missing required parameters"}), 400
+    report = translation_memory.load_tsv(request.stream, credential_scope(token), dataset, source_lang, target_lang,
+                                         staged=True)
+    return jsonify(report)
+
+@app.route('/api/translate/memory', methods=['DELETE'])
+def clear_translation_memory():
+    """Delete the pairs of one of the caller's datasets (datasetId)."""
+    if translation_memory is None:
+        return jsonify({"error": "Translation memory is disabled"}), 404
+    token = session.get("access_token")
+    if not token:
+        return jsonify({"error": "Not authenticated"}), 401
+    dataset = request.args.get('datasetId')
+    if not dataset:
+        return jsonify({"error": "Missing required parameters"}), 400
+    translation_memory.clear(credential_scope(token), dataset)
+    return jsonify(translation_memory.stats())
+
+@app.route('/api/translate/references', methods=['GET'])
+def get_reference_index_stats():
+    """Get reference index size, injection counters and query latency."""
+    if reference_index is None:
+        return jsonify({"error": "Reference pair selection is disabled"}), 404
+    return jsonify(reference_index.stats())
+
+@app.route('/api/rate-governor', methods=['GET'])
+def get_rate_governor_stats():
+    """Get queue depth, wait times and throttling counters of the upstream rate governor."""
+    return jsonify(rate_governor.stats())
+
+@app.route('/api/translate/resilience', methods=['GET'])
+def get_resilience_stats():
+    """Get hedging counters, latency percentiles with and without hedging, and circuit breaker states."""
+    return jsonify({"hedging": hedger.stats(), "circuitBreakers": circuit_breakers.stats()})
+
+for name, component in (('translation_cache', translation_cache), ('metadata_cache', metadata_cache),
+                        ('coalescing', upstream_flights), ('rate_governor', rate_governor), ('hedging', hedger),
+                        ('circuit_breakers', circuit_breakers), ('import_jobs', import_job_poller),
+                        ('translation_memory', translation_memory), ('reference_index', reference_index),
+                        ('incremental', incremental_translations), ('cancellations', disconnect_watcher),
+                        ('pipelines', import_pipelines)):
+    if component is not None:
+        metrics.register(name, component.stats)
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Get request, upstream and component metrics in the Prometheus text format."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/coalescing', methods=['GET'])
+def get_coalescing_stats():
+    """Get counters of upstream calls shared by concurrent identical requests."""
+    return jsonify(upstream_flights.stats())
+
+@app.route('/api/metadata/cache', methods=['GET'])
+def get_metadata_cache_stats():
+    """Get hit/miss counters of the workspace, index and document list cache."""
+    return jsonify(metadata_cache.stats())
+
+@app.route('/api/translate/cache', methods=['GET'])
+def get_translation_cache_stats():
+    """Get hit/miss counters and size of the server-side translation cache."""
+    return jsonify(translation_cache.stats())
+
+@app.route('/api/translate/cache', methods=['DELETE'])
+def clear_translation_cache():
+    """Drop every entry from the server-side translation cache (when TRANSLATION_CACHE_CLEAR_ENABLED)."""
+    if not session.get("access_token"):
+        return jsonify({"error": "Not authenticated"}), 401
+    if not TRANSLATION_CACHE_CLEAR_ENABLED:
+        return jsonify({"error": "Clearing the translation cache is disabled"}), 403
+    translation_cache.clear()
+    return jsonify(translation_cache.stats())
 
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
@@ -0,0 +1,675 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files(the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and / or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions :
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+#------------------------------------------------------------------------------
+
+"""
+asyncio serving mode for the proxy routes.
+
+The upstream-bound API routes are served natively on an aiohttp event loop
+with an async upstream client, so thousands of slow translations can wait
+concurrently in one process. Every other route (UI, authentication, imports,
+batch and file translation) is handed to the Flask app in a thread pool, so
+the whole application is available from a single server.
+
+    python async_app.py --port 5000
+"""
+
+import io
+import os
+import json
+import math
+import time
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import (
+    web, ClientSession, ClientTimeout, ClientConnectionError, DummyCookieJar, TCPConnector, TraceConfig
+)
+from flask import session
+from werkzeug.test import EnvironBuilder
+
+from app import (
+    app as flask_app, API_URL, TRANSLATOR_URL, api_headers, translation_cache, metadata_cache,
+    DOCUMENTS_PAGE_SIZE, DOCUMENTS_PAGE_CONCURRENCY, DOCUMENTS_MAX_PAGES,
+    get_translate_params, get_document_page_count, extract_documents, normalize_document,
+    filter_documents, normalize_indices, import_job_poller, JOB_EVENTS_KEEPALIVE, translation_memory,
+    reference_index, upstream_flights, rate_governor, hedger, circuit_breakers, metrics, disconnect_watcher
+)
+from metadata_cache import credential_scope, HIT, STALE, MISS
+from job_poller import JOB_POLL_MIN_INTERVAL
+from import_stream import (
+    ImportFormError, ImportFormScanner, IMPORT_CHUNK_SIZE, multipart_boundary, validation_mode
+)
+from request_shaping import TranslateCall, ImportForward, decode_metadata
+from upstream_client import CONNECT_TIMEOUT, READ_TIMEOUT
+from single_flight import AsyncSingleFlight
+from multidict import CIMultiDict
+from rate_governor import RateLimited, rate_keys, INTERACTIVE
+from tail_latency import CircuitOpen
+from metrics import current_timer
+from response_encoding import JSON_MIMETYPE, can_relay, compress, dumps, loads
+
+# Open upstream connections allowed across all in-flight requests
+ASYNC_UPSTREAM_LIMIT = int(os.getenv("ASYNC_UPSTREAM_LIMIT", "1000"))
+# Threads running the Flask routes that are not served natively
+ASYNC_WSGI_THREADS = int(os.getenv("ASYNC_WSGI_THREADS", "16"))
+# Seconds between checks of an import job's shared status on open event streams
+JOB_EVENTS_CHECK_INTERVAL = float(os.getenv("JOB_EVENTS_CHECK_INTERVAL", "0.5"))
+
+UPSTREAM = web.AppKey("upstream", ClientSession)
+WSGI_EXECUTOR = web.AppKey("wsgi_executor", ThreadPoolExecutor)
+REFRESH_TASKS = web.AppKey("refresh_tasks", set)
+FLIGHTS = web.AppKey("flights", AsyncSingleFlight)
+ACCESS_TOKEN = web.RequestKey("access_token", str)
+
+
+def json_response(data, status=200, headers=None):
+    """web.json_response, encoded with the fast JSON encoder."""
+    return web.Response(body=dumps(data), status=status, headers=headers, content_type=JSON_MIMETYPE)
+
+
+def compressed_json_response(request, data, status, headers):
+    """JSON response compressed for the client's Accept-Encoding, like the Flask list routes."""
+    encoding, body = compress(dumps(data), request.headers.get("Accept-Encoding", ""))
+    headers = {**headers, "Vary": "Accept-Encoding"}
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return web.Response(body=body, status=status, headers=headers, content_type=JSON_MIMETYPE)
+
+
+def error_response(message, status, **extra):
+    return json_response({"error": message, **extra}, status=status)
+
+
+def _load_session_token(cookie):
+    # Reuse the Flask session interface so both modes share one login
+    with flask_app.test_request_context(headers={"Cookie": cookie} if cookie else {}):
+        return session.get("access_token", "")
+
+
+async def get_headers(request, content_type="application/json"):
+    """Resolve the caller's token from the Flask session and build upstream headers."""
+    token = request.get(ACCESS_TOKEN)
+    if token is None:
+        token = await asyncio.to_thread(_load_session_token, request.headers.get("Cookie", ""))
+        request[ACCESS_TOKEN] = token
+    return api_headers.for_token(token, content_type)
+
+
+async def fetch(request, method, url, coalesce=False, **kwargs):
+    """
+    Send an upstream request and return (status, content type, body bytes). With coalesce=True
+    concurrent identical requests from the same credential share one call.
+    """
+    headers = await get_headers(request)
+
+    async def send():
+        async with request.app[UPSTREAM].request(method, url, headers=headers, **kwargs) as response:
+            return response.status, response.headers.get("Content-Type"), await response.read()
+
+    if not coalesce:
+        return await send()
+    key = (method, credential_scope(request[ACCESS_TOKEN]), url, repr(sorted(kwargs.get("params", {}).items())))
+    return await request.app[FLIGHTS].do(key, send)
+
+
+def relay_json(status, content_type, body, empty):
+    """Mirror app.relay_response: forward the upstream body as-is, or decode and re-encode it."""
+    if can_relay(body, content_type):
+        return web.Response(body=body, status=status, content_type=JSON_MIMETYPE)
+    if not body:
+        return json_response(empty, status=status)
+    try:
+        data = loads(body)
+    except ValueError:
+        return error_response("Invalid JSON response from backend", status, raw=body.decode("utf-8", "replace"))
+    return json_response(data, status=status)
+
+
+async def cached_metadata(request, key, load):
+    """
+    Serve a metadata list through the shared stale-while-revalidate cache.
+    `load` is a coroutine function returning ((payload, status), cacheable).
+    """
+    if not request.query.get("refresh"):
+        value, state = metadata_cache.lookup(key)
+        if state == HIT:
+            return value, state
+        if state == STALE:
+            version = metadata_cache.claim_refresh(key)
+            if version is not None:
+                task = asyncio.create_task(_refresh_metadata(key, load, version))
+                request.app[REFRESH_TASKS].add(task)
+                task.add_done_callback(request.app[REFRESH_TASKS].discard)
+            return value, state
+
+    async def load_and_store():
+        version = metadata_cache.current_version()
+        value, cacheable = await load()
+        if cacheable:
+            metadata_cache.store(key, value, version)
+        return value
+
+    return await request.app[FLIGHTS].do(key, load_and_store), MISS
+
+
+async def _refresh_metadata(key, load, version):
+    try:
+        value, cacheable = await load()
+    except Exception:
+        metadata_cache.release(key)
+        return
+    if cacheable:
+        metadata_cache.store(key, value, version)
+    else:
+        metadata_cache.release(key)
+
+
+@web.middleware
+async def record_metrics(request, handler):
+    """Feed app.metrics for native handlers; requests passed to Flask are recorded by its middleware."""
+    if not metrics.enabled or request.match_info.handler is wsgi_fallback:
+        return await handler(request)
+    start = time.perf_counter()
+    timer = metrics.track()
+    response = None
+    try:
+        response = await handler(request)
+        return response
+    except web.HTTPException as e:
+        response = e
+        raise
+    except asyncio.CancelledError:
+        # The client went away and the handler was cancelled
+        response = web.Response(status=499)
+        raise
+    finally:
+        if isinstance(response, web.Response) and isinstance(response.body, (bytes, bytearray)):
+            sent = len(response.body)
+        else:
+            sent = getattr(response, "body_length", 0)
+        metrics.record(request.match_info.route.resource.canonical if request.match_info.route.resource else None,
+                       request.method, response.status if response is not None else 500,
+                       time.perf_counter() - start, timer.total, request.content_length or 0, sent)
+
+
+def upstream_trace_config():
+    """Count aiohttp upstream calls toward the upstream time of the request being served."""
+    async def on_request_start(session, context, params):
+        context.timer = current_timer()
+        if context.timer is not None:
+            context.timer.start()
+
+    async def on_request_done(session, context, params):
+        if context.timer is not None:
+            context.timer.stop()
+
+    trace_config = TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_done)
+    trace_config.on_request_exception.append(on_request_done)
+    return trace_config
+
+
+@web.middleware
+async def upstream_errors(request, handler):
+    try:
+        return await handler(request)
+    except asyncio.TimeoutError:
+        return error_response("Upstream request timed out", 504)
+    except ClientConnectionError:
+        return error_response("Could not connect to upstream service", 502)
+    except RateLimited as e:
+        return json_response({"error": str(e)}, status=429,
+                             headers={"Retry-After": str(math.ceil(e.retry_after))})
+    except CircuitOpen as e:
+        return json_response({"error": str(e)}, status=503,
+                             headers={"Retry-After": str(math.ceil(e.retry_after))})
+
+
+async def get_workspaces(request):
+    headers = await get_headers(request)
+
+    async def load():
+        async with request.app[UPSTREAM].get(f"{API_URL}/api/texttranslator/v1.0/workspaces/", headers=headers) as response:
+            return decode_metadata(response.status, await response.text(), [])
+
+    (payload, status), state = await cached_metadata(
+        request, ("workspaces", credential_scope(request[ACCESS_TOKEN]), None), load)
+    return json_response(payload, status=status, headers={"X-Cache": state})
+
+
+async def get_workspace(request):
+    workspace_id = request.match_info["workspace_id"]
+    status, content_type, body = await fetch(
+        request, "GET", f"{API_URL}/api/texttranslator/v1.0/workspaces/{workspace_id}", coalesce=True)
+    return relay_json(status, content_type, body, {})
+
+
+async def get_documents(request):
+    workspace_id = request.query.get("workspaceId")
+    if not workspace_id:
+        return error_response("workspaceId parameter is required", 400)
+    document_type = request.query.get("documentType", "Adaptive")
+    if document_type.lower() == "all":
+        document_type = None
+
+    headers = await get_headers(request)
+    upstream = request.app[UPSTREAM]
+    semaphore = asyncio.Semaphore(DOCUMENTS_PAGE_CONCURRENCY)
+
+    async def fetch_page(page_index):
+        async with semaphore:
+            async with upstream.get(
+                f"{API_URL}/api/texttranslator/v1.0/documents", headers=headers,
+                params={"workspaceId": workspace_id, "pageIndex": page_index, "limit": DOCUMENTS_PAGE_SIZE}
+            ) as response:
+                return response.status, await response.text()
+
+    async def load():
+        pages = [await fetch_page(1)]
+        try:
+            if pages[0][0] == 200 and pages[0][1]:
+                page_count = min(get_document_page_count(loads(pages[0][1])), DOCUMENTS_MAX_PAGES)
+                pages += await asyncio.gather(*(fetch_page(index) for index in range(2, page_count + 1)))
+            documents = []
+            for status, text in pages:
+                if status != 200 or not text:
+                    return decode_metadata(status, text, [])
+                documents.extend(extract_documents(loads(text)))
+            normalized = [doc for doc in map(normalize_document, documents) if doc]
+        except ValueError:
+            return ({"error": "Invalid JSON response from backend"}, 502), False
+        except (KeyError, TypeError):
+            return ({"error": "Unexpected documents response from backend"}, 502), False
+        return (normalized, 200), True
+
+    (payload, status), state = await cached_metadata(
+        request, ("documents", credential_scope(request[ACCESS_TOKEN]), workspace_id), load)
+    if status == 200:
+        payload = filter_documents(
+            payload,
+            document_type=document_type,
+            source_lang=request.query.get("sourceLanguage"),
+            target_lang=request.query.get("targetLanguage")
+        )
+    return compressed_json_response(request, payload, status, {"X-Cache": state})
+
+
+async def get_import_job_status(request):
+    job_id = request.match_info["job_id"]
+    await get_headers(request)
+    watch = import_job_poller.peek(credential_scope(request[ACCESS_TOKEN]), job_id)
+    if watch is not None and watch.updated_at and (watch.done or time.monotonic() - watch.updated_at < JOB_POLL_MIN_INTERVAL):
+        # A shared poller fetched this job moments ago, or already saw it finish
+        snapshot = watch.snapshot()
+        return json_response(snapshot["status"], status=snapshot["statusCode"], headers={"X-Cache": "HIT"})
+    status, content_type, body = await fetch(
+        request, "GET", f"{API_URL}/api/texttranslator/v1.0/documents/import/jobs/{job_id}")
+    return relay_json(status, content_type, body, {})
+
+
+async def import_document(request):
+    """Forward a multipart import upload to the backend as it arrives, like the Flask route."""
+    workspace_id = request.query.get("workspaceId")
+    if not workspace_id:
+        return error_response("Missing required parameters", 400)
+    boundary = multipart_boundary(request.headers.get("Content-Type"))
+    if not boundary:
+        return error_response("Expected a multipart/form-data upload", 400)
+
+    scanner = ImportFormScanner(boundary)
+    try:
+        mode = validation_mode(request.query.get("validate"))
+        while not scanner.feed(await request.content.read(IMPORT_CHUNK_SIZE)):
+            pass
+    except ImportFormError as e:
+        return error_response(str(e), 400)
+
+    headers = dict(await get_headers(request, content_type=None))
+    forward = ImportForward(mode, boundary, request.headers["Content-Type"], scanner.document_details,
+                            request[ACCESS_TOKEN], request.query, workspace_id, translation_memory)
+    headers["content-type"] = forward.content_type
+    if forward.cleaner is None and request.content_length:
+        headers["content-length"] = str(request.content_length)
+
+    async def body():
+        for chunk in scanner.head:
+            if chunk:
+                yield forward.encode(chunk)
+        scanner.head = []
+        while True:
+            chunk = await request.content.read(IMPORT_CHUNK_SIZE)
+            data = forward.encode(chunk)
+            if data:
+                yield data
+            if not chunk:
+                return
+
+    try:
+        async with request.app[UPSTREAM].post(
+            f"{API_URL}/api/texttranslator/v1.0/documents/import",
+            params={"workspaceId": workspace_id}, headers=headers, data=body()
+        ) as response:
+            status, content_type, text = response.status, response.headers.get("Content-Type"), await response.read()
+    except Exception:
+        rejected = forward.failed()
+        if rejected is not None:
+            return error_response(str(rejected), 422, validation=rejected.report)
+        raise
+    forward.settle(200 <= status < 300, metadata_cache)
+    result = relay_json(status, content_type, text, {})
+    if forward.validation_header() is not None:
+        result.headers["X-Import-Validation"] = forward.validation_header()
+    return result
+
+
+async def stream_import_job_status(request):
+    """
+    Server-Sent Events for an import job, fed by the shared poller in app.py.
+    The shared JobWatch is checked every JOB_EVENTS_CHECK_INTERVAL seconds on
+    the event loop, so an open stream does not hold a thread.
+    """
+    job_id = request.match_info["job_id"]
+    headers = await get_headers(request)
+    watch = import_job_poller.watch(credential_scope(request[ACCESS_TOKEN]), job_id, headers)
+
+    response = web.StreamResponse(headers={
+        "Content-Type": "text/event-stream", "Cache-Control": "no-cache", "X-Accel-Buffering": "no"
+    })
+    await response.prepare(request)
+    watch.subscribe()
+    try:
+        version, quiet = 0, 0.0
+        while True:
+            snapshot = watch.snapshot()
+            if snapshot["version"] > version:
+                version, quiet = snapshot["version"], 0.0
+                event = "done" if snapshot["done"] else "status"
+                await response.write(f"event: {event}\nid: {version}\ndata: {json.dumps(snapshot)}\n\n".encode())
+                if snapshot["done"]:
+                    break
+            elif quiet >= JOB_EVENTS_KEEPALIVE:
+                quiet = 0.0
+                await response.write(b": keep-alive\n\n")
+            await asyncio.sleep(JOB_EVENTS_CHECK_INTERVAL)
+            quiet += JOB_EVENTS_CHECK_INTERVAL
+    finally:
+        watch.unsubscribe()
+    return response
+
+
+async def get_all_indices(request):
+    workspace_id = request.query.get("workspaceId")
+    params = {"workspaceId": workspace_id} if workspace_id is not None else None
+    headers = await get_headers(request)
+
+    async def load():
+        async with request.app[UPSTREAM].get(
+            f"{API_URL}/api/texttranslator/v1.0/index", params=params, headers=headers
+        ) as response:
+            return decode_metadata(response.status, await response.text(), [], normalize_indices)
+
+    (payload, status), state = await cached_metadata(
+        request, ("indices", credential_scope(request[ACCESS_TOKEN]), workspace_id), load)
+    return compressed_json_response(request, payload, status, {"X-Cache": state})
+
+
+async def get_index(request):
+    index_id = request.match_info["index_id"]
+    status, content_type, body = await fetch(
+        request, "GET", f"{API_URL}/api/texttranslator/v1.0/index/{index_id}", coalesce=True)
+    if not body:
+        return error_response("No data returned from API", 404)
+    return relay_json(status, content_type, body, {})
+
+
+async def delete_index(request):
+    index_id = request.match_info["index_id"]
+    status, content_type, body = await fetch(request, "DELETE", f"{API_URL}/api/texttranslator/v1.0/index/{index_id}")
+    if 200 <= status < 300:
+        metadata_cache.invalidate("indices")
+    return relay_json(status, content_type, body, {})
+
+
+async def post_translation(request, params, headers, body):
+    """Async counterpart of app.post_translation; returns (status, headers, body)."""
+    body, keys, fallback = circuit_breakers.admit(body, rate_keys(body))
+
+    async def call():
+        async with request.app[UPSTREAM].post(TRANSLATOR_URL, params=params, headers=headers, json=body) as response:
+            return response.status, CIMultiDict(response.headers), await response.read()
+
+    async def send():
+        return await rate_governor.send_async(keys, INTERACTIVE, call)
+
+    async def send_hedge():
+        if not rate_governor.try_acquire(keys, INTERACTIVE):
+            return None
+        return await call()
+
+    try:
+        status, response_headers, content = await hedger.run_async(send, send_hedge)
+    except (RateLimited, asyncio.CancelledError):
+        circuit_breakers.release(keys)
+        raise
+    except (asyncio.TimeoutError, ClientConnectionError):
+        circuit_breakers.record(keys, False)
+        raise
+    circuit_breakers.record(keys, status < 500)
+    if fallback:
+        response_headers["X-Translation-Fallback"] = "plain"
+    return status, response_headers, content
+
+
+async def translate_text(request):
+    params = get_translate_params(request.query)
+    try:
+        data = await request.json()
+    except ValueError:
+        return error_response("Request body must be valid JSON", 400)
+    headers = await get_headers(request)
+    call = TranslateCall(params, data, request[ACCESS_TOKEN], request.query,
+                         translation_cache, translation_memory, reference_index)
+    cached = call.cached()
+    if cached is not None:
+        if isinstance(cached, bytes):
+            return web.Response(body=cached, content_type=JSON_MIMETYPE, headers={"X-Cache": "HIT"})
+        return json_response(cached, headers={"X-Cache": "HIT"})
+    answered = call.prepare()
+    if answered is not None:
+        return json_response(answered, headers=call.response_headers())
+
+    # When every client waiting for the call has disconnected, it is cancelled
+    started = time.monotonic()
+    try:
+        status, upstream_headers, body = await request.app[FLIGHTS].do(
+            call.flight_key, lambda: post_translation(request, params, headers, call.body),
+            cancel_abandoned=disconnect_watcher.enabled)
+    except asyncio.CancelledError:
+        disconnect_watcher.record(True, time.monotonic() - started)
+        raise
+    disconnect_watcher.record(False)
+    if not body:
+        return json_response({}, status=status)
+    relay = call.relays(body, upstream_headers.get("Content-Type"))
+    if relay:
+        # Nothing to merge in: forward and cache the upstream bytes unchanged
+        result = body
+    else:
+        try:
+            result = loads(body)
+        except ValueError:
+            return error_response("Invalid JSON response from backend", status, raw=body.decode("utf-8", "replace"))
+    if status == 200:
+        metrics.record_translator(upstream_headers, result)
+    result = call.finish(status, result, len(body), relayed=relay)
+    response_headers = call.response_headers(status, upstream_headers)
+    if relay:
+        return web.Response(body=result, status=status, headers=response_headers, content_type=JSON_MIMETYPE)
+    return json_response(result, status=status, headers=response_headers)
+
+
+class WsgiInput(io.RawIOBase):
+    """
+    wsgi.input for a request handed to Flask: the worker thread reads the
+    aiohttp request body from the event loop only as the route consumes it.
+    """
+
+    def __init__(self, content, loop):
+        super().__init__()
+        self._content = content
+        self._loop = loop
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = asyncio.run_coroutine_threadsafe(self._content.read(len(buffer)), self._loop).result()
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def _run_wsgi(environ, emit, done):
+    """Run the Flask app for one request on a worker thread, emitting the response piece by piece."""
+    def start_response(status, headers, exc_info=None):
+        emit(("start", status, headers))
+
+    try:
+        result = flask_app.wsgi_app(environ, start_response)
+        try:
+            for chunk in result:
+                if chunk:
+                    emit(("data", chunk))
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+    finally:
+        done()
+
+
+async def wsgi_fallback(request):
+    """
+    Serve any other route through the Flask app on a worker thread.
+    Request and response bodies are both streamed, so uploads are read as the route consumes them.
+    """
+    loop = asyncio.get_running_loop()
+    environ = EnvironBuilder(
+        path=request.path,
+        method=request.method,
+        query_string=request.query_string,
+        headers=list(request.headers.items()),
+        # Replaced below; an empty stream keeps the builder from encoding a body of its own
+        input_stream=io.BytesIO(),
+        environ_overrides={"REMOTE_ADDR": request.remote or ""}
+    ).get_environ()
+    environ["wsgi.input"] = WsgiInput(request.content, loop)
+    if request.content_length is not None:
+        environ["CONTENT_LENGTH"] = str(request.content_length)
+    else:
+        # A chunked upload ends where the client's body ends
+        environ.pop("CONTENT_LENGTH", None)
+        environ["wsgi.input_terminated"] = True
+
+    queue = asyncio.Queue()
+    emit = lambda item: loop.call_soon_threadsafe(queue.put_nowait, item)
+    done = lambda: loop.call_soon_threadsafe(queue.put_nowait, None)
+    loop.run_in_executor(request.app[WSGI_EXECUTOR], _run_wsgi, environ, emit, done)
+
+    response = None
+    while True:
+        item = await queue.get()
+        if item is None:
+            break
+        if item[0] == "start":
+            _, status, headers = item
+            response = web.StreamResponse(status=int(status.split(" ", 1)[0]), reason=status.split(" ", 1)[-1])
+            for name, value in headers:
+                if name.lower() not in ("content-length", "transfer-encoding", "connection"):
+                    response.headers.add(name, value)
+            await response.prepare(request)
+        else:
+            await response.write(item[1])
+    if response is None:
+        return error_response("Internal server error", 500)
+    await response.write_eof()
+    return response
+
+
+async def on_startup(app):
+    app[UPSTREAM] = ClientSession(
+        connector=TCPConnector(limit=ASYNC_UPSTREAM_LIMIT, keepalive_timeout=60),
+        timeout=ClientTimeout(sock_connect=CONNECT_TIMEOUT, sock_read=READ_TIMEOUT),
+        # The client is shared between users, so never keep upstream cookies
+        cookie_jar=DummyCookieJar(),
+        trace_configs=[upstream_trace_config()]
+    )
+    app[WSGI_EXECUTOR] = ThreadPoolExecutor(max_workers=ASYNC_WSGI_THREADS, thread_name_prefix="wsgi")
+    app[REFRESH_TASKS] = set()
+    app[FLIGHTS] = AsyncSingleFlight()
+
+
+async def on_cleanup(app):
+    await app[UPSTREAM].close()
+    app[WSGI_EXECUTOR].shutdown(wait=False)
+
+
+async def get_coalescing_stats(request):
+    """Counters of the native handlers and the Flask routes added together."""
+    native, threaded = request.app[FLIGHTS].stats(), upstream_flights.stats()
+    return json_response({name: native[name] + threaded[name] for name in native})
+
+
+def create_app(argv=None):
+    """Build the aiohttp application (also usable with `python -m aiohttp.web async_app:create_app`)."""
+    app = web.Application(middlewares=[record_metrics, upstream_errors], client_max_size=100 * 1024 * 1024)
+    app.router.add_get("/api/workspaces", get_workspaces)
+    app.router.add_get("/api/workspaces/{workspace_id}", get_workspace)
+    app.router.add_get("/api/documents", get_documents)
+    app.router.add_post("/api/documents/import", import_document)
+    app.router.add_route("*", "/api/documents/import/jobs/poller", wsgi_fallback)
+    app.router.add_get("/api/documents/import/jobs/{job_id}", get_import_job_status)
+    app.router.add_get("/api/documents/import/jobs/{job_id}/events", stream_import_job_status)
+    app.router.add_get("/api/index", get_all_indices)
+    app.router.add_get("/api/index/{index_id}", get_index)
+    app.router.add_delete("/api/index/{index_id}", delete_index)
+    app.router.add_post("/api/translate", translate_text)
+    app.router.add_get("/api/coalescing", get_coalescing_stats)
+    app.router.add_route("*", "/{tail:.*}", wsgi_fallback)
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the app in asyncio serving mode")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    args = parser.parse_args()
+    # Cancel handlers whose client disconnected, so their upstream calls are cancelled too
+    web.run_app(create_app(), host=args.host, port=args.port, backlog=2048,
+                handler_cancellation=disconnect_watcher.enabled)
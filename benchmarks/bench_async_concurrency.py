@@ -0,0 +1,171 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+#------------------------------------------------------------------------------
+
+"""
+Load test of /api/translate against a slow local stub: the Flask app behind a
+WSGI server with a fixed pool of sync worker threads, versus async_app.py on
+one event loop. Every request waits --latency seconds upstream, so throughput
+is bounded by how many translations each mode can keep in flight.
+
+    python benchmarks/bench_async_concurrency.py --concurrency 500 --latency 1
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import socket
+import statistics
+import sys
+import time
+
+import aiohttp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve_stub(port, latency):
+    from stub_server import StubServer, StubHandler
+    handler = type("SlowStubHandler", (StubHandler,), {"latency": latency})
+    StubServer(("127.0.0.1", port), handler).serve_forever()
+
+
+def serve_wsgi(port, upstream, workers):
+    os.environ["API_URL"] = upstream
+    os.environ["TRANSLATOR_URL"] = f"{upstream}/translate"
+    os.environ["UPSTREAM_POOL_MAXSIZE"] = str(workers)
+    from concurrent.futures import ThreadPoolExecutor
+    from werkzeug.serving import BaseWSGIServer
+    from app import app
+
+    class PooledWSGIServer(BaseWSGIServer):
+        """A WSGI server with a fixed number of sync workers, like gunicorn's gthread workers."""
+        request_queue_size = 2048
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.pool = ThreadPoolExecutor(max_workers=workers)
+
+        def process_request(self, request, client_address):
+            self.pool.submit(self._handle, request, client_address)
+
+        def _handle(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    PooledWSGIServer("127.0.0.1", port, app).serve_forever()
+
+
+def serve_async(port, upstream):
+    os.environ["API_URL"] = upstream
+    os.environ["TRANSLATOR_URL"] = f"{upstream}/translate"
+    from aiohttp import web
+    from async_app import create_app
+    web.run_app(create_app(), host="127.0.0.1", port=port, backlog=2048, print=None, access_log=None,
+                handler_cancellation=True)
+
+
+async def wait_ready(base_url):
+    async with aiohttp.ClientSession() as client:
+        for _ in range(100):
+            try:
+                async with client.get(f"{base_url}/api/health") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"{base_url} did not start")
+
+
+async def drive(base_url, concurrency, total):
+    """Send `total` translate calls with `concurrency` in flight; return latencies and elapsed time."""
+    await wait_ready(base_url)
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.CookieJar(unsafe=True),
+                                     timeout=aiohttp.ClientTimeout(total=600)) as client:
+        async with client.post(f"{base_url}/authenticate", data={"access_token": "bench"}, allow_redirects=False):
+            pass
+
+        latencies, failures = [], 0
+        queue = iter(range(total))
+
+        async def worker():
+            nonlocal failures
+            for number in queue:
+                body = [{"Text": f"segment {number}", "Language": "en", "TextType": "Plain",
+                         "Targets": [{"Language": "de"}]}]
+                start = time.perf_counter()
+                try:
+                    async with client.post(f"{base_url}/api/translate?to=de&nocache=true", json=body) as response:
+                        await response.read()
+                        if response.status != 200:
+                            failures += 1
+                except aiohttp.ClientError:
+                    failures += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return latencies, failures, time.perf_counter() - start
+
+
+def report(label, latencies, failures, elapsed):
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{label:<26} {len(latencies) / elapsed:8.1f} req/s   p50 {statistics.median(latencies):6.2f}s"
+          f"   p99 {p99:6.2f}s   failures {failures}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=1.0, help="seconds each upstream translate takes")
+    parser.add_argument("--workers", type=int, default=32, help="sync worker threads for the WSGI run")
+    args = parser.parse_args()
+
+    stub_port = free_port()
+    upstream = f"http://127.0.0.1:{stub_port}"
+    processes = [multiprocessing.Process(target=serve_stub, args=(stub_port, args.latency), daemon=True)]
+    processes[0].start()
+    try:
+        for label, target, extra in (
+            (f"WSGI ({args.workers} sync workers)", serve_wsgi, (args.workers,)),
+            ("asyncio (async_app.py)", serve_async, ()),
+        ):
+            port = free_port()
+            server = multiprocessing.Process(target=target, args=(port, upstream) + extra, daemon=True)
+            server.start()
+            processes.append(server)
+            latencies, failures, elapsed = asyncio.run(
+                drive(f"http://127.0.0.1:{port}", args.concurrency, args.requests))
+            report(label, latencies, failures, elapsed)
+            server.terminate()
+    finally:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == '__main__':
+    main()
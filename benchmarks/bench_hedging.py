@@ -0,0 +1,72 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+#------------------------------------------------------------------------------
+
+"""
+/api/translate latency with and without hedged requests. The stub answers
+in --fast seconds, except for --slow-ratio of calls which take --slow
+seconds, imitating the long tail of a GPT deployment. The same sequence of
+requests is timed once with hedging off and once with it on.
+
+    python benchmarks/bench_hedging.py --requests 1000 --slow-ratio 0.02
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stub_server import StubHandler, start_stub_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--fast", type=float, default=0.02)
+    parser.add_argument("--slow", type=float, default=1.0)
+    parser.add_argument("--slow-ratio", type=float, default=0.02)
+    parser.add_argument("--percentile", type=float, default=90)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+
+    class TailHandler(StubHandler):
+        def do_POST(self):
+            self.latency = args.slow if rng.random() < args.slow_ratio else args.fast
+            super().do_POST()
+
+    server, base = start_stub_server(handler=TailHandler)
+    os.environ["TRANSLATOR_URL"] = base + "/translate"
+    os.environ["TRANSLATION_MEMORY_ENABLED"] = "false"
+    import app
+    import translation_upstream
+    from tail_latency import Hedger
+
+    client = app.app.test_client()
+    with client.session_transaction() as flask_session:
+        flask_session["access_token"] = "bench"
+
+    for enabled in (False, True):
+        translation_upstream.hedger = Hedger(enabled=enabled, quantile=args.percentile / 100, max_ratio=0.1)
+        start = time.perf_counter()
+        for number in range(args.requests):
+            client.post("/api/translate?to=de&nocache=true",
+                        json=[{"Text": f"segment {enabled} {number}", "Targets": [{"Language": "de"}]}])
+        elapsed = time.perf_counter() - start
+        stats = translation_upstream.hedger.stats()
+        effective = stats["latencyMs"]["withHedging"]
+        print(f"hedging {'on ' if enabled else 'off'}   p50 {effective['p50']:7.1f} ms   p95 {effective['p95']:7.1f} ms"
+              f"   p99 {effective['p99']:7.1f} ms   hedges {stats['hedges']:4}   {args.requests / elapsed:6.1f} req/s")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
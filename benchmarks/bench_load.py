@@ -0,0 +1,228 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+#------------------------------------------------------------------------------
+
+"""
+Load test of the app's routes against the local Adaptive CT stub.
+
+Starts the stub and the app (app.py behind a pooled WSGI server, or
+async_app.py) in their own processes, then drives each --routes entry at
+each --concurrency level and reports throughput, p50/p99 latency, failures
+and the app's resident memory. --save writes the results as JSON; --compare
+checks them against an earlier run and exits non-zero on a regression.
+
+    python benchmarks/bench_load.py --concurrency 1,16,64 --latency lognormal:0.2:0.5 --save base.json
+    python benchmarks/bench_load.py --concurrency 1,16,64 --latency lognormal:0.2:0.5 --compare base.json
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from bench_async_concurrency import free_port, serve_async, serve_wsgi, wait_ready
+from stub_server import StubServer, add_stub_arguments, configure, stub_options
+from translation_memory import percentile
+
+WORKSPACE_ID = "ws-1"
+
+
+def route_request(route, number, args):
+    """(method, path, json body) of request `number` of `route`."""
+    refresh = "&refresh=true" if args.refresh else ""
+    if route == "translate":
+        body = [{"Text": f"segment {number}.{segment} " + "x" * args.text_length, "Language": "en",
+                 "TextType": "Plain", "Targets": [{"Language": "fr"}]} for segment in range(args.segments)]
+        return "POST", "/api/translate?to=fr&nocache=true", body
+    if route == "workspaces":
+        return "GET", "/api/workspaces" + ("?refresh=true" if args.refresh else ""), None
+    if route == "workspace":
+        return "GET", f"/api/workspaces/{WORKSPACE_ID}", None
+    if route == "documents":
+        return "GET", f"/api/documents?workspaceId={WORKSPACE_ID}&documentType=all{refresh}", None
+    if route == "indices":
+        return "GET", f"/api/index?workspaceId={WORKSPACE_ID}{refresh}", None
+    raise ValueError(f"Unknown route: {route}")
+
+
+def serve_stub(port, options):
+    StubServer(("127.0.0.1", port), configure(**options)).serve_forever()
+
+
+def memory_mb(pid):
+    """(resident, peak resident) memory of process `pid` in MB, or (None, None) without /proc."""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            fields = dict(line.split(":", 1) for line in status if ":" in line)
+    except OSError:
+        return None, None
+    return tuple(int(fields[name].split()[0]) / 1024 if name in fields else None for name in ("VmRSS", "VmHWM"))
+
+
+async def drive(base_url, route, concurrency, total, args):
+    """Send `total` requests of `route` with `concurrency` in flight; return latencies, failures and elapsed time."""
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.CookieJar(unsafe=True),
+                                     timeout=aiohttp.ClientTimeout(total=600)) as client:
+        async with client.post(f"{base_url}/authenticate", data={"access_token": "bench"}, allow_redirects=False):
+            pass
+
+        latencies, failures = [], 0
+        queue = iter(range(total))
+
+        async def worker():
+            nonlocal failures
+            for number in queue:
+                method, path, body = route_request(route, number, args)
+                start = time.perf_counter()
+                try:
+                    async with client.request(method, base_url + path, json=body) as response:
+                        await response.read()
+                        if response.status != 200:
+                            failures += 1
+                except aiohttp.ClientError:
+                    failures += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return latencies, failures, time.perf_counter() - start
+
+
+def measure(base_url, pid, route, concurrency, args):
+    latencies, failures, elapsed = asyncio.run(drive(base_url, route, concurrency, args.requests, args))
+    latencies.sort()
+    rss, peak = memory_mb(pid)
+    return {
+        "route": route, "concurrency": concurrency, "requests": len(latencies), "failures": failures,
+        "throughput": len(latencies) / elapsed,
+        "p50Ms": percentile(latencies, 0.5) * 1000, "p99Ms": percentile(latencies, 0.99) * 1000,
+        "rssMb": rss, "peakRssMb": peak,
+    }
+
+
+def report(result, baseline=None):
+    line = (f"{result['route']:<11} c={result['concurrency']:<5} {result['throughput']:9.1f} req/s"
+            f"   p50 {result['p50Ms']:8.1f} ms   p99 {result['p99Ms']:8.1f} ms   failures {result['failures']}")
+    if result["rssMb"] is not None:
+        line += f"   rss {result['rssMb']:6.1f} MB"
+    if baseline is not None:
+        line += (f"   vs base {change(result['throughput'], baseline['throughput']):+6.1%} req/s"
+                 f" {change(result['p99Ms'], baseline['p99Ms']):+6.1%} p99")
+    print(line, flush=True)
+
+
+def change(value, base):
+    return (value - base) / base if base else 0.0
+
+
+def regressions(results, baseline, tolerance):
+    """Descriptions of the results that are slower than their baseline by more than `tolerance`."""
+    found = []
+    for result in results:
+        base = baseline.get((result["route"], result["concurrency"]))
+        if base is None:
+            continue
+        label = f"{result['route']} at concurrency {result['concurrency']}"
+        if change(result["throughput"], base["throughput"]) < -tolerance:
+            found.append(f"{label}: throughput {base['throughput']:.1f} -> {result['throughput']:.1f} req/s")
+        if change(result["p99Ms"], base["p99Ms"]) > tolerance:
+            found.append(f"{label}: p99 {base['p99Ms']:.1f} -> {result['p99Ms']:.1f} ms")
+        if result["failures"] > base["failures"]:
+            found.append(f"{label}: failures {base['failures']} -> {result['failures']}")
+    return found
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("wsgi", "async"), default="wsgi")
+    parser.add_argument("--workers", type=int, default=32, help="sync worker threads in wsgi mode")
+    parser.add_argument("--routes", default="translate,workspaces,documents,indices",
+                        help="comma-separated: translate, workspaces, workspace, documents, indices")
+    parser.add_argument("--concurrency", default="1,16,64", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=500, help="requests per route and level")
+    parser.add_argument("--segments", type=int, default=1, help="segments per translate request")
+    parser.add_argument("--text-length", type=int, default=40, help="extra characters per segment")
+    parser.add_argument("--refresh", action="store_true", help="bypass the metadata cache on list routes")
+    parser.add_argument("--save", metavar="FILE", help="write the results to FILE as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="compare against the results saved in FILE")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed relative slowdown before flagging")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    routes = [route for route in args.routes.split(",") if route]
+    for route in routes:
+        route_request(route, 0, args)
+    levels = [int(level) for level in args.concurrency.split(",") if level]
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as saved:
+            baseline = {(result["route"], result["concurrency"]): result for result in json.load(saved)["results"]}
+
+    stub_port, app_port = free_port(), free_port()
+    upstream = f"http://127.0.0.1:{stub_port}"
+    processes = [multiprocessing.Process(target=serve_stub, args=(stub_port, stub_options(args)), daemon=True)]
+    if args.mode == "wsgi":
+        processes.append(multiprocessing.Process(target=serve_wsgi, args=(app_port, upstream, args.workers), daemon=True))
+    else:
+        processes.append(multiprocessing.Process(target=serve_async, args=(app_port, upstream), daemon=True))
+    for process in processes:
+        process.start()
+
+    base_url = f"http://127.0.0.1:{app_port}"
+    results = []
+    try:
+        asyncio.run(wait_ready(base_url))
+        for route in routes:
+            for concurrency in levels:
+                result = measure(base_url, processes[1].pid, route, concurrency, args)
+                results.append(result)
+                report(result, baseline.get((route, concurrency)))
+    finally:
+        for process in processes:
+            process.terminate()
+
+    if args.save:
+        run = {
+            "createdAt": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "revision": git_revision(),
+            "python": platform.python_version(), "platform": platform.platform(),
+            "options": vars(args), "results": results,
+        }
+        with open(args.save, "w") as saved:
+            json.dump(run, saved, indent=2)
+        print(f"Saved {len(results)} results to {args.save}")
+    if args.compare:
+        found = regressions(results, baseline, args.tolerance)
+        for description in found:
+            print(f"REGRESSION {description}")
+        if found:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.compare}")
+
+
+if __name__ == '__main__':
+    main()
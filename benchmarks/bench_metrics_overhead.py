@@ -0,0 +1,59 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+#------------------------------------------------------------------------------
+
+"""
+Per-request cost of the /api/metrics instrumentation. /api/health is served
+through the Flask test client with the metrics middleware in place and with
+it removed, and the mean time per request of each is reported, followed by
+the time to render the metrics page.
+
+    python benchmarks/bench_metrics_overhead.py --requests 20000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app
+from metrics import MetricsMiddleware
+
+
+def timed(client, total):
+    client.get("/api/health")
+    start = time.perf_counter()
+    for _ in range(total):
+        client.get("/api/health")
+    return (time.perf_counter() - start) / total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    instrumented = app.app.wsgi_app
+    if not isinstance(instrumented, MetricsMiddleware):
+        sys.exit("Metrics are disabled (METRICS_ENABLED=false)")
+    with_metrics = timed(app.app.test_client(), args.requests)
+    app.app.wsgi_app = instrumented.wsgi_app
+    without_metrics = timed(app.app.test_client(), args.requests)
+    app.app.wsgi_app = instrumented
+
+    print(f"without metrics {without_metrics * 1e6:8.1f} us/request")
+    print(f"with metrics    {with_metrics * 1e6:8.1f} us/request   (+{(with_metrics - without_metrics) * 1e6:.1f} us)")
+    start = time.perf_counter()
+    page = app.metrics.render()
+    print(f"render          {(time.perf_counter() - start) * 1e3:8.2f} ms for {len(page.splitlines())} lines")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+#------------------------------------------------------------------------------
+
+"""
+Build time and query latency of the reference pair index. --pairs synthetic
+sentences with a Zipf-distributed vocabulary are loaded into a fresh
+translation memory, indexed, and --queries unseen sentences are searched
+the way /api/translate does for each target.
+
+    python benchmarks/bench_reference_index.py --pairs 1000000
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from translation_memory import TranslationMemory, percentile
+from reference_index import ReferenceIndex
+
+
+def sentences(rng, vocabulary, cum_weights, count):
+    for _ in range(count):
+        yield " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(5, 25)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pairs", type=int, default=1000000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--vocabulary", type=int, default=50000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    vocabulary = [f"w{number}" for number in range(args.vocabulary)]
+    cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, args.vocabulary + 1)))
+
+    with tempfile.TemporaryDirectory() as workdir:
+        memory = TranslationMemory(os.path.join(workdir, "tm.sqlite3"))
+        start = time.perf_counter()
+        loaded = memory.bulk_load("bench", "bench", "en", "fr", ((source, source.upper())
+                                                       for source in sentences(rng, vocabulary, cum_weights, args.pairs)))
+        print(f"load           {loaded} pairs in {time.perf_counter() - start:.1f}s")
+
+        index = ReferenceIndex(memory)
+        start = time.perf_counter()
+        index.catch_up()
+        elapsed = time.perf_counter() - start
+        print(f"index build    {index.indexed} pairs in {elapsed:.1f}s ({index.indexed / elapsed:,.0f} pairs/s)")
+
+        latencies = []
+        for query in sentences(rng, vocabulary, cum_weights, args.queries):
+            start = time.perf_counter()
+            index.search("en", "fr", query, "bench", "bench")
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        print(f"query          p50 {percentile(latencies, 0.5) * 1e3:.2f} ms   p95 {percentile(latencies, 0.95) * 1e3:.2f} ms"
+              f"   p99 {percentile(latencies, 0.99) * 1e3:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
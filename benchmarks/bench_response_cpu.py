@@ -0,0 +1,93 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+#------------------------------------------------------------------------------
+
+"""
+CPU time the Flask app spends per request with upstream passthrough and the
+orjson provider turned off (decode + jsonify with the standard library) and
+on. The stub runs in its own process so only the app's CPU is counted
+(plus the test client's, which is the same in both runs). Also prints how
+much gzip/brotli shrink a large /api/documents response.
+
+    python benchmarks/bench_response_cpu.py --requests 2000 --segments 50 --documents 2000
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from bench_async_concurrency import free_port
+from bench_load import serve_stub
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--segments", type=int, default=50, help="segments per translate request")
+    parser.add_argument("--documents", type=int, default=2000, help="documents in the listed workspace")
+    args = parser.parse_args()
+
+    port = free_port()
+    upstream = f"http://127.0.0.1:{port}"
+    stub = multiprocessing.Process(target=serve_stub, daemon=True, args=(port, {
+        "documents": args.documents, "workspaces": 1, "expansion": 3}))
+    stub.start()
+    os.environ["API_URL"] = upstream
+    os.environ["TRANSLATOR_URL"] = f"{upstream}/translate"
+    os.environ["TRANSLATION_MEMORY_ENABLED"] = "false"
+    os.environ["METRICS_ENABLED"] = "false"
+    import app
+    import response_encoding
+
+    client = app.app.test_client()
+    with client.session_transaction() as flask_session:
+        flask_session["access_token"] = "bench"
+    body = [{"Text": f"Segment {number} of a paragraph that is long enough to look like real content.",
+             "Language": "en", "TextType": "Plain", "Targets": [{"Language": "fr"}]}
+            for number in range(args.segments)]
+    routes = [
+        ("translate", lambda: client.post("/api/translate?to=fr&nocache=true", json=body)),
+        ("workspace", lambda: client.get("/api/workspaces/ws-1")),
+        ("documents", lambda: client.get("/api/documents?workspaceId=ws-1&documentType=all&refresh=true")),
+    ]
+
+    try:
+        for _ in range(50):
+            if client.get("/api/workspaces/ws-1").status_code == 200:
+                break
+            time.sleep(0.1)
+        for label, fast in (("stdlib decode + jsonify", False), ("passthrough + orjson", True)):
+            response_encoding.UPSTREAM_PASSTHROUGH = fast
+            response_encoding.FAST_JSON = fast and response_encoding.orjson is not None
+            for route, call in routes:
+                requests = args.requests if route != "documents" else max(args.requests // 20, 10)
+                call()
+                start = time.process_time()
+                for _ in range(requests):
+                    assert call().status_code == 200
+                cpu = (time.process_time() - start) / requests
+                print(f"{label:<24} {route:<10} {cpu * 1e6:9.0f} us CPU/request")
+
+        plain = client.get("/api/documents?workspaceId=ws-1&documentType=all").get_data()
+        for encoding in ("gzip", "br"):
+            response = client.get("/api/documents?workspaceId=ws-1&documentType=all",
+                                  headers={"Accept-Encoding": encoding})
+            if response.headers.get("Content-Encoding") == encoding:
+                print(f"documents  {encoding:<5} {len(plain):9,d} -> {len(response.get_data()):9,d} bytes")
+    finally:
+        stub.terminate()
+
+
+if __name__ == '__main__':
+    main()
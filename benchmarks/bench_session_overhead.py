@@ -0,0 +1,75 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+#------------------------------------------------------------------------------
+
+"""
+Per-request session overhead of each backend. A logged-in client hits a
+route that only reads session["access_token"], like /api/translate does via
+get_api_headers(), and the mean time per request is reported.
+
+    python benchmarks/bench_session_overhead.py --requests 5000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from flask import Flask, session
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_store import init_session
+
+
+def build_app(session_type, workdir):
+    app = Flask(__name__)
+    app.secret_key = "bench"
+    app.config['SESSION_TYPE'] = session_type
+    app.config['SESSION_FILE_DIR'] = os.path.join(workdir, 'flask_session')
+    app.config['SESSION_SQLITE_PATH'] = os.path.join(workdir, 'sessions.sqlite3')
+    app.config['SESSION_PERMANENT'] = True
+    app.config['PERMANENT_SESSION_LIFETIME'] = 1800
+    init_session(app)
+
+    @app.route('/login')
+    def login():
+        session["access_token"] = "x" * 1500
+        session["id_token_claims"] = {"name": "Bench User", "preferred_username": "bench@example.com"}
+        return ""
+
+    @app.route('/read')
+    def read():
+        return session.get("access_token", "")[:8]
+
+    return app
+
+
+def run(session_type, total):
+    with tempfile.TemporaryDirectory() as workdir:
+        client = build_app(session_type, workdir).test_client()
+        client.get('/login')
+        client.get('/read')
+        start = time.perf_counter()
+        for _ in range(total):
+            client.get('/read')
+        elapsed = time.perf_counter() - start
+    print(f"{session_type:<12} {elapsed / total * 1e6:8.1f} us/request")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    for session_type in ("filesystem", "sqlite", "memory"):
+        run(session_type, args.requests)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+#------------------------------------------------------------------------------
+
+"""
+Bulk-load speed and exact-match lookup latency of the translation memory.
+--pairs synthetic pairs are loaded into a fresh SQLite file, then --lookups
+single-segment lookups (half hits, half misses) are timed the way
+/api/translate issues them.
+
+    python benchmarks/bench_translation_memory.py --pairs 2000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from translation_memory import TranslationMemory, percentile
+
+
+def synthetic_pairs(count):
+    for number in range(count):
+        yield f"segment number {number} of the benchmark corpus", f"segment numéro {number} du corpus de test"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pairs", type=int, default=1000000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        memory = TranslationMemory(os.path.join(workdir, "tm.sqlite3"))
+        start = time.perf_counter()
+        loaded = memory.bulk_load("bench", "bench", "en", "fr", synthetic_pairs(args.pairs))
+        elapsed = time.perf_counter() - start
+        print(f"bulk load      {loaded} pairs in {elapsed:.1f}s ({loaded / elapsed:,.0f} pairs/s)")
+
+        rng = random.Random(7)
+        latencies = []
+        for _ in range(args.lookups):
+            number = rng.randrange(args.pairs * 2)
+            source = f"segment number {number} of the benchmark corpus"
+            start = time.perf_counter()
+            memory.lookup("en", "fr", [source], "bench", "bench")
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        stats = memory.stats()
+        print(f"lookup         p50 {percentile(latencies, 0.5) * 1e6:.0f} us   p99 {percentile(latencies, 0.99) * 1e6:.0f} us"
+              f"   hit ratio {stats['hitRatio']:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+#------------------------------------------------------------------------------
+
+"""
+Throughput of the TSV validation stage used by /api/documents/import. A
+synthetic TSV of --megabytes MB (with some duplicate and malformed lines)
+is generated on the fly and fed through TsvCleaner, and through the full
+multipart UploadCleaner, in IMPORT_CHUNK_SIZE chunks. Peak RSS is reported
+to show memory does not grow with the file size.
+
+    python benchmarks/bench_tsv_preprocess.py --megabytes 200
+"""
+
+import argparse
+import os
+import random
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from import_stream import UploadCleaner, IMPORT_CHUNK_SIZE
+from tsv_preprocess import TsvCleaner
+
+WORDS = ("translation", "adaptive", "document", "segment", "workspace", "index", "quality",
+         "übersetzung", "dokument", "qualité", "índice", "データ", "文档")
+
+
+def synthetic_tsv(total_bytes, chunk_size=IMPORT_CHUNK_SIZE, seed=7):
+    """Yield chunks of TSV totalling about total_bytes; ~2% duplicates and ~0.1% bad lines."""
+    rng = random.Random(seed)
+    recent, produced, buffer = [], 0, []
+    size = 0
+    number = 0
+    while produced < total_bytes:
+        number += 1
+        roll = rng.random()
+        if roll < 0.02 and recent:
+            line = rng.choice(recent)
+        elif roll < 0.021:
+            line = f"line {number} without a target\n"
+        else:
+            words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 14)))
+            line = f"{number}  {words}\t{words[::-1]}  {number}\n"
+            if len(recent) < 1000:
+                recent.append(line)
+            else:
+                recent[number % 1000] = line
+        data = line.encode("utf-8")
+        buffer.append(data)
+        size += len(data)
+        if size >= chunk_size:
+            chunk = b"".join(buffer)
+            produced += len(chunk)
+            yield chunk
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def multipart(chunks, boundary="benchboundary"):
+    yield (f"--{boundary}\r\nContent-Disposition: form-data; name=\"DocumentDetails\"\r\n\r\n[]\r\n"
+           f"--{boundary}\r\nContent-Disposition: form-data; name=\"FILES\"; filename=\"bench.tsv\"\r\n\r\n").encode()
+    yield from chunks
+    yield f"\r\n--{boundary}--\r\n".encode()
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_tsv(total_bytes):
+    cleaner = TsvCleaner()
+    consumed = 0
+    start = time.perf_counter()
+    for chunk in synthetic_tsv(total_bytes):
+        consumed += len(chunk)
+        cleaner.feed(chunk)
+    cleaner.finish()
+    return consumed, cleaner.report(), time.perf_counter() - start
+
+
+def run_multipart(total_bytes):
+    cleaner = UploadCleaner("benchboundary", strict=False)
+    consumed = 0
+    start = time.perf_counter()
+    for chunk in multipart(synthetic_tsv(total_bytes)):
+        consumed += len(chunk)
+        cleaner.feed(chunk)
+    cleaner.feed(b"")
+    return consumed, cleaner.report()["files"][0], time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--megabytes", type=float, default=100)
+    args = parser.parse_args()
+    total_bytes = int(args.megabytes * 1024 * 1024)
+
+    # Generation alone, so its cost can be subtracted from the runs below
+    start = time.perf_counter()
+    for _ in synthetic_tsv(total_bytes):
+        pass
+    generation = time.perf_counter() - start
+
+    for label, run in (("TsvCleaner", run_tsv), ("UploadCleaner (multipart)", run_multipart)):
+        consumed, report, elapsed = run(total_bytes)
+        elapsed = max(elapsed - generation, 1e-9)
+        print(f"{label:<26} {consumed / elapsed / 1e6:7.1f} MB/s   {report['lines'] / elapsed:10.0f} lines/s"
+              f"   pairs {report['pairs']}  duplicates {report['duplicates']}  errors {report['errors']}"
+              f"   peak RSS {peak_rss_mb():.0f} MB")
+
+
+if __name__ == '__main__':
+    main()
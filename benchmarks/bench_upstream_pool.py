@@ -0,0 +1,65 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+#------------------------------------------------------------------------------
+
+"""
+Requests per second against a local stub: one new connection per call
+(module-level requests.post, the old behaviour) versus the pooled
+UpstreamClient used by app.py.
+
+    python benchmarks/bench_upstream_pool.py --threads 8 --requests 2000
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from upstream_client import UpstreamClient
+from stub_server import start_stub_server
+
+BODY = [{"Text": "Mani is watching a movie", "Language": "en", "TextType": "Plain",
+         "Targets": [{"Language": "de"}]}]
+
+
+def run(label, post, url, threads, total):
+    def worker(_):
+        response = post(url, json=BODY)
+        response.raise_for_status()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(worker, range(total)))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {total / elapsed:10.1f} req/s  ({elapsed:.2f}s for {total})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server()
+    url = f"{base_url}/translate"
+    try:
+        run("requests.post (no pool)", requests.post, url, args.threads, args.requests)
+        client = UpstreamClient(pool_maxsize=args.threads)
+        run("UpstreamClient (pooled)", client.post, url, args.threads, args.requests)
+        client.close()
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,393 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+#------------------------------------------------------------------------------
+
+"""
+Local stand-in for the Adaptive CT and Translator endpoints.
+
+Serves the workspace, document, import job, index and translate endpoints of
+docs/Adaptive_CT_API_Documentation.md from memory over HTTP/1.1 keep-alive,
+so benchmarks can measure the proxy without live services. Latency, error
+rate and payload sizes are configurable:
+
+    python benchmarks/stub_server.py --port 8081 --latency lognormal:0.8:0.5 \\
+        --api-latency uniform:0.02:0.08 --error-rate 0.01 --documents 500
+
+Latency specs (seconds): `0.05` or `fixed:0.05`, `uniform:LOW:HIGH`,
+`lognormal:MEDIAN:SIGMA`, and `tail:BASE:SLOW:RATIO`, which answers in BASE
+(itself a spec) and in SLOW for RATIO of the calls.
+"""
+
+import argparse
+import functools
+import itertools
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+API_PREFIX = "/api/texttranslator/v1.0"
+
+
+@functools.lru_cache(maxsize=None)
+def parse_latency(spec):
+    """Return a function drawing one latency in seconds from the distribution `spec`."""
+    spec = str(spec).strip()
+    kind, _, rest = spec.partition(":")
+    if not rest:
+        value = float(kind)
+        return lambda: value
+    if kind == "fixed":
+        value = float(rest)
+        return lambda: value
+    if kind == "uniform":
+        low, high = map(float, rest.split(":"))
+        return lambda: random.uniform(low, high)
+    if kind == "lognormal":
+        median, sigma = map(float, rest.split(":"))
+        mu = math.log(median) if median > 0 else 0.0
+        return lambda: random.lognormvariate(mu, sigma) if median > 0 else 0.0
+    if kind == "tail":
+        base, slow, ratio = rest.rsplit(":", 2)
+        base, slow, ratio = parse_latency(base), float(slow), float(ratio)
+        return lambda: slow if random.random() < ratio else base()
+    raise ValueError(f"Unknown latency spec: {spec}")
+
+
+def sample_latency(latency):
+    """Seconds to wait for `latency`, a number, a spec string or a callable."""
+    if callable(latency):
+        return latency()
+    if isinstance(latency, (int, float)):
+        return latency
+    return parse_latency(latency)()
+
+
+class StubState:
+    """Workspaces, documents, import jobs and indexes held by one stub server."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.workspaces = {}
+        self.documents = {}
+        self.jobs = {}
+        self.indexes = {}
+        self.seeded = False
+
+    def seed(self, workspaces, documents):
+        """Create `workspaces` workspaces of `documents` Adaptive en-fr documents each, once."""
+        with self.lock:
+            if self.seeded:
+                return
+            self.seeded = True
+            for number in range(1, workspaces + 1):
+                workspace_id = f"ws-{number}"
+                self.workspaces[workspace_id] = self.workspace(workspace_id, f"Workspace {number}")
+                self.documents[workspace_id] = [self.document(f"document-{number}-{doc}.tsv")
+                                                for doc in range(documents)]
+
+    def workspace(self, workspace_id, name):
+        return {"id": workspace_id, "name": name, "createdOn": "2025-01-01T00:00:00Z",
+                "role": {"roleName": "Owner"}, "isCreator": True,
+                "subscription": {"billingRegionCode": "USW", "subscriptionKey": "***"}}
+
+    def document(self, name, source="en", target="fr"):
+        return {"documentInfo": {
+            "id": next(self.ids), "name": name, "documentType": "Adaptive",
+            "createdDate": "2025-01-01T00:00:00Z", "isAvailable": True,
+            "languages": [{"languageCode": source}, {"languageCode": target}],
+        }}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Send headers and body in one segment so keep-alive clients do not stall on delayed ACKs
+    disable_nagle_algorithm = True
+    wbufsize = -1
+    # Seconds each translate call takes, to imitate a GPT-backed upstream (number or latency spec)
+    latency = 0.0
+    # Seconds each workspace, document, import and index call takes (number or latency spec)
+    api_latency = 0.0
+    # Fraction of calls answered 500, and answered 429 with Retry-After
+    error_rate = 0.0
+    throttle_rate = 0.0
+    retry_after = 1
+    # Payload sizes: seeded workspaces, documents per workspace, default documents page size,
+    # and how many times each translation repeats its source text
+    workspaces = 3
+    documents = 100
+    page_size = 100
+    expansion = 1
+    # Seconds an import job stays Running before it Succeeds
+    job_duration = 2.0
+
+    def _reply(self, payload, status=200, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _drain(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            # Streamed uploads (cleaned imports) arrive without a Content-Length
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b";")[0], 16)
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+                if not size:
+                    return b"".join(chunks)
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    @property
+    def state(self):
+        state = getattr(self.server, "state", None)
+        if state is None:
+            state = self.server.state = StubState()
+        state.seed(self.workspaces, self.documents)
+        return state
+
+    def _route(self, method):
+        """Split the request into (resource path parts, query), or None for the translate endpoint."""
+        url = urlsplit(self.path)
+        query = {name: values[0] for name, values in parse_qs(url.query).items()}
+        if not url.path.startswith(API_PREFIX + "/"):
+            return None, query
+        return [part for part in url.path[len(API_PREFIX) + 1:].split("/") if part], query
+
+    def _fault(self):
+        """Answer an injected 429 or 500 and return True, or return False."""
+        roll = random.random()
+        if roll < self.throttle_rate:
+            self._reply({"error": {"code": 429001, "message": "Too many requests (stub)"}}, 429,
+                        {"Retry-After": str(self.retry_after)})
+            return True
+        if roll < self.throttle_rate + self.error_rate:
+            self._reply({"error": {"code": 500000, "message": "Internal error (stub)"}}, 500)
+            return True
+        return False
+
+    def _handle(self, method):
+        raw = self._drain() if method != "GET" else b""
+        parts, query = self._route(method)
+        delay = sample_latency(self.latency if parts is None else self.api_latency)
+        if delay:
+            time.sleep(delay)
+        if self._fault():
+            return
+        if parts is None:
+            if method == "POST":
+                return self._translate(raw)
+            return self._reply({"path": self.path} if method == "GET" else {})
+        handler = getattr(self, f"_{method.lower()}_{parts[0]}".replace("-", "_"), None) if parts else None
+        if handler is None:
+            return self._reply({"error": {"code": 404000, "message": f"No route for {self.path}"}}, 404)
+        handler(parts[1:], query, raw)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    def _translate(self, raw):
+        try:
+            items = json.loads(raw) if raw else []
+        except ValueError:
+            items = []
+        if not isinstance(items, list):
+            return self._reply({"ok": True})
+        results = []
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            text = " ".join([item.get("Text", "")] * self.expansion)
+            targets = item.get("Targets") or [{"Language": "de"}]
+            results.append({"translations": [{"text": text, "to": target.get("Language", "de")}
+                                             for target in targets if isinstance(target, dict)]})
+        self._reply(results)
+
+    # Workspaces
+    def _get_workspaces(self, rest, query, raw):
+        state = self.state
+        with state.lock:
+            if not rest:
+                return self._reply(list(state.workspaces.values()))
+            workspace = state.workspaces.get(rest[0])
+        if workspace is None:
+            return self._reply({"error": {"code": 404000, "message": "Workspace not found"}}, 404)
+        self._reply(workspace)
+
+    def _post_workspaces(self, rest, query, raw):
+        details = json.loads(raw or b"{}")
+        state = self.state
+        with state.lock:
+            workspace_id = str(uuid.uuid4())
+            workspace = state.workspaces[workspace_id] = state.workspace(workspace_id, details.get("name", ""))
+            state.documents[workspace_id] = []
+        self._reply(workspace, 201)
+
+    # Documents and import jobs
+    def _get_documents(self, rest, query, raw):
+        state = self.state
+        if rest[:2] == ["import", "jobs"] and len(rest) == 3:
+            return self._job_status(rest[2])
+        limit = int(query.get("limit") or self.page_size)
+        page = max(int(query.get("pageIndex") or 1), 1)
+        with state.lock:
+            documents = state.documents.get(query.get("workspaceId"), [])
+            page_documents = documents[(page - 1) * limit:page * limit]
+            total = len(documents)
+        self._reply({"paginatedDocuments": {
+            "documents": page_documents, "pageIndex": page,
+            "totalCount": total, "totalPageCount": max(-(-total // limit), 1),
+        }})
+
+    def _post_documents(self, rest, query, raw):
+        if rest != ["import"]:
+            return self._reply({"error": {"code": 404000, "message": f"No route for {self.path}"}}, 404)
+        names = re.findall(rb'filename="([^"]*)"', raw) or [b"import.tsv"]
+        state = self.state
+        with state.lock:
+            job_id = str(uuid.uuid4())
+            state.jobs[job_id] = {"workspaceId": query.get("workspaceId"), "started": time.monotonic(),
+                                  "names": [name.decode("utf-8", "replace") for name in names], "done": False}
+        self._reply({"jobId": job_id, "status": "Running"}, 202)
+
+    def _job_status(self, job_id):
+        state = self.state
+        with state.lock:
+            job = state.jobs.get(job_id)
+            if job is None:
+                return self._reply({"error": {"code": 404000, "message": "Job not found"}}, 404)
+            finished = time.monotonic() - job["started"] >= self.job_duration
+            if finished and not job["done"]:
+                job["done"] = True
+                job["documents"] = [state.document(name) for name in job["names"]]
+                state.documents.setdefault(job["workspaceId"], []).extend(job["documents"])
+            documents = job.get("documents", [])
+        self._reply({
+            "jobId": job_id, "status": "Succeeded" if finished else "Running",
+            "documentDetails": [{"id": doc["documentInfo"]["id"], "name": doc["documentInfo"]["name"],
+                                 "isAvailable": True} for doc in documents],
+        })
+
+    # Indexes
+    def _get_index(self, rest, query, raw):
+        state = self.state
+        with state.lock:
+            if rest:
+                index = state.indexes.get(rest[0])
+            else:
+                workspace_id = query.get("workspaceId")
+                return self._reply({"indexes": [index for index in state.indexes.values()
+                                                if index["workspaceId"] == workspace_id]})
+        if index is None:
+            return self._reply({"error": {"code": 404000, "message": "Index not found"}}, 404)
+        self._reply(index)
+
+    def _post_index(self, rest, query, raw):
+        details = json.loads(raw or b"{}")
+        name = details.get("IndexName") or details.get("name") or "index"
+        state = self.state
+        with state.lock:
+            index_id = str(next(state.ids))
+            index = state.indexes[index_id] = {
+                "id": index_id, "name": name, "apiDomain": f"{name}-{index_id}",
+                "workspaceId": query.get("workspaceId"), "createdDate": "2025-01-01T00:00:00Z",
+                "isAvailable": True, "documentIds": details.get("documentIds", []),
+                "sourceLanguage": details.get("SourceLanguage") or details.get("sourceLanguage"),
+                "targetLanguage": details.get("TargetLanguage") or details.get("targetLanguage"),
+            }
+        self._reply(index, 201)
+
+    def _delete_index(self, rest, query, raw):
+        state = self.state
+        with state.lock:
+            index = state.indexes.pop(rest[0], None) if rest else None
+        if index is None:
+            return self._reply({"error": {"code": 404000, "message": "Index not found"}}, 404)
+        self._reply({})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 2048
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.state = StubState()
+
+
+def configure(handler=StubHandler, **options):
+    """Return a subclass of `handler` with the given class attributes (latency, error_rate, ...)."""
+    unknown = [name for name in options if not hasattr(handler, name)]
+    if unknown:
+        raise TypeError(f"Unknown stub options: {', '.join(unknown)}")
+    for name in ("latency", "api_latency"):
+        if isinstance(options.get(name), str):
+            parse_latency(options[name])
+    return type("ConfiguredStubHandler", (handler,), options)
+
+
+def start_stub_server(host="127.0.0.1", port=0, handler=StubHandler, latency=0.0, **options):
+    """Start the stub in a daemon thread and return (server, base_url)."""
+    server = StubServer((host, port), configure(handler, latency=latency, **options))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def add_stub_arguments(parser):
+    """Add the stub's latency, error and payload options to an argparse parser."""
+    parser.add_argument("--latency", default="0", help="latency spec of each translate call")
+    parser.add_argument("--api-latency", default="0", help="latency spec of each workspace/document/index call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of calls answered 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds of throttled calls")
+    parser.add_argument("--workspaces", type=int, default=3, help="seeded workspaces")
+    parser.add_argument("--documents", type=int, default=100, help="seeded documents per workspace")
+    parser.add_argument("--page-size", type=int, default=100, help="documents per page when no limit is given")
+    parser.add_argument("--expansion", type=int, default=1, help="times each translation repeats its source")
+    parser.add_argument("--job-duration", type=float, default=2.0, help="seconds an import job runs")
+
+
+def stub_options(args):
+    """The configure() options of parsed add_stub_arguments() arguments."""
+    return {"latency": args.latency, "api_latency": args.api_latency, "error_rate": args.error_rate,
+            "throttle_rate": args.throttle_rate, "retry_after": args.retry_after,
+            "workspaces": args.workspaces, "documents": args.documents, "page_size": args.page_size,
+            "expansion": args.expansion, "job_duration": args.job_duration}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+    server = StubServer((args.host, args.port), configure(**stub_options(args)))
+    print(f"Stub server listening on http://{args.host}:{args.port}")
+    server.serve_forever()
@@ -0,0 +1,354 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files(the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and / or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions :
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+#------------------------------------------------------------------------------
+
+"""
+Cancel upstream calls of clients that have gone away.
+
+The web app aborts superseded translations, but a sync worker blocked in
+requests.post does not notice and keeps waiting (and spending GPT quota) for
+a result nobody reads. While a route waits on upstream inside
+`disconnect_watcher.watch(environ)`, one daemon thread peeks at the client's
+socket every DISCONNECT_CHECK_INTERVAL seconds; when it has been closed, the
+upstream connections opened on behalf of that request are shut down, which
+wakes the worker with ClientDisconnected, and later calls of the request are
+refused before they are sent.
+"""
+
+import os
+import time
+import select
+import socket
+import threading
+from contextvars import ContextVar
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# Cancel upstream translate calls when the client disconnects
+CANCEL_ON_DISCONNECT = os.getenv("CANCEL_ON_DISCONNECT", "true").lower() == "true"
+# Seconds between checks of the sockets of waiting clients
+DISCONNECT_CHECK_INTERVAL = float(os.getenv("DISCONNECT_CHECK_INTERVAL", "0.2"))
+
+_current_scope = ContextVar("cancel_scope", default=None)
+
+
+class ClientDisconnected(Exception):
+    """The client of the request went away before its upstream call finished."""
+
+    def __init__(self):
+        super().__init__("Client closed the connection")
+
+
+class CancelScope:
+    """
+    The upstream connections of one client request. Callers sharing the
+    request's upstream call hold() the scope, so it is only aborted once
+    its own client and every holder are gone. A scope with a `parent` tracks
+    its connections there too, so one attempt of a request can be aborted
+    on its own.
+    """
+
+    def __init__(self, watcher=None, parent=None):
+        self.watcher = watcher
+        self.parent = parent
+        self.disconnected = False
+        self.aborted = False
+        self.started = time.monotonic()
+        self._holds = 0
+        self._connections = set()
+        self._lock = threading.Lock()
+
+    def attach(self, connection):
+        """Track an upstream connection about to send; refused once the scope is aborted."""
+        if self.parent is not None:
+            self.parent.attach(connection)
+        with self._lock:
+            if self.aborted:
+                refused = True
+            else:
+                refused = False
+                self._connections.add(connection)
+        if refused:
+            if self.parent is not None:
+                self.parent.detach(connection)
+            if self.watcher is not None:
+                self.watcher.record_skipped()
+            raise ClientDisconnected()
+
+    def detach(self, connection):
+        with self._lock:
+            self._connections.discard(connection)
+        if self.parent is not None:
+            self.parent.detach(connection)
+
+    def hold(self):
+        with self._lock:
+            self._holds += 1
+
+    def release(self):
+        with self._lock:
+            self._holds -= 1
+            abort = self.disconnected and self._holds == 0
+        if abort:
+            self.abort()
+
+    def disconnect(self):
+        """The client is gone; abort unless a holder still waits for the result."""
+        with self._lock:
+            self.disconnected = True
+            abort = self._holds == 0
+        if abort:
+            self.abort()
+
+    def abort(self):
+        with self._lock:
+            self.aborted = True
+            connections, self._connections = self._connections, set()
+        for connection in connections:
+            shutdown(connection.sock)
+        if connections and self.watcher is not None:
+            self.watcher.record_aborted(len(connections))
+
+    def wait(self, event):
+        """Wait for `event`, raising ClientDisconnected if the client goes away first."""
+        while not event.wait(DISCONNECT_CHECK_INTERVAL):
+            if self.disconnected:
+                raise ClientDisconnected()
+
+
+def current_scope():
+    return _current_scope.get()
+
+
+def in_scope(fn, scope=None):
+    """
+    Wrap fn so upstream calls it makes on a worker thread can be cancelled
+    with the request that created the wrapper, or with `scope` if given.
+    """
+    if scope is None:
+        scope = _current_scope.get()
+    if scope is None:
+        return fn
+
+    def run(*args, **kwargs):
+        token = _current_scope.set(scope)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current_scope.reset(token)
+    return run
+
+
+def shutdown(sock):
+    if sock is None:
+        return
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+def client_socket(environ):
+    """The client's socket of a WSGI request, when the server exposes a plain one."""
+    sock = environ.get("werkzeug.socket") or environ.get("gunicorn.socket")
+    # TLS sockets cannot be peeked at without consuming records
+    if not isinstance(sock, socket.socket) or hasattr(sock, "do_handshake"):
+        return None
+    return sock
+
+
+def peer_closed(sock):
+    """Whether the other end of `sock` has closed it, without consuming pending bytes."""
+    try:
+        if hasattr(socket, "MSG_DONTWAIT"):
+            return sock.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT) == b""
+        readable, _, _ = select.select([sock], [], [], 0)
+        return bool(readable) and sock.recv(1, socket.MSG_PEEK) == b""
+    except (BlockingIOError, InterruptedError):
+        return False
+    except (OSError, ValueError):
+        return True
+
+
+class _CancellableConnection:
+    """Attach to the current cancel scope from sending a request until its response headers arrive."""
+
+    def request(self, *args, **kwargs):
+        scope = _current_scope.get()
+        if scope is not None:
+            scope.attach(self)
+        try:
+            super().request(*args, **kwargs)
+        except BaseException:
+            if scope is not None:
+                scope.detach(self)
+            raise
+        self._cancel_scope = scope
+        if scope is not None and scope.aborted:
+            # Aborted while connecting, before the socket could be shut down
+            shutdown(self.sock)
+
+    def getresponse(self, *args, **kwargs):
+        try:
+            return super().getresponse(*args, **kwargs)
+        finally:
+            scope = getattr(self, "_cancel_scope", None)
+            if scope is not None:
+                self._cancel_scope = None
+                scope.detach(self)
+
+
+class CancellableHTTPConnection(_CancellableConnection, HTTPConnection):
+    pass
+
+
+class CancellableHTTPSConnection(_CancellableConnection, HTTPSConnection):
+    pass
+
+
+class CancellableHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = CancellableHTTPConnection
+
+
+class CancellableHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = CancellableHTTPSConnection
+
+
+class CancellableAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections can be shut down by the cancel scope of the request using them."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CancellableHTTPConnectionPool,
+            "https": CancellableHTTPSConnectionPool,
+        }
+
+
+class DisconnectWatcher:
+    """
+    Watches the sockets of clients waiting on upstream and counts translate
+    calls that completed against those cancelled because the client left.
+    """
+
+    def __init__(self, enabled=CANCEL_ON_DISCONNECT, interval=DISCONNECT_CHECK_INTERVAL):
+        self.enabled = enabled
+        self.interval = interval
+        self._watched = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._thread = None
+        self.completed = 0
+        self.cancelled = 0
+        self.aborted_connections = 0
+        self.skipped_calls = 0
+        self.released_seconds = 0.0
+
+    def watch(self, environ):
+        """Context manager running its block in a CancelScope tied to the WSGI request's client."""
+        return _Watch(self, client_socket(environ) if self.enabled else None)
+
+    def _add(self, sock, scope):
+        with self._lock:
+            self._watched[scope] = sock
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="disconnect-watcher", daemon=True)
+                self._thread.start()
+            self._wake.notify()
+
+    def _remove(self, scope):
+        with self._lock:
+            self._watched.pop(scope, None)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._watched:
+                    self._wake.wait()
+                watched = list(self._watched.items())
+            for scope, sock in watched:
+                if not scope.disconnected and peer_closed(sock):
+                    scope.disconnect()
+            time.sleep(self.interval)
+
+    def record(self, cancelled, seconds=0.0):
+        """Count a finished call; `seconds` is how long a cancelled one had been waiting."""
+        with self._lock:
+            if cancelled:
+                self.cancelled += 1
+                self.released_seconds += seconds
+            else:
+                self.completed += 1
+
+    def record_aborted(self, connections):
+        with self._lock:
+            self.aborted_connections += connections
+
+    def record_skipped(self):
+        with self._lock:
+            self.skipped_calls += 1
+
+    def stats(self):
+        with self._lock:
+            finished = self.completed + self.cancelled
+            return {
+                "enabled": self.enabled,
+                "watching": len(self._watched),
+                "completed": self.completed,
+                "cancelled": self.cancelled,
+                "cancelledRatio": self.cancelled / finished if finished else 0.0,
+                "abortedConnections": self.aborted_connections,
+                "skippedCalls": self.skipped_calls,
+                "releasedSeconds": round(self.released_seconds, 3),
+            }
+
+
+class _Watch:
+    def __init__(self, watcher, sock):
+        self.watcher = watcher
+        self.sock = sock
+        self.scope = CancelScope(watcher)
+        self._token = None
+
+    def __enter__(self):
+        self._token = _current_scope.set(self.scope)
+        if self.sock is not None:
+            self.watcher._add(self.sock, self.scope)
+        return self.scope
+
+    def __exit__(self, exc_type, exc, traceback):
+        _current_scope.reset(self._token)
+        if self.sock is not None:
+            self.watcher._remove(self.scope)
+        # A call that still finished (for callers sharing it) is not counted as cancelled
+        cancelled = self.scope.disconnected and exc_type is not None
+        self.watcher.record(cancelled, time.monotonic() - self.scope.started if cancelled else 0.0)
+        if cancelled and exc_type is not None and not issubclass(exc_type, ClientDisconnected):
+            # The upstream failure was the abort; report it as the disconnect it is
+            raise ClientDisconnected() from exc
+        return False
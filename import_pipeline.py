@@ -0,0 +1,407 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files(the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and / or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions :
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+#------------------------------------------------------------------------------
+
+"""
+Bulk import-and-index pipelines.
+
+A pipeline takes a manifest of TSV files with their language pairs, imports
+each file into one workspace as it is read from the upload, follows up to
+PIPELINE_CONCURRENCY import jobs at a time through the shared ImportJobPoller,
+and creates each index as soon as the documents it is made of are available. Its progress can be read
+at any time, or waited for by version like an import job.
+"""
+
+import os
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from job_poller import job_state
+
+logger = logging.getLogger('import_pipeline')
+
+# Import jobs of one pipeline followed at the same time
+PIPELINE_CONCURRENCY = int(os.getenv("PIPELINE_CONCURRENCY", "4"))
+# Files accepted in one manifest
+PIPELINE_MAX_ENTRIES = int(os.getenv("PIPELINE_MAX_ENTRIES", "200"))
+# Seconds an import job may run before its entry is given up
+PIPELINE_JOB_TIMEOUT = float(os.getenv("PIPELINE_JOB_TIMEOUT", "3600"))
+# Seconds a finished pipeline's progress is kept
+PIPELINE_RETENTION = float(os.getenv("PIPELINE_RETENTION", "3600"))
+
+FAILED_STATES = {"failed", "cancelled", "canceled", "rejected", "error"}
+
+
+class ManifestError(ValueError):
+    """The pipeline manifest is malformed or does not match the uploaded files."""
+
+
+def parse_manifest(manifest, filenames=None, max_entries=PIPELINE_MAX_ENTRIES):
+    """
+    Normalize a manifest: a list of entries, or {"entries": [...], "concurrency": n}.
+    Each entry names an uploaded `file` (checked against `filenames` when the
+    uploads are already known; each file is listed once) with its `sourceLanguage` and
+    `targetLanguage`, and optionally a `documentName` (default: the file name
+    without extension) and an `indexName` (default: the document name).
+    Entries sharing an index name are indexed together and must share their
+    language pair. Returns (entries, concurrency or None).
+    """
+    concurrency = None
+    if isinstance(manifest, dict):
+        concurrency = manifest.get("concurrency")
+        if concurrency is not None and (not isinstance(concurrency, int) or concurrency < 1):
+            raise ManifestError("concurrency must be a positive integer")
+        manifest = manifest.get("entries")
+    if not isinstance(manifest, list) or not manifest:
+        raise ManifestError("Manifest must be a non-empty list of entries")
+    if len(manifest) > max_entries:
+        raise ManifestError(f"Manifest has more than {max_entries} entries")
+
+    entries, pairs, documents, files = [], {}, set(), set()
+    for number, entry in enumerate(manifest, 1):
+        if not isinstance(entry, dict):
+            raise ManifestError(f"Entry {number} must be an object")
+        file_name = entry.get("file")
+        if not isinstance(file_name, str) or not file_name:
+            raise ManifestError(f"Entry {number}: file is required")
+        if filenames is not None and file_name not in filenames:
+            raise ManifestError(f"Entry {number}: file {file_name!r} was not uploaded")
+        if file_name in files:
+            raise ManifestError(f"Entry {number}: file {file_name!r} is listed twice")
+        files.add(file_name)
+        source_lang, target_lang = entry.get("sourceLanguage"), entry.get("targetLanguage")
+        if not (isinstance(source_lang, str) and source_lang and isinstance(target_lang, str) and target_lang):
+            raise ManifestError(f"Entry {number}: sourceLanguage and targetLanguage are required")
+        document_name = entry.get("documentName") or os.path.splitext(file_name)[0]
+        if document_name in documents:
+            raise ManifestError(f"Entry {number}: document {document_name!r} is listed twice")
+        documents.add(document_name)
+        index_name = entry.get("indexName") or document_name
+        if pairs.setdefault(index_name, (source_lang, target_lang)) != (source_lang, target_lang):
+            raise ManifestError(f"Entry {number}: index {index_name!r} already has another language pair")
+        entries.append({
+            "file": file_name, "documentName": document_name, "indexName": index_name,
+            "sourceLanguage": source_lang, "targetLanguage": target_lang,
+        })
+    return entries, concurrency
+
+
+def job_id_of(payload):
+    if isinstance(payload, dict):
+        return payload.get("jobId") or payload.get("id")
+    return None
+
+
+def job_document_ids(payload):
+    """Ids of the documents a finished import job reports."""
+    if not isinstance(payload, dict):
+        return []
+    ids = []
+    for field in ("documentDetails", "documents"):
+        for document in payload.get(field) or []:
+            if isinstance(document, dict):
+                info = document.get("documentInfo") if isinstance(document.get("documentInfo"), dict) else document
+                document_id = info.get("id") or info.get("documentId")
+                if document_id is not None and document.get("isAvailable", True) is not False:
+                    ids.append(str(document_id))
+    return ids
+
+
+def response_error(response):
+    """Error message of a failed upstream response."""
+    try:
+        payload = response.json()
+    except ValueError:
+        return f"HTTP {response.status_code}: {response.text[:200]}"
+    error = payload.get("error") if isinstance(payload, dict) else None
+    if isinstance(error, dict):
+        error = error.get("message")
+    return f"HTTP {response.status_code}: {error or payload}"
+
+
+class ImportPipeline:
+    """
+    Imports the files of a manifest into one workspace and indexes them.
+
+    Files are handed in by the caller as they are read from the upload:
+    `import_file(entry, upload)` sends one file on the calling thread and
+    returns the requests Response holding its job id. Each job is then
+    followed in the background through `watch_job(job_id)`, the shared
+    JobWatch of the import job, and `create_index(name, source_lang,
+    target_lang, document_ids)` returns the requests Response of the index
+    creation. An index is created once every entry naming it has finished,
+    from the documents of those that succeeded. A file that fails its import
+    keeps the validation report of the error, if any, in `validation`.
+    """
+
+    def __init__(self, scope, workspace_id, entries, import_file, watch_job, create_index,
+                 concurrency=PIPELINE_CONCURRENCY, job_timeout=PIPELINE_JOB_TIMEOUT):
+        self.id = uuid.uuid4().hex
+        self.scope = scope
+        self.workspace_id = workspace_id
+        self.import_file = import_file
+        self.watch_job = watch_job
+        self.create_index = create_index
+        self.concurrency = max(1, min(concurrency, len(entries)))
+        self.job_timeout = job_timeout
+        self.entries = [dict(entry, state="queued", jobId=None, documentIds=[], error=None, validation=None)
+                        for entry in entries]
+        self.indexes = {}
+        for entry in self.entries:
+            index = self.indexes.setdefault(entry["indexName"], {
+                "name": entry["indexName"], "sourceLanguage": entry["sourceLanguage"],
+                "targetLanguage": entry["targetLanguage"], "state": "waiting", "indexId": None,
+                "documentIds": [], "error": None, "pending": 0,
+            })
+            index["pending"] += 1
+        self.started_at = time.time()
+        self.finished_at = None
+        self.version = 0
+        self._started = time.monotonic()
+        self._finished = None
+        self._changed = threading.Condition()
+        self._pool = None
+
+    def start(self):
+        """Start following jobs; hand the files in with import_entry(), then call close()."""
+        self._pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix=f"pipeline-{self.id[:8]}")
+        return self
+
+    def entry_for(self, file_name):
+        """The queued entry of an uploaded file, or None if the manifest does not list it."""
+        with self._changed:
+            for entry in self.entries:
+                if entry["file"] == file_name and entry["state"] == "queued":
+                    return entry
+        return None
+
+    def import_entry(self, entry, upload):
+        """Import one file on the calling thread, then follow its job in the background."""
+        try:
+            job_id = self._import(entry, upload)
+        except Exception as e:
+            self._fail(entry, e)
+            return
+        self._pool.submit(self._follow, entry, job_id)
+
+    def close(self):
+        """No more files: entries whose file never arrived fail, and the pipeline finishes with its jobs."""
+        for entry in self.entries:
+            if entry["state"] == "queued":
+                self._fail(entry, RuntimeError(f"File {entry['file']!r} was not uploaded"))
+        threading.Thread(target=self._run, daemon=True, name=f"pipeline-{self.id}").start()
+        return self
+
+    def _run(self):
+        try:
+            self._pool.shutdown(wait=True)
+        finally:
+            with self._changed:
+                self._finished = time.monotonic()
+                self.finished_at = time.time()
+                self.version += 1
+                self._changed.notify_all()
+
+    def _update(self, target, **fields):
+        with self._changed:
+            target.update(fields)
+            self.version += 1
+            self._changed.notify_all()
+
+    def _fail(self, entry, error):
+        logger.warning(f"Pipeline {self.id}: importing {entry['file']} failed: {error}")
+        self._update(entry, state="failed", error=str(error), validation=getattr(error, "report", None))
+        self._entry_done(self.indexes[entry["indexName"]], [])
+
+    def _follow(self, entry, job_id):
+        try:
+            document_ids = self._wait(job_id)
+        except Exception as e:
+            self._fail(entry, e)
+            return
+        self._update(entry, state="imported", documentIds=document_ids)
+        self._entry_done(self.indexes[entry["indexName"]], document_ids)
+
+    def _import(self, entry, upload):
+        self._update(entry, state="importing")
+        response = self.import_file(entry, upload)
+        if not response.ok:
+            raise RuntimeError(f"Import rejected: {response_error(response)}")
+        try:
+            job_id = job_id_of(response.json())
+        except ValueError:
+            job_id = None
+        if not job_id:
+            raise RuntimeError("Import response has no job id")
+        self._update(entry, state="waiting", jobId=job_id)
+        return job_id
+
+    def _wait(self, job_id):
+        watch = self.watch_job(job_id)
+        watch.subscribe()
+        try:
+            deadline = time.monotonic() + self.job_timeout
+            snapshot = watch.snapshot()
+            while not snapshot["done"]:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RuntimeError(f"Import job {job_id} did not finish in {self.job_timeout:g} seconds")
+                snapshot = watch.wait_for_change(snapshot["version"], timeout=min(remaining, 30))
+        finally:
+            watch.unsubscribe()
+
+        status_code, payload = snapshot["statusCode"], snapshot["status"]
+        if status_code >= 400 or job_state(payload) in FAILED_STATES:
+            raise RuntimeError(f"Import job {job_id} failed: {job_state(payload) or f'HTTP {status_code}'}")
+        document_ids = job_document_ids(payload)
+        if not document_ids:
+            raise RuntimeError(f"Import job {job_id} reported no available document")
+        return document_ids
+
+    def _entry_done(self, index, document_ids):
+        with self._changed:
+            index["documentIds"].extend(document_ids)
+            index["pending"] -= 1
+            ready = index["pending"] == 0
+        if not ready:
+            return
+        if not index["documentIds"]:
+            self._update(index, state="failed", error="No document of the index was imported")
+            return
+        self._update(index, state="creating")
+        try:
+            response = self.create_index(index["name"], index["sourceLanguage"], index["targetLanguage"],
+                                         list(index["documentIds"]))
+        except requests.exceptions.RequestException as e:
+            self._update(index, state="failed", error=f"Index creation failed: {e}")
+            return
+        if not response.ok:
+            self._update(index, state="failed", error=f"Index creation rejected: {response_error(response)}")
+            return
+        try:
+            payload = response.json() if response.text else {}
+        except ValueError:
+            payload = {}
+        index_id = (payload.get("id") or payload.get("indexId")) if isinstance(payload, dict) else None
+        self._update(index, state="created", indexId=index_id)
+
+    @property
+    def done(self):
+        return self._finished is not None
+
+    def finished_for(self):
+        """Seconds since the pipeline finished, or 0 while it runs."""
+        return time.monotonic() - self._finished if self._finished is not None else 0
+
+    def snapshot(self):
+        with self._changed:
+            entries = [{name: entry[name] for name in (
+                "file", "documentName", "indexName", "sourceLanguage", "targetLanguage",
+                "state", "jobId", "documentIds", "error", "validation")} for entry in self.entries]
+            indexes = [{name: value for name, value in index.items() if name != "pending"}
+                       for index in self.indexes.values()]
+            elapsed = (self._finished or time.monotonic()) - self._started
+            return {
+                "pipelineId": self.id,
+                "workspaceId": self.workspace_id,
+                "version": self.version,
+                "done": self.done,
+                "startedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.started_at)),
+                "elapsedSeconds": round(elapsed, 3),
+                "concurrency": self.concurrency,
+                "progress": self._progress(entries, indexes),
+                "entries": entries,
+                "indexes": indexes,
+            }
+
+    @staticmethod
+    def _progress(entries, indexes):
+        finished = sum(1 for entry in entries if entry["state"] in ("imported", "failed"))
+        indexed = sum(1 for index in indexes if index["state"] in ("created", "failed"))
+        return {
+            "files": len(entries),
+            "imported": sum(1 for entry in entries if entry["state"] == "imported"),
+            "importing": sum(1 for entry in entries if entry["state"] in ("importing", "waiting")),
+            "failedFiles": sum(1 for entry in entries if entry["state"] == "failed"),
+            "indexes": len(indexes),
+            "indexesCreated": sum(1 for index in indexes if index["state"] == "created"),
+            "failedIndexes": sum(1 for index in indexes if index["state"] == "failed"),
+            # Each file counts for its import, each index for its creation
+            "ratio": (finished + indexed) / (len(entries) + len(indexes)),
+        }
+
+    def wait_for_change(self, version, timeout):
+        """Block until the version moves past `version`, the pipeline finishes, or the timeout expires."""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version > version or self._finished is not None, timeout=timeout)
+        return self.snapshot()
+
+
+class ImportPipelines:
+    """The pipelines started in this process, readable only by the credential that started them."""
+
+    def __init__(self, retention=PIPELINE_RETENTION):
+        self.retention = retention
+        self._pipelines = {}
+        self._lock = threading.Lock()
+        self.started = 0
+
+    def start(self, pipeline):
+        with self._lock:
+            self._prune()
+            self._pipelines[pipeline.id] = pipeline
+            self.started += 1
+        return pipeline.start()
+
+    def get(self, scope, pipeline_id):
+        with self._lock:
+            pipeline = self._pipelines.get(pipeline_id)
+        return pipeline if pipeline is not None and pipeline.scope == scope else None
+
+    def list(self, scope):
+        with self._lock:
+            self._prune()
+            return [pipeline for pipeline in self._pipelines.values() if pipeline.scope == scope]
+
+    def _prune(self):
+        for pipeline_id, pipeline in list(self._pipelines.items()):
+            if pipeline.finished_for() > self.retention:
+                del self._pipelines[pipeline_id]
+
+    def stats(self):
+        with self._lock:
+            pipelines = list(self._pipelines.values())
+            started = self.started
+        return {
+            "started": started,
+            "running": sum(1 for pipeline in pipelines if not pipeline.done),
+            "tracked": len(pipelines),
+        }
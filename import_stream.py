@@ -0,0 +1,423 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files(the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and / or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions :
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+#------------------------------------------------------------------------------
+import io
+import os
+import json
+import uuid
+
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import MultipartDecoder, Field, File, Data, Epilogue, NEED_DATA
+
+from tsv_preprocess import TsvCleaner
+
+# Bytes read from the client per chunk while forwarding an import upload
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", str(64 * 1024)))
+# How TSV files are checked before import: 'strict' rejects a file with any bad
+# line, 'clean' drops bad lines and forwards the rest, 'off' forwards uploads as is
+IMPORT_TSV_VALIDATION = os.getenv("IMPORT_TSV_VALIDATION", "strict")
+VALIDATION_MODES = ("strict", "clean", "off")
+# Most bytes held back while looking for DocumentDetails and the first file part
+IMPORT_SCAN_MAX_BYTES = int(os.getenv("IMPORT_SCAN_MAX_BYTES", str(1024 * 1024)))
+
+
+class ImportFormError(ValueError):
+    """The upload is not a multipart import form the backend would accept."""
+
+
+class ImportValidationError(ImportFormError):
+    """A TSV file in a strict-mode upload has invalid lines; `report` describes them."""
+
+    def __init__(self, report):
+        ImportFormError.__init__(self, "The uploaded TSV has invalid lines")
+        self.report = report
+
+
+def multipart_boundary(content_type):
+    """Return the boundary of a multipart/form-data content type, or None."""
+    mimetype, options = parse_options_header(content_type or "")
+    if mimetype != "multipart/form-data":
+        return None
+    return options.get("boundary")
+
+
+def parse_document_details(raw):
+    """Parse the DocumentDetails form field once and check the fields the backend needs."""
+    try:
+        details = json.loads(raw)
+    except ValueError:
+        raise ImportFormError("DocumentDetails is not valid JSON")
+    if not (isinstance(details, list) and details and all(isinstance(doc, dict) for doc in details)):
+        raise ImportFormError("DocumentDetails must be a non-empty array")
+    for doc in details:
+        if not doc.get("DocumentName") or not doc.get("FileDetails"):
+            raise ImportFormError("Each DocumentDetails entry needs DocumentName and FileDetails")
+    return details
+
+
+class ImportFormScanner:
+    """
+    Reads just enough of a multipart import upload to validate it.
+
+    Chunks are fed in as they arrive; scanning is complete once the
+    DocumentDetails field has been parsed and the first FILES part has
+    started. The bytes seen so far are kept in `head` unchanged so the
+    upload can be forwarded byte for byte; no more than max_bytes are held.
+    """
+
+    def __init__(self, boundary, max_bytes=IMPORT_SCAN_MAX_BYTES):
+        self._decoder = MultipartDecoder(boundary.encode("latin-1"))
+        self._field = None
+        self._value = bytearray()
+        self.max_bytes = max_bytes
+        self.head = []
+        self.head_size = 0
+        self.document_details = None
+        self.first_file = None
+
+    @property
+    def complete(self):
+        return self.document_details is not None and self.first_file is not None
+
+    def feed(self, chunk):
+        """Feed the next chunk (b'' at the end of the body); returns True once scanning is complete."""
+        self.head.append(chunk)
+        self.head_size += len(chunk)
+        try:
+            self._decoder.receive_data(chunk or None)
+            self._read_events()
+        except ImportFormError:
+            raise
+        except ValueError as e:
+            raise ImportFormError(f"Malformed multipart body: {e}")
+        if self.complete:
+            return True
+        if not chunk:
+            raise ImportFormError("Missing required parameters")
+        if self.head_size > self.max_bytes:
+            raise ImportFormError("DocumentDetails must precede the uploaded FILES")
+        return False
+
+    def _read_events(self):
+        while not self.complete:
+            event = self._decoder.next_event()
+            if event is NEED_DATA or isinstance(event, Epilogue):
+                return
+            if isinstance(event, File):
+                self._field = None
+                if event.name == "FILES" and event.filename:
+                    self.first_file = event.filename
+            elif isinstance(event, Field):
+                self._field = event.name
+                self._value.clear()
+            elif isinstance(event, Data) and self._field == "DocumentDetails":
+                self._value += event.data
+                if not event.more_data:
+                    self.document_details = parse_document_details(self._value.decode("utf-8"))
+
+
+class UploadBody:
+    """
+    Request body for the upstream import: the scanned head followed by the
+    rest of the client stream, read IMPORT_CHUNK_SIZE bytes at a time.
+    `length` is the client's Content-Length, so the body is not re-chunked.
+    """
+
+    def __init__(self, head, stream, length, chunk_size=IMPORT_CHUNK_SIZE):
+        self.head = head
+        self.stream = stream
+        self.length = length
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        for chunk in self.head:
+            if chunk:
+                yield chunk
+        self.head = []
+        while True:
+            chunk = self.stream.read(self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def __len__(self):
+        return self.length
+
+
+def scan_upload(stream, content_type, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Validate a multipart import upload read from a binary stream.
+    Returns the ImportFormScanner; raises ImportFormError.
+    """
+    boundary = multipart_boundary(content_type)
+    if not boundary:
+        raise ImportFormError("Expected a multipart/form-data upload")
+    scanner = ImportFormScanner(boundary)
+    while not scanner.feed(stream.read(chunk_size)):
+        pass
+    return scanner
+
+
+def is_tsv_part(filename, headers):
+    content_type = headers.get("Content-Type", "") if headers else ""
+    return (filename or "").lower().endswith(".tsv") or content_type.startswith("text/tab-separated-values")
+
+
+class UploadCleaner:
+    """
+    Re-encodes a multipart import upload chunk by chunk, passing every TSV
+    FILES part through its own TsvCleaner; other parts are copied unchanged.
+    The output uses a new boundary (see content_type) and, since cleaning
+    changes its size, is sent without a Content-Length. In strict mode,
+    feed() raises ImportValidationError at the first invalid line, so
+    the upload is cut off before the backend receives a complete body.
+    `sink_for(filename)` may return a callable that receives the file's
+    accepted (source, target) pairs. Without a boundary, parts that were
+    already decoded are re-encoded with open_part(), part_data() and close();
+    with clean=False every part is copied unchanged.
+    """
+
+    def __init__(self, boundary=None, strict=True, sink_for=None, clean=True):
+        self.sink_for = sink_for
+        self._decoder = MultipartDecoder(boundary.encode("latin-1")) if boundary else None
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self.strict = strict
+        self.clean = clean
+        self.files = []
+        self.rejected = None
+        self._cleaner = None
+        self._in_part = False
+
+    def feed(self, chunk):
+        """Feed the next chunk of the original body (b'' at the end); returns bytes to forward."""
+        self._decoder.receive_data(chunk or None)
+        out = []
+        while True:
+            event = self._decoder.next_event()
+            if event is NEED_DATA:
+                break
+            if isinstance(event, (Field, File)):
+                out.append(self.open_part(event))
+            elif isinstance(event, Data):
+                out.append(self.part_data(event.data))
+            elif isinstance(event, Epilogue):
+                out.append(self.close())
+                break
+        return b"".join(out)
+
+    def open_part(self, event):
+        """Start a part for a decoded Field or File event; returns bytes to forward."""
+        out = self._close_part() + self._part_header(event)
+        self._in_part = True
+        if (self.clean and isinstance(event, File) and event.name == "FILES"
+                and is_tsv_part(event.filename, event.headers)):
+            sink = self.sink_for(event.filename) if self.sink_for else None
+            self._cleaner = TsvCleaner(sink=sink)
+            self.files.append((event.filename, self._cleaner))
+        return out
+
+    def part_data(self, data):
+        """Add data to the current part; returns bytes to forward."""
+        out = self._cleaner.feed(data) if self._cleaner else data
+        self._check()
+        return out
+
+    def close(self):
+        """End the last part and the body; returns bytes to forward."""
+        return self._close_part() + b"--%s--\r\n" % self.boundary.encode()
+
+    def _part_header(self, event):
+        disposition = f'form-data; name="{event.name}"'
+        if isinstance(event, File):
+            disposition += '; filename="%s"' % event.filename.replace('"', "%22")
+        lines = [f"--{self.boundary}", f"Content-Disposition: {disposition}"]
+        lines.extend(f"{name}: {value}" for name, value in event.headers.items()
+                     if name.lower() != "content-disposition")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8")
+
+    def _close_part(self):
+        if not self._in_part:
+            return b""
+        self._in_part = False
+        tail = b""
+        if self._cleaner is not None:
+            tail = self._cleaner.finish()
+            self._check()
+            self._cleaner = None
+        return tail + b"\r\n"
+
+    def _check(self):
+        if self.strict and self._cleaner is not None and self._cleaner.errors:
+            self.rejected = ImportValidationError(self.report())
+            raise self.rejected
+
+    def report(self):
+        files = [dict(name=name, **cleaner.report()) for name, cleaner in self.files]
+        return {"valid": not any(f["errors"] for f in files), "files": files}
+
+    def summary(self):
+        """Totals across files, small enough for a response header."""
+        totals = {"files": len(self.files), "pairs": 0, "duplicates": 0, "errors": 0}
+        for _, cleaner in self.files:
+            totals["pairs"] += cleaner.pairs
+            totals["duplicates"] += cleaner.duplicates
+            totals["errors"] += cleaner.errors
+        return totals
+
+
+def iter_cleaned_upload(cleaner, head, stream, chunk_size=IMPORT_CHUNK_SIZE):
+    """Yield the cleaned upload for the scanned head followed by the rest of the stream."""
+    for chunk in head:
+        if chunk:
+            data = cleaner.feed(chunk)
+            if data:
+                yield data
+    while True:
+        chunk = stream.read(chunk_size)
+        data = cleaner.feed(chunk)
+        if data:
+            yield data
+        if not chunk:
+            return
+
+
+class MultipartReader:
+    """
+    Reads a multipart upload from the client stream one part at a time.
+    read_fields() returns the form fields that precede the first file part;
+    files() then yields each file part with an iterator over its data, which
+    is read from the client only as it is consumed. Data left unread when the
+    next part is requested is skipped, so nothing but the fields is held.
+    """
+
+    def __init__(self, stream, boundary, chunk_size=IMPORT_CHUNK_SIZE, max_field_bytes=IMPORT_SCAN_MAX_BYTES):
+        self._stream = stream
+        self._decoder = MultipartDecoder(boundary.encode("latin-1"))
+        self.chunk_size = chunk_size
+        self.max_field_bytes = max_field_bytes
+        self._pending = None
+        self._ended = False
+
+    def _next_event(self):
+        if self._pending is not None:
+            event, self._pending = self._pending, None
+            return event
+        try:
+            while True:
+                event = self._decoder.next_event()
+                if event is not NEED_DATA:
+                    return event
+                if self._ended:
+                    raise ImportFormError("Malformed multipart body: unexpected end of the upload")
+                chunk = self._stream.read(self.chunk_size)
+                self._ended = not chunk
+                self._decoder.receive_data(chunk or None)
+        except ImportFormError:
+            raise
+        except ValueError as e:
+            raise ImportFormError(f"Malformed multipart body: {e}")
+
+    def read_fields(self):
+        """Return {name: value} of the fields before the first file part."""
+        fields, name, size = {}, None, 0
+        while True:
+            event = self._next_event()
+            if isinstance(event, (File, Epilogue)):
+                self._pending = event
+                return {field: value.decode("utf-8") for field, value in fields.items()}
+            if isinstance(event, Field):
+                name = event.name
+                fields[name] = bytearray()
+            elif isinstance(event, Data) and name is not None:
+                size += len(event.data)
+                if size > self.max_field_bytes:
+                    raise ImportFormError("The form fields must precede the uploaded FILES")
+                fields[name] += event.data
+
+    def files(self, names=("FILES",)):
+        """Yield (File event, data iterator) for each file part whose field is in `names`."""
+        while True:
+            event = self._next_event()
+            if isinstance(event, Epilogue):
+                return
+            if isinstance(event, File) and event.name in names and event.filename:
+                yield event, self._data()
+
+    def _data(self):
+        while True:
+            event = self._next_event()
+            if not isinstance(event, Data):
+                self._pending = event
+                return
+            if event.data:
+                yield event.data
+            if not event.more_data:
+                return
+
+
+class PartStream(io.RawIOBase):
+    """Binary file object over the data iterator of a part, for readers that want lines."""
+
+    def __init__(self, data):
+        super().__init__()
+        self._data = data
+        self._pending = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending:
+            self._pending = next(self._data, None)
+            if self._pending is None:
+                self._pending = b""
+                return 0
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+def iter_pipeline_file(cleaner, document_details, part, data):
+    """Yield the import upload of one pipeline file: its DocumentDetails, then its FILES part through `cleaner`."""
+    yield cleaner.open_part(Field(name="DocumentDetails", headers=Headers()))
+    yield cleaner.part_data(json.dumps(document_details).encode("utf-8"))
+    yield cleaner.open_part(part)
+    for chunk in data:
+        out = cleaner.part_data(chunk)
+        if out:
+            yield out
+    yield cleaner.close()
+
+
+def validation_mode(value):
+    """Resolve the validate query parameter against IMPORT_TSV_VALIDATION."""
+    mode = (value or IMPORT_TSV_VALIDATION).lower()
+    if mode not in VALIDATION_MODES:
+        raise ImportFormError(f"validate must be one of {', '.join(VALIDATION_MODES)}")
+    return mode
@@ -0,0 +1,139 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files(the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and / or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions :
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+#------------------------------------------------------------------------------
+
+import os
+import time
+import threading
+from collections import OrderedDict
+
+from translation_document import segment_document, assemble_document
+
+# Documents whose last sentences and translations are remembered (LRU)
+INCREMENTAL_MAX_DOCUMENTS = int(os.getenv("INCREMENTAL_MAX_DOCUMENTS", "10000"))
+# Seconds a remembered document survives without an edit
+INCREMENTAL_TTL = float(os.getenv("INCREMENTAL_TTL", "1800"))
+
+
+class IncrementalTranslations:
+    """
+    The last segmented source of each (session, document) and the translations
+    of its sentences, so that an edit only sends the sentences it changed.
+
+    `config` identifies everything but the text (languages, targets, options);
+    a document translated with another config starts over.
+    """
+
+    def __init__(self, max_entries=INCREMENTAL_MAX_DOCUMENTS, ttl=INCREMENTAL_TTL, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.sentences = 0
+        self.reused = 0
+        self.sent = 0
+        self.source_chars = 0
+        self.sent_chars = 0
+
+    def _get(self, key, config):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return {}
+            stored_config, translations, touched = entry
+            if stored_config != config or self.clock() - touched > self.ttl:
+                del self._entries[key]
+                return {}
+            self._entries.move_to_end(key)
+            return translations
+
+    def _put(self, key, config, translations):
+        with self._lock:
+            self._entries[key] = (config, translations, self.clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def forget(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def translate(self, key, config, text, translate_texts, html=False, targets=1):
+        """
+        Translate text, reusing the translations of sentences it shares with the
+        document's previous version. `translate_texts(sentences)` translates the
+        new sentences and returns one Translator result per sentence.
+        Returns (one translated text per target, errors, counters).
+        """
+        parts = segment_document(text, html=html)
+        sentences = [piece for translate, piece in parts if translate]
+        previous = self._get(key, config)
+        missing = list(dict.fromkeys(sentence for sentence in sentences if sentence not in previous))
+
+        known = dict(previous)
+        failed = {}
+        for sentence, result in zip(missing, translate_texts(missing) if missing else []):
+            translations = result.get("translations") if isinstance(result, dict) else None
+            if translations and len(translations) >= targets:
+                known[sentence] = translations
+            else:
+                failed[sentence] = result
+        self._put(key, config, {sentence: known[sentence] for sentence in sentences if sentence in known})
+
+        texts, errors = [], []
+        for target in range(targets):
+            results = [{"translations": [known[sentence][target]]} if sentence in known else failed[sentence]
+                       for sentence in sentences]
+            translated, target_errors = assemble_document(parts, results)
+            texts.append(translated)
+            if not errors:
+                errors = target_errors
+
+        reused = sum(1 for sentence in sentences if sentence in previous)
+        sent_chars = sum(len(sentence) for sentence in missing)
+        with self._lock:
+            self.requests += 1
+            self.sentences += len(sentences)
+            self.reused += reused
+            self.sent += len(missing)
+            self.source_chars += sum(len(sentence) for sentence in sentences)
+            self.sent_chars += sent_chars
+        return texts, errors, {"sentences": len(sentences), "reused": reused, "sent": len(missing)}
+
+    def stats(self):
+        with self._lock:
+            return {
+                "documents": len(self._entries),
+                "requests": self.requests,
+                "sentences": self.sentences,
+                "reusedSentences": self.reused,
+                "sentSentences": self.sent,
+                "sourceChars": self.source_chars,
+                "sentChars": self.sent_chars,
+                "savedCharsRatio": 1 - self.sent_chars / self.source_chars if self.source_chars else 0.0,
+            }
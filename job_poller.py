@@ -0,0 +1,229 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files(the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and / or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions :
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+#------------------------------------------------------------------------------
+
+import os
+import time
+import logging
+import threading
+
+import requests
+
+logger = logging.getLogger('job_poller')
+
+JOB_POLL_MIN_INTERVAL = float(os.getenv("JOB_POLL_MIN_INTERVAL", "1"))
+JOB_POLL_MAX_INTERVAL = float(os.getenv("JOB_POLL_MAX_INTERVAL", "15"))
+JOB_POLL_BACKOFF = float(os.getenv("JOB_POLL_BACKOFF", "1.5"))
+# Seconds a poller keeps running after its last subscriber left
+JOB_POLL_IDLE_TIMEOUT = float(os.getenv("JOB_POLL_IDLE_TIMEOUT", "30"))
+# Seconds the final state of a finished job is kept for late subscribers
+JOB_RESULT_RETENTION = float(os.getenv("JOB_RESULT_RETENTION", "300"))
+
+TERMINAL_STATES = {
+    "succeeded", "completed", "complete", "partiallysucceeded", "failed",
+    "cancelled", "canceled", "rejected", "error",
+}
+
+
+def job_state(payload):
+    """Best-effort status name of an import job payload, lower-cased, or ''."""
+    if not isinstance(payload, dict):
+        return ""
+    for field in ("status", "jobStatus", "state"):
+        value = payload.get(field)
+        if isinstance(value, dict):
+            value = value.get("displayName") or value.get("name") or value.get("status")
+        if isinstance(value, str) and value:
+            return value.replace(" ", "").lower()
+    return ""
+
+
+def is_terminal(status_code, payload):
+    """A job is finished once it reports a terminal state, or the backend rejects the lookup."""
+    if status_code == 429 or status_code >= 500:
+        return False
+    if status_code >= 400:
+        return True
+    return job_state(payload) in TERMINAL_STATES
+
+
+class JobWatch:
+    """
+    Latest known status of one import job, shared by every client waiting on it.
+    `version` increases each time the status changes.
+    """
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.version = 0
+        self.status_code = None
+        self.payload = None
+        self.updated_at = None
+        self.done = False
+        self.subscribers = 0
+        self.last_seen = time.monotonic()
+        self.polls = 0
+        self._changed = threading.Condition()
+
+    def snapshot(self):
+        with self._changed:
+            return {
+                "jobId": self.job_id,
+                "version": self.version,
+                "statusCode": self.status_code,
+                "status": self.payload,
+                "done": self.done,
+            }
+
+    def publish(self, status_code, payload, done):
+        with self._changed:
+            self.polls += 1
+            self.updated_at = time.monotonic()
+            changed = (status_code, payload) != (self.status_code, self.payload) or done != self.done
+            if changed:
+                self.status_code, self.payload, self.done = status_code, payload, done
+                self.version += 1
+                self._changed.notify_all()
+            return changed
+
+    def wait_for_change(self, version, timeout):
+        """Block until the version moves past `version`, the job finishes, or the timeout expires."""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version > version or self.done, timeout=timeout)
+        return self.snapshot()
+
+    def subscribe(self):
+        with self._changed:
+            self.subscribers += 1
+            self.last_seen = time.monotonic()
+
+    def unsubscribe(self):
+        with self._changed:
+            self.subscribers -= 1
+            self.last_seen = time.monotonic()
+
+    def idle_for(self):
+        with self._changed:
+            return 0 if self.subscribers > 0 else time.monotonic() - self.last_seen
+
+
+class ImportJobPoller:
+    """
+    Runs at most one background poller per (scope, job id).
+
+    `fetch(job_id, headers)` returns the upstream requests Response. The
+    poller starts at min_interval, backs off by `backoff` while the status is
+    unchanged, drops back to min_interval when it changes, and stops at a
+    terminal state or once nobody has subscribed for idle_timeout seconds.
+    `on_done(scope, watch)` is called once when a job finishes.
+    """
+
+    def __init__(self, fetch, on_done=None, min_interval=JOB_POLL_MIN_INTERVAL,
+                 max_interval=JOB_POLL_MAX_INTERVAL, backoff=JOB_POLL_BACKOFF,
+                 idle_timeout=JOB_POLL_IDLE_TIMEOUT):
+        self.fetch = fetch
+        self.on_done = on_done
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.idle_timeout = idle_timeout
+        self._watches = {}
+        self._lock = threading.Lock()
+        self.upstream_polls = 0
+
+    def watch(self, scope, job_id, headers):
+        """Return the shared JobWatch for a job, starting its poller if needed."""
+        key = (scope, job_id)
+        with self._lock:
+            self._prune()
+            watch = self._watches.get(key)
+            if watch is None:
+                watch = JobWatch(job_id)
+                self._watches[key] = watch
+                threading.Thread(target=self._run, args=(key, watch, headers), daemon=True,
+                                 name=f"import-job-{job_id}").start()
+            return watch
+
+    def peek(self, scope, job_id):
+        """Return the active JobWatch for a job without starting a poller."""
+        with self._lock:
+            return self._watches.get((scope, job_id))
+
+    def _prune(self):
+        now = time.monotonic()
+        for key, watch in list(self._watches.items()):
+            if watch.done and now - watch.updated_at > JOB_RESULT_RETENTION:
+                del self._watches[key]
+
+    def _run(self, key, watch, headers):
+        interval = self.min_interval
+        failed = False
+        try:
+            while True:
+                try:
+                    response = self.fetch(watch.job_id, headers)
+                    with self._lock:
+                        self.upstream_polls += 1
+                    try:
+                        payload = response.json() if response.text else {}
+                    except ValueError:
+                        payload = {"error": "Invalid JSON response from backend", "raw": response.text}
+                    done = is_terminal(response.status_code, payload)
+                    changed = watch.publish(response.status_code, payload, done)
+                except requests.exceptions.RequestException as e:
+                    logger.warning(f"Polling import job {watch.job_id} failed: {e}")
+                    changed, done = False, False
+                except Exception as e:
+                    # Anything else stops the poller: end the job for its subscribers so none waits forever
+                    logger.exception(f"Polling import job {watch.job_id} stopped: {e}")
+                    failed = True
+                    watch.publish(502, {"error": f"Polling the import job failed: {e}"}, True)
+                    return
+
+                if done:
+                    if self.on_done is not None:
+                        self.on_done(key[0], watch)
+                    return
+                if watch.idle_for() > self.idle_timeout:
+                    return
+                interval = self.min_interval if changed else min(interval * self.backoff, self.max_interval)
+                time.sleep(interval)
+        finally:
+            # Finished watches stay registered so late subscribers get the final state;
+            # after a poller failure the next subscriber starts a new one
+            if not watch.done or failed:
+                with self._lock:
+                    if self._watches.get(key) is watch:
+                        del self._watches[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "activeJobs": sum(1 for watch in self._watches.values() if not watch.done),
+                "trackedJobs": len(self._watches),
+                "upstreamPolls": self.upstream_polls,
+                "subscribers": sum(watch.subscribers for watch in self._watches.values()),
+            }
@@ -0,0 +1,192 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files(the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and / or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions :
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+#------------------------------------------------------------------------------
+
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from single_flight import SingleFlight
+
+logger = logging.getLogger('metadata_cache')
+
+# Entries are served as fresh for METADATA_CACHE_TTL seconds, then served stale
+# while a background refresh runs, until METADATA_CACHE_STALE_TTL.
+METADATA_CACHE_TTL = float(os.getenv("METADATA_CACHE_TTL", "60"))
+METADATA_CACHE_STALE_TTL = float(os.getenv("METADATA_CACHE_STALE_TTL", "600"))
+METADATA_CACHE_MAX_ENTRIES = int(os.getenv("METADATA_CACHE_MAX_ENTRIES", "1000"))
+
+HIT, STALE, MISS = "HIT", "STALE", "MISS"
+
+
+def credential_scope(token):
+    """Short digest of a bearer token, so cache keys never hold the token itself."""
+    return hashlib.sha256((token or "").encode("utf-8")).hexdigest()[:32]
+
+
+class MetadataCache:
+    """
+    Stale-while-revalidate cache of workspace, index and document lists.
+
+    Keys are (kind, scope, workspace_id) tuples, with scope the caller's
+    credential_scope(). An entry is fresh for ttl seconds; after that it is
+    still served, marked STALE, while one background refresh replaces it, and
+    it is dropped once older than stale_ttl. invalidate() removes matching
+    entries after a write, and refreshes that started before the
+    invalidation are discarded so they cannot put old data back.
+    Concurrent misses for the same key share one load through `flights`.
+    """
+
+    def __init__(self, ttl=METADATA_CACHE_TTL, stale_ttl=METADATA_CACHE_STALE_TTL,
+                 max_entries=METADATA_CACHE_MAX_ENTRIES, clock=time.monotonic, flights=None):
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.max_entries = max_entries
+        self.clock = clock
+        self.flights = flights if flights is not None else SingleFlight()
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._version = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="metadata-refresh")
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.invalidations = 0
+
+    def lookup(self, key):
+        """Return (value, state) with state HIT, STALE or MISS (value is None on a miss)."""
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or now - entry[1] > self.stale_ttl:
+                self.misses += 1
+                return None, MISS
+            self._entries.move_to_end(key)
+            if now - entry[1] <= self.ttl:
+                self.hits += 1
+                return entry[0], HIT
+            self.stale_hits += 1
+            return entry[0], STALE
+
+    def claim_refresh(self, key):
+        """Reserve the refresh of a stale key; returns a version token, or None if already refreshing."""
+        with self._lock:
+            if key in self._refreshing:
+                return None
+            self._refreshing.add(key)
+            self.refreshes += 1
+            return self._version
+
+    def current_version(self):
+        with self._lock:
+            return self._version
+
+    def store(self, key, value, version=None):
+        """Store value unless an invalidation happened since `version` was taken."""
+        with self._lock:
+            self._refreshing.discard(key)
+            if version is not None and version != self._version:
+                return
+            self._entries[key] = (value, self.clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def release(self, key):
+        """Give up a claimed refresh without storing anything."""
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def get_or_load(self, key, loader, force=False):
+        """
+        Serve key from the cache, loading it with `loader()` on a miss.
+
+        `loader` must not depend on the request context, since stale entries
+        are refreshed on a background thread. It returns (value, cacheable);
+        values that are not cacheable (errors) are returned but not stored.
+        Returns (value, state).
+        """
+        if not force:
+            value, state = self.lookup(key)
+            if state == HIT:
+                return value, state
+            if state == STALE:
+                version = self.claim_refresh(key)
+                if version is not None:
+                    self._executor.submit(self._refresh, key, loader, version)
+                return value, state
+
+        def load():
+            version = self.current_version()
+            value, cacheable = loader()
+            if cacheable:
+                self.store(key, value, version)
+            return value
+
+        return self.flights.do(key, load), MISS
+
+    def _refresh(self, key, loader, version):
+        try:
+            value, cacheable = loader()
+        except Exception as e:
+            logger.warning(f"Background refresh of {key[0]} failed: {e}")
+            self.release(key)
+            return
+        if cacheable:
+            self.store(key, value, version)
+        else:
+            self.release(key)
+
+    def invalidate(self, kind=None, workspace_id=None, scope=None):
+        """Drop entries matching kind, workspace_id and scope (None matches any)."""
+        with self._lock:
+            self._version += 1
+            stale = [key for key in self._entries
+                     if (kind is None or key[0] == kind)
+                     and (workspace_id is None or key[2] == workspace_id)
+                     and (scope is None or key[1] == scope)]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "staleHits": self.stale_hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "invalidations": self.invalidations,
+                "ttlSeconds": self.ttl,
+                "staleTtlSeconds": self.stale_ttl,
+            }
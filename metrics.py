@@ -0,0 +1,402 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files(the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and / or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions :
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+#------------------------------------------------------------------------------
+import os
+import re
+import json
+import time
+import bisect
+import threading
+import contextvars
+
+# Set to 'false' to stop recording request metrics
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_PREFIX = "adaptct_"
+# Most distinct upstream performance stages tracked
+METRICS_MAX_STAGES = 40
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BYTES_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000, 100000000)
+
+PERFORMANCE_FIELDS = ("performance", "performancedata", "perf", "timings", "trackperformance")
+TIMING_HEADER_RE = re.compile(r"(time|latency|duration)", re.I)
+SERVER_TIMING_RE = re.compile(r"([\w.-]+)[^,]*?;\s*dur=([\d.]+)")
+
+
+def metric_label(value):
+    return re.sub(r"[^a-z0-9]+", "_", str(value).lower()).strip("_")
+
+
+def snake_case(name):
+    return re.sub(r"(?<=[a-z0-9])([A-Z])", r"_\1", name).lower()
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names, values, extra=""):
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """Cumulative Prometheus histogram keyed by a fixed tuple of label names."""
+
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        for labels, counts, total in sorted(series):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{float(bound)!r}"'
+                lines.append(f"{self.name}_bucket{format_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{format_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        lines.extend(f"{self.name}{format_labels(self.label_names, labels)} {value}" for labels, value in values)
+        return lines
+
+
+class UpstreamTimer:
+    """
+    Wall time during which at least one upstream call was in flight for a
+    request, so parallel calls (batch chunks, hedges) are not counted twice.
+    """
+
+    def __init__(self):
+        self.total = 0.0
+        self._active = 0
+        self._since = 0.0
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._active == 0:
+                self._since = time.perf_counter()
+            self._active += 1
+
+    def stop(self):
+        with self._lock:
+            self._active -= 1
+            if self._active == 0:
+                self.total += time.perf_counter() - self._since
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+_current_timer = contextvars.ContextVar("upstream_timer", default=None)
+
+
+class _NoTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NO_TIMER = _NoTimer()
+
+
+def current_timer():
+    """The UpstreamTimer of the request being served, or None."""
+    return _current_timer.get()
+
+
+def upstream_wait():
+    """Context manager that counts its block as upstream time of the current request."""
+    timer = _current_timer.get()
+    return timer if timer is not None else NO_TIMER
+
+
+def in_request(fn):
+    """
+    Wrap fn so upstream calls it makes on a worker thread still count
+    toward the request that created the wrapper.
+    """
+    timer = _current_timer.get()
+    if timer is None:
+        return fn
+
+    def run(*args, **kwargs):
+        token = _current_timer.set(timer)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current_timer.reset(token)
+    return run
+
+
+def translator_timings(headers, payload):
+    """
+    Upstream performance data of a translate response as {stage: seconds}.
+    Read from Server-Timing, numeric *time/latency/duration headers, and the
+    numeric fields of performance objects in the result elements; values
+    are taken to be milliseconds. A raw JSON body is only decoded when it
+    mentions a performance field.
+    """
+    if isinstance(payload, (bytes, bytearray)):
+        lowered = payload.lower()
+        try:
+            mentioned = any(f'"{field}"'.encode() in lowered for field in PERFORMANCE_FIELDS)
+            payload = json.loads(payload) if mentioned else None
+        except ValueError:
+            payload = None
+    timings = {}
+    for name, value in headers.items():
+        if name.lower() == "server-timing":
+            for stage, duration in SERVER_TIMING_RE.findall(value):
+                timings[metric_label(stage)] = float(duration) / 1000
+        elif TIMING_HEADER_RE.search(name):
+            try:
+                timings[metric_label(name)] = float(value) / 1000
+            except ValueError:
+                pass
+
+    def collect(prefix, value):
+        if isinstance(value, bool):
+            return
+        if isinstance(value, (int, float)):
+            timings[metric_label(prefix)] = value / 1000
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                collect(f"{prefix}_{key}", item)
+
+    for element in payload if isinstance(payload, list) else [payload]:
+        if isinstance(element, dict):
+            for key, value in element.items():
+                if key.lower() in PERFORMANCE_FIELDS:
+                    collect(key, value)
+    return timings
+
+
+def flatten_stats(prefix, stats):
+    """Numeric leaves of a stats() dictionary as (metric name, value) pairs."""
+    for key, value in stats.items():
+        name = f"{prefix}_{metric_label(snake_case(str(key)))}"
+        if isinstance(value, dict):
+            yield from flatten_stats(name, value)
+        elif isinstance(value, bool):
+            yield name, int(value)
+        elif isinstance(value, (int, float)):
+            yield name, value
+
+
+class Metrics:
+    """
+    Request metrics published in the Prometheus text format.
+
+    The WSGI middleware times every request end to end, including streamed
+    bodies but not files the server sends through wsgi.file_wrapper, counts
+    request and response bytes, and splits the time between
+    waiting on upstream calls (see upstream_wait) and the app itself.
+    Components with a stats() method can be registered as collectors and
+    are exported as gauges when /api/metrics is scraped.
+    """
+
+    def __init__(self, enabled=METRICS_ENABLED):
+        self.enabled = enabled
+        labels = ("route", "method", "status")
+        self.requests = Counter(f"{METRICS_PREFIX}http_requests_total", "Requests served", labels)
+        self.duration = Histogram(f"{METRICS_PREFIX}http_request_duration_seconds",
+                                  "Time to serve a request, including streamed bodies", labels, SECONDS_BUCKETS)
+        self.upstream = Histogram(f"{METRICS_PREFIX}http_upstream_duration_seconds",
+                                  "Time a request spent waiting on upstream calls", ("route",), SECONDS_BUCKETS)
+        self.app_time = Histogram(f"{METRICS_PREFIX}http_app_duration_seconds",
+                                  "Time a request spent in the app, outside upstream calls", ("route",), SECONDS_BUCKETS)
+        self.request_bytes = Histogram(f"{METRICS_PREFIX}http_request_bytes", "Request body size",
+                                       ("route",), BYTES_BUCKETS)
+        self.response_bytes = Histogram(f"{METRICS_PREFIX}http_response_bytes", "Response body size",
+                                        ("route",), BYTES_BUCKETS)
+        self.translator = Histogram(f"{METRICS_PREFIX}translator_performance_seconds",
+                                    "Timings reported by the Translator with trackperformance=true",
+                                    ("stage",), SECONDS_BUCKETS)
+        self._collectors = {}
+        self._stages = set()
+
+    def register(self, name, collector):
+        """Export the numeric fields of collector() (a stats() dict) as gauges named after it."""
+        self._collectors[name] = collector
+
+    def record(self, route, method, status, elapsed, upstream, request_bytes, response_bytes):
+        route = route or "unmatched"
+        self.requests.inc((route, method, str(status)))
+        self.duration.observe((route, method, str(status)), elapsed)
+        self.upstream.observe((route,), upstream)
+        self.app_time.observe((route,), max(0.0, elapsed - upstream))
+        self.request_bytes.observe((route,), request_bytes)
+        self.response_bytes.observe((route,), response_bytes)
+
+    def record_translator(self, headers, payload):
+        if not self.enabled:
+            return
+        for stage, seconds in translator_timings(headers, payload).items():
+            if stage not in self._stages:
+                if len(self._stages) >= METRICS_MAX_STAGES:
+                    continue
+                self._stages.add(stage)
+            self.translator.observe((stage,), seconds)
+
+    def track(self):
+        """Start timing upstream calls for a request handled outside the WSGI middleware."""
+        timer = UpstreamTimer()
+        _current_timer.set(timer)
+        return timer
+
+    def render(self):
+        lines = []
+        for metric in (self.requests, self.duration, self.upstream, self.app_time,
+                       self.request_bytes, self.response_bytes, self.translator):
+            lines.extend(metric.render())
+        for name, collector in self._collectors.items():
+            for metric, value in flatten_stats(METRICS_PREFIX + name, collector()):
+                lines.append(f"# TYPE {metric} gauge")
+                lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def wsgi_middleware(self, wsgi_app):
+        if not self.enabled:
+            return wsgi_app
+        return MetricsMiddleware(self, wsgi_app)
+
+
+class _CountingInput:
+    def __init__(self, stream):
+        self.stream = stream
+        self.count = 0
+
+    def read(self, *args):
+        data = self.stream.read(*args)
+        self.count += len(data)
+        return data
+
+    def readinto(self, buffer):
+        count = self.stream.readinto(buffer)
+        self.count += count or 0
+        return count
+
+    def readline(self, *args):
+        data = self.stream.readline(*args)
+        self.count += len(data)
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+    def __iter__(self):
+        for line in self.stream:
+            self.count += len(line)
+            yield line
+
+
+class MetricsMiddleware:
+    """WSGI middleware that feeds Metrics.record(); the route is set by the app in environ['metrics.route']."""
+
+    def __init__(self, metrics, wsgi_app):
+        self.metrics = metrics
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        start = time.perf_counter()
+        timer = self.metrics.track()
+        counting = environ["wsgi.input"] = _CountingInput(environ["wsgi.input"])
+        status, length = [], []
+
+        def record_status(status_line, headers, exc_info=None):
+            status[:] = [status_line.split(" ", 1)[0]]
+            length[:] = [value for name, value in headers if name.lower() == "content-length"]
+            return start_response(status_line, headers, exc_info)
+
+        result = self.wsgi_app(environ, record_status)
+        file_wrapper = environ.get("wsgi.file_wrapper")
+        if isinstance(file_wrapper, type) and isinstance(result, file_wrapper):
+            # Hand files to the server untouched so it can still use sendfile();
+            # the time spent sending them is not counted
+            sent = int(length[0]) if length and length[0].isdigit() else 0
+            self._record(environ, start, timer, counting, status, sent)
+            return result
+        return self._iterate(result, environ, start, timer, counting, status)
+
+    def _iterate(self, result, environ, start, timer, counting, status):
+        sent = 0
+        try:
+            for chunk in result:
+                sent += len(chunk)
+                yield chunk
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+            self._record(environ, start, timer, counting, status, sent)
+
+    def _record(self, environ, start, timer, counting, status, sent):
+        self.metrics.record(environ.get("metrics.route"), environ.get("REQUEST_METHOD", ""),
+                            status[0] if status else "500", time.perf_counter() - start, timer.total,
+                            counting.count, sent)
@@ -0,0 +1,302 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files(the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and / or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions :
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+#------------------------------------------------------------------------------
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+from translation_memory import LATENCY_WINDOW, percentile
+
+# Requests per second allowed per subscription key and per GPT deployment
+# (0 = no limit; Retry-After from the upstream is honored either way)
+TRANSLATOR_RATE_LIMIT = float(os.getenv("TRANSLATOR_RATE_LIMIT", "0"))
+TRANSLATOR_RATE_BURST = int(os.getenv("TRANSLATOR_RATE_BURST", "20"))
+GPT_DEPLOYMENT_RATE_LIMIT = float(os.getenv("GPT_DEPLOYMENT_RATE_LIMIT", "0"))
+GPT_DEPLOYMENT_RATE_BURST = int(os.getenv("GPT_DEPLOYMENT_RATE_BURST", "10"))
+# Seconds a request may wait for its turn before it is answered with 429
+RATE_MAX_WAIT = float(os.getenv("RATE_MAX_WAIT", "30"))
+# Times a throttled (429) upstream call is retried after its Retry-After
+RATE_MAX_RETRIES = int(os.getenv("RATE_MAX_RETRIES", "2"))
+# Pause applied when a 429 carries no Retry-After
+RATE_DEFAULT_RETRY_AFTER = 1.0
+
+INTERACTIVE, BULK = 0, 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BULK: "bulk"}
+
+
+class RateLimited(Exception):
+    """No upstream capacity became available within the caller's wait budget."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Upstream rate limit reached, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+def retry_after_seconds(headers):
+    """Seconds to wait from Retry-After (seconds or HTTP date) or the Azure *-retry-after-ms headers."""
+    for name in ("retry-after-ms", "x-ms-retry-after-ms"):
+        value = headers.get(name)
+        if value:
+            try:
+                return max(0.0, float(value) / 1000)
+            except ValueError:
+                pass
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def rate_keys(body):
+    """Buckets a Translator request draws from: the subscription plus each GPT deployment it names."""
+    deployments = set()
+    for element in body if isinstance(body, list) else []:
+        for target in (element.get("Targets") or []) if isinstance(element, dict) else []:
+            if isinstance(target, dict) and target.get("DeploymentName"):
+                deployments.add(f"deployment:{target['DeploymentName']}")
+    return ("subscription",) + tuple(sorted(deployments))
+
+
+class TokenBucket:
+    def __init__(self, rate, burst, clock):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.clock = clock
+        self.updated = clock()
+        self.paused_until = 0.0
+
+    def delay(self, now):
+        """Seconds until a token can be taken (0 when one is available now)."""
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.rate <= 0:
+            return 0.0
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        if self.rate > 0:
+            self.tokens -= 1
+
+    def pause(self, seconds, now):
+        self.paused_until = max(self.paused_until, now + seconds)
+        self.tokens = 0.0
+        self.updated = now
+
+
+class _Waiter:
+    def __init__(self, priority, keys):
+        self.priority = priority
+        self.keys = set(keys)
+
+
+class RateGovernor:
+    """
+    Token buckets in front of TRANSLATOR_URL: one for the subscription key
+    and one per GPT deployment. A request takes a token from every bucket
+    it uses and waits, up to max_wait, while any is empty or paused by a
+    Retry-After. Waiters are served by priority: a bulk request never takes
+    a token while an interactive request is queued for one of its buckets.
+    """
+
+    def __init__(self, rate=TRANSLATOR_RATE_LIMIT, burst=TRANSLATOR_RATE_BURST,
+                 deployment_rate=GPT_DEPLOYMENT_RATE_LIMIT, deployment_burst=GPT_DEPLOYMENT_RATE_BURST,
+                 max_wait=RATE_MAX_WAIT, max_retries=RATE_MAX_RETRIES, clock=time.monotonic):
+        self.rate, self.burst = rate, burst
+        self.deployment_rate, self.deployment_burst = deployment_rate, deployment_burst
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        self.clock = clock
+        self._buckets = {}
+        self._waiters = []
+        self._changed = threading.Condition()
+        self._waits = {priority: deque(maxlen=LATENCY_WINDOW) for priority in PRIORITY_NAMES}
+        self.granted = {priority: 0 for priority in PRIORITY_NAMES}
+        self.rejected = 0
+        self.throttled = 0
+        self.retries = 0
+
+    def _bucket(self, key):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if key == "subscription":
+                bucket = TokenBucket(self.rate, self.burst, self.clock)
+            else:
+                bucket = TokenBucket(self.deployment_rate, self.deployment_burst, self.clock)
+            self._buckets[key] = bucket
+        return bucket
+
+    def _outranked(self, waiter):
+        return any(other.priority < waiter.priority and other.keys & waiter.keys for other in self._waiters)
+
+    def _try_take(self, keys, now):
+        """Take a token from every bucket, or return the seconds until that is possible."""
+        buckets = [self._bucket(key) for key in keys]
+        delay = max(bucket.delay(now) for bucket in buckets)
+        if delay == 0:
+            for bucket in buckets:
+                bucket.take()
+        return delay
+
+    def try_acquire(self, keys, priority=INTERACTIVE):
+        """Take tokens without waiting; False if the caller would have to queue."""
+        with self._changed:
+            waiter = _Waiter(priority, keys)
+            if self._outranked(waiter) or any(other.priority == priority and other.keys & waiter.keys
+                                              for other in self._waiters):
+                return False
+            if self._try_take(keys, self.clock()) > 0:
+                return False
+            self._record(priority, 0.0)
+            return True
+
+    def acquire(self, keys, priority=INTERACTIVE, max_wait=None):
+        """Block until tokens are taken from every bucket in keys; returns the seconds waited."""
+        max_wait = self.max_wait if max_wait is None else max_wait
+        start = self.clock()
+        waiter = _Waiter(priority, keys)
+        with self._changed:
+            self._waiters.append(waiter)
+            try:
+                while True:
+                    now = self.clock()
+                    delay = None if self._outranked(waiter) else self._try_take(keys, now)
+                    if delay == 0:
+                        self._record(priority, now - start)
+                        return now - start
+                    remaining = start + max_wait - now
+                    if remaining <= 0 or (delay is not None and delay > remaining):
+                        self.rejected += 1
+                        raise RateLimited(delay if delay is not None else max_wait)
+                    self._changed.wait(remaining if delay is None else delay)
+            finally:
+                self._waiters.remove(waiter)
+                self._changed.notify_all()
+
+    def _record(self, priority, waited):
+        self.granted[priority] += 1
+        self._waits[priority].append(waited)
+
+    def throttle(self, keys, retry_after):
+        """
+        Pause the buckets behind a 429. Throttling of a request that used a GPT
+        deployment is charged to its deployments, otherwise to the subscription.
+        """
+        deployments = [key for key in keys if key != "subscription"]
+        with self._changed:
+            self.throttled += 1
+            now = self.clock()
+            for key in deployments or ["subscription"]:
+                self._bucket(key).pause(retry_after, now)
+            self._changed.notify_all()
+
+    def _should_retry(self, keys, status, headers, attempt, start):
+        """Record a 429 and return whether the call should be sent again."""
+        if status != 429:
+            return False
+        retry_after = retry_after_seconds(headers)
+        if retry_after is None:
+            retry_after = RATE_DEFAULT_RETRY_AFTER
+        self.throttle(keys, retry_after)
+        if attempt >= self.max_retries or self.clock() + retry_after > start + self.max_wait:
+            return False
+        with self._changed:
+            self.retries += 1
+        return True
+
+    def send(self, keys, priority, call):
+        """
+        Send call() (returning a requests Response) when the buckets allow,
+        retrying throttled responses after their Retry-After while the wait
+        budget lasts. Raises RateLimited if no slot opens in time.
+        """
+        start = self.clock()
+        attempt = 0
+        while True:
+            self.acquire(keys, priority, max_wait=max(0.0, start + self.max_wait - self.clock()))
+            response = call()
+            if not self._should_retry(keys, response.status_code, response.headers, attempt, start):
+                return response
+            attempt += 1
+
+    async def send_async(self, keys, priority, call):
+        """
+        asyncio counterpart of send(); `call` is a coroutine function
+        returning (status, headers, body). Only a request that has to queue
+        waits on a worker thread.
+        """
+        start = self.clock()
+        attempt = 0
+        while True:
+            if not self.try_acquire(keys, priority):
+                await asyncio.to_thread(self.acquire, keys, priority,
+                                        max(0.0, start + self.max_wait - self.clock()))
+            status, headers, body = await call()
+            if not self._should_retry(keys, status, headers, attempt, start):
+                return status, headers, body
+            attempt += 1
+
+    def stats(self):
+        with self._changed:
+            now = self.clock()
+            queues = {}
+            for priority, name in PRIORITY_NAMES.items():
+                waits = sorted(self._waits[priority])
+                queues[name] = {
+                    "depth": sum(1 for waiter in self._waiters if waiter.priority == priority),
+                    "granted": self.granted[priority],
+                    "waitMs": {
+                        "p50": round(percentile(waits, 0.50) * 1000, 1),
+                        "p95": round(percentile(waits, 0.95) * 1000, 1),
+                        "max": round((waits[-1] if waits else 0.0) * 1000, 1),
+                    },
+                }
+            return {
+                "queues": queues,
+                "rejected": self.rejected,
+                "throttled": self.throttled,
+                "retries": self.retries,
+                "buckets": {
+                    key: {
+                        "ratePerSecond": bucket.rate,
+                        "tokens": round(bucket.tokens, 2) if bucket.rate > 0 else None,
+                        "pausedSeconds": round(max(0.0, bucket.paused_until - now), 2),
+                    }
+                    for key, bucket in self._buckets.items()
+                },
+            }
@@ -0,0 +1,301 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files(the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and / or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions :
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+#------------------------------------------------------------------------------
+import os
+import re
+import math
+import time
+import heapq
+import logging
+import threading
+from array import array
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from translation_memory import LATENCY_WINDOW, percentile
+
+logger = logging.getLogger('reference_index')
+
+# Set to 'true' to build the index, so requests can ask for ReferenceTextPairs with references=<datasetId>
+REFERENCE_PAIRS_AUTO = os.getenv("REFERENCE_PAIRS_AUTO", "false").lower() == "true"
+REFERENCE_PAIRS_TOP_K = int(os.getenv("REFERENCE_PAIRS_TOP_K", "5"))
+# Postings scanned per query term; longer lists are cut to their newest entries
+REFERENCE_MAX_POSTINGS = int(os.getenv("REFERENCE_MAX_POSTINGS", "1000"))
+# Candidates re-scored with full BM25 before the top k are picked
+REFERENCE_RERANK = int(os.getenv("REFERENCE_RERANK", "50"))
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+CATCH_UP_BATCH = 20000
+
+TOKEN_RE = re.compile(r"\w+")
+CJK_RANGES = ((0x3040, 0x30ff), (0x3400, 0x4dbf), (0x4e00, 0x9fff), (0xac00, 0xd7af), (0xf900, 0xfaff))
+
+
+def is_cjk(char):
+    code = ord(char)
+    return any(low <= code <= high for low, high in CJK_RANGES)
+
+
+def tokenize(text):
+    """Case-folded word tokens; words written in CJK scripts become character bigrams."""
+    tokens = []
+    for word in TOKEN_RE.findall(text.casefold()):
+        if len(word) > 1 and not word.isascii() and any(is_cjk(char) for char in word):
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+def idf(doc_count, doc_freq):
+    return math.log(1 + (doc_count - doc_freq + 0.5) / (doc_freq + 0.5))
+
+
+class Shard:
+    """Inverted index of the source sides of one (source, target, dataset) set of pairs."""
+
+    def __init__(self):
+        self.rowids = array("Q")
+        self.lengths = array("I")
+        self.postings = {}
+        self.total_length = 0
+
+    def add(self, rowid, tokens):
+        doc = len(self.rowids)
+        self.rowids.append(rowid)
+        self.lengths.append(len(tokens))
+        self.total_length += len(tokens)
+        for term in set(tokens):
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = array("I")
+            postings.append(doc)
+
+    def candidates(self, terms, limit, max_postings=REFERENCE_MAX_POSTINGS):
+        """
+        Rank documents by the summed idf of the query terms they contain,
+        reading at most max_postings (the newest) per term; returns up to
+        `limit` (score, rowid) pairs.
+        """
+        doc_count = len(self.rowids)
+        scores = {}
+        get = scores.get
+        for term in terms:
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            weight = idf(doc_count, len(postings))
+            for doc in postings[-max_postings:]:
+                scores[doc] = get(doc, 0.0) + weight
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(score, self.rowids[doc]) for doc, score in best]
+
+    def bm25(self, query_terms, tokens):
+        """Full BM25 score of one document's tokens against the query terms."""
+        doc_count = len(self.rowids)
+        average = self.total_length / doc_count if doc_count else 1.0
+        frequencies = Counter(tokens)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * len(tokens) / average)
+        score = 0.0
+        for term in query_terms:
+            tf = frequencies.get(term)
+            if tf:
+                score += idf(doc_count, len(self.postings.get(term, ()))) * tf * (BM25_K1 + 1) / (tf + norm)
+        return score
+
+
+class ReferenceIndex:
+    """
+    In-memory BM25 retrieval over the pairs of a TranslationMemory, used to
+    pick ReferenceTextPairs for a segment.
+
+    The index follows the memory's pairs table by id: it catches up on a
+    background thread at start-up and after every commit, so pairs from
+    new imports become searchable shortly after the import is accepted.
+    Queries gather candidates from the newest postings of each term and
+    re-rank the best REFERENCE_RERANK of them with full BM25.
+    """
+
+    def __init__(self, memory, max_postings=REFERENCE_MAX_POSTINGS, rerank=REFERENCE_RERANK):
+        self.memory = memory
+        self.max_postings = max_postings
+        self.rerank = rerank
+        self._shards = {}
+        self._watermark = 0
+        self._lock = threading.Lock()
+        self._catch_up_lock = threading.Lock()
+        self._scheduled = False
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reference-index")
+        self._local = threading.local()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self.indexed = 0
+        self.queries = 0
+        self.injected = 0
+        memory.on_commit.append(self.schedule)
+        memory.on_clear.append(self.reset)
+
+    def start(self):
+        self.schedule()
+        return self
+
+    def schedule(self):
+        """Queue a catch-up run unless one is already waiting."""
+        with self._lock:
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._executor.submit(self._run_catch_up)
+
+    def _run_catch_up(self):
+        with self._lock:
+            self._scheduled = False
+        try:
+            self.catch_up()
+        except Exception as e:
+            logger.warning(f"Reference index catch-up failed: {e}")
+
+    def catch_up(self):
+        """Index every pair added to the memory since the last run."""
+        with self._catch_up_lock:
+            db = self.memory.connect()
+            try:
+                while True:
+                    rows = db.execute(
+                        "SELECT id, source_lang, target_lang, dataset, source FROM pairs WHERE id > ? ORDER BY id LIMIT ?",
+                        (self._watermark, CATCH_UP_BATCH)
+                    ).fetchall()
+                    if not rows:
+                        return
+                    for rowid, source_lang, target_lang, dataset, source in rows:
+                        language_pair = self._shards.setdefault((source_lang, target_lang), {})
+                        shard = language_pair.get(dataset)
+                        if shard is None:
+                            shard = language_pair[dataset] = Shard()
+                        shard.add(rowid, tokenize(source))
+                    self._watermark = rows[-1][0]
+                    with self._lock:
+                        self.indexed += len(rows)
+            finally:
+                db.close()
+
+    def reset(self):
+        """Drop the index and rebuild it from the memory (after pairs were deleted)."""
+        with self._catch_up_lock:
+            self._shards = {}
+            self._watermark = 0
+            with self._lock:
+                self.indexed = 0
+        self.schedule()
+
+    def _connection(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = self.memory.connect()
+        return db
+
+    def search(self, source_lang, target_lang, text, owner, dataset, k=REFERENCE_PAIRS_TOP_K):
+        """
+        Return up to k {"Source", "Target"} pairs most similar to text from
+        the owner's dataset (or the dataset it aliases); none without both.
+        """
+        start = time.perf_counter()
+        language_pair = self._shards.get(((source_lang or "").lower(), (target_lang or "").lower()), {})
+        shards = [language_pair[name] for name in self.memory.datasets(owner, dataset) if name in language_pair]
+        query_terms = list(dict.fromkeys(tokenize(text)))
+        pairs = []
+        if shards and query_terms:
+            candidates = []
+            for shard in shards:
+                candidates.extend((score, rowid, shard) for score, rowid in
+                                  shard.candidates(query_terms, self.rerank, self.max_postings))
+            candidates = heapq.nlargest(self.rerank, candidates, key=lambda item: item[0])
+            if candidates:
+                shard_of = {rowid: shard for _, rowid, shard in candidates}
+                rows = self._connection().execute(
+                    f"SELECT id, source, target FROM pairs WHERE id IN ({','.join('?' * len(shard_of))})",
+                    list(shard_of)
+                ).fetchall()
+                ranked = heapq.nlargest(
+                    k, rows, key=lambda row: shard_of[row[0]].bm25(query_terms, tokenize(row[1])))
+                pairs = [{"Source": source, "Target": target} for _, source, target in ranked]
+        with self._lock:
+            self.queries += 1
+            self._latencies.append(time.perf_counter() - start)
+        return pairs
+
+    def record_injected(self, count):
+        with self._lock:
+            self.injected += count
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            return {
+                "indexedPairs": self.indexed,
+                "shards": sum(len(language_pair) for language_pair in self._shards.values()),
+                "queries": self.queries,
+                "injectedTargets": self.injected,
+                "queryLatencyMs": {
+                    "p50": round(percentile(latencies, 0.50) * 1000, 3),
+                    "p95": round(percentile(latencies, 0.95) * 1000, 3),
+                    "p99": round(percentile(latencies, 0.99) * 1000, 3),
+                },
+            }
+
+
+def inject_reference_pairs(index, body, params, owner, dataset, k=REFERENCE_PAIRS_TOP_K):
+    """
+    Add ReferenceTextPairs from the owner's `dataset` to every target that
+    names neither an upstream index (AdaptiveDatasetId) nor pairs of its
+    own. Callers pass the dataset the request asked for; without one nothing
+    is added. Returns the new body and the number of targets that received
+    pairs; body is not modified.
+    """
+    if not (owner and dataset):
+        return body, 0
+    injected = 0
+    result = []
+    for element in body:
+        targets = element.get("Targets") if isinstance(element, dict) else None
+        if not (targets and isinstance(element.get("Text"), str)):
+            result.append(element)
+            continue
+        source_lang = element.get("Language") or params.get("from")
+        new_targets, element_injected = [], 0
+        for target in targets:
+            if isinstance(target, dict) and not target.get("AdaptiveDatasetId") and not target.get("ReferenceTextPairs"):
+                pairs = index.search(source_lang, target.get("Language") or params.get("to"), element["Text"],
+                                     owner, dataset, k)
+                if pairs:
+                    target = dict(target, ReferenceTextPairs=pairs)
+                    element_injected += 1
+            new_targets.append(target)
+        injected += element_injected
+        result.append(dict(element, Targets=new_targets) if element_injected else element)
+    if injected:
+        index.record_injected(injected)
+    return result, injected
@@ -0,0 +1,203 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files(the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and / or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions :
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+#------------------------------------------------------------------------------
+"""
+Request shaping and caching decisions shared by the Flask routes in app.py
+and the native handlers in async_app.py.
+
+Each class holds what one route decides for one call, independent of how
+the call is sent: TranslateCall covers /api/translate (cache lookup,
+translation memory split, reference pairs, merging and caching the
+result), ImportForward covers /api/documents/import (validation, the
+memory loader and what is settled once the backend answers), and
+decode_metadata turns an upstream list response into a cacheable value.
+"""
+
+import json
+import logging
+
+from metadata_cache import credential_scope
+from translation_cache import relay_cache_key, translation_cache_key
+from translation_memory import ImportMemoryLoader, split_by_memory, merge_with_memory
+from reference_index import inject_reference_pairs
+from import_stream import UploadCleaner
+from response_encoding import can_relay, loads
+
+logger = logging.getLogger('request_shaping')
+
+
+def decode_metadata(status, content, empty, normalize=None, source=None):
+    """
+    Decode (and optionally normalize) an upstream list response for the metadata cache.
+    Returns ((payload, status), cacheable); only successful responses are cacheable.
+    """
+    if not content:
+        return (empty, status), False
+    try:
+        data = loads(content)
+        if normalize is not None:
+            data = normalize(data)
+    except Exception as e:
+        logger.error(f"Error processing {source or 'upstream'} response: {e}")
+        raw = content.decode("utf-8", "replace") if isinstance(content, (bytes, bytearray)) else content
+        return ({"error": "Invalid JSON response from backend", "raw": raw}, status), False
+    return (data, status), status == 200
+
+
+class TranslateCall:
+    """
+    One /api/translate call. `args` are the query arguments: nocache skips
+    the cache, nomemory skips the translation memory, and references names
+    the caller's dataset whose pairs ground targets that have none. Results
+    grounded on the caller's private reference pairs are never shared
+    through the cache. Use cached(), then prepare(), then send `body` under
+    `flight_key` and pass the upstream result to finish().
+    """
+
+    def __init__(self, params, data, token, args, cache, memory=None, references=None):
+        self.params = params
+        self.data = data
+        self.token = token
+        self.scope = credential_scope(token)
+        self.cache = cache
+        self.memory = memory if not args.get('nomemory') else None
+        self.reference_index = references
+        self.references = args.get('references') if references is not None and isinstance(data, list) else None
+        self.bypass_cache = bool(args.get('nocache') or self.references)
+        self.cache_key = translation_cache_key(params, data, scope=token)
+        self.body = data
+        self.plan = None
+        self.memory_hits = None
+        self.reference_targets = None
+
+    def cached(self):
+        """The cached result (upstream bytes or decoded JSON), or None."""
+        if self.bypass_cache:
+            self.cache.record_bypass()
+            return None
+        # Relayed results are cached as the upstream bytes
+        return self.cache.get(relay_cache_key(self.cache_key), self.cache_key)
+
+    def prepare(self):
+        """
+        Answer what the translation memory can and ground the rest on reference pairs.
+        Returns the whole result when the memory answers every segment, else None
+        and `body` is what to send upstream.
+        """
+        if self.memory is not None and isinstance(self.data, list):
+            self.body, self.plan, self.memory_hits = split_by_memory(self.memory, self.data, self.params, self.scope)
+            if not self.body:
+                self.memory.record_short_circuit()
+                return merge_with_memory(self.plan, [])
+        if self.references and isinstance(self.body, list):
+            self.body, self.reference_targets = inject_reference_pairs(
+                self.reference_index, self.body, self.params, self.scope, self.references)
+        return None
+
+    @property
+    def flight_key(self):
+        """Identical concurrent calls from the same credential share one upstream call."""
+        return ('translate', self.scope, translation_cache_key(self.params, self.body))
+
+    def relays(self, content, content_type):
+        """Whether the upstream bytes can be forwarded (and cached) unchanged: nothing to merge in."""
+        return self.plan is None and can_relay(content, content_type)
+
+    def finish(self, status, result, size, relayed=False):
+        """Merge the memory's answers into a successful result and cache it; returns the result."""
+        if status != 200:
+            return result
+        if self.plan is not None and isinstance(result, list):
+            result = merge_with_memory(self.plan, result)
+        if not self.bypass_cache:
+            self.cache.set(relay_cache_key(self.cache_key) if relayed else self.cache_key, result, size)
+        return result
+
+    def response_headers(self, status=200, upstream_headers=None):
+        headers = {}
+        if self.plan is not None:
+            headers['X-Translation-Memory-Hits'] = str(self.memory_hits)
+        if self.reference_targets is not None:
+            headers['X-Reference-Pairs'] = str(self.reference_targets)
+        if upstream_headers is not None:
+            if status == 429 and upstream_headers.get('Retry-After'):
+                headers['Retry-After'] = upstream_headers['Retry-After']
+            if upstream_headers.get('X-Translation-Fallback'):
+                headers['X-Translation-Fallback'] = upstream_headers['X-Translation-Fallback']
+        return headers
+
+
+class ImportForward:
+    """
+    One /api/documents/import upload. In validation mode 'off' the upload
+    is forwarded as is; otherwise TSV files are cleaned by an UploadCleaner
+    on the way, and their accepted pairs feed the translation memory, keyed
+    by the workspace (or `datasetId`), once the backend accepts the import.
+    Pass each chunk of the original body through encode() and send the
+    result with `content_type`, then call settle() or failed().
+    """
+
+    def __init__(self, mode, boundary, content_type, document_details, token, args, workspace_id, memory=None):
+        self.workspace_id = workspace_id
+        self.cleaner = None
+        self.memory_loader = None
+        self.content_type = content_type
+        if mode == 'off':
+            return
+        if memory is not None:
+            self.memory_loader = ImportMemoryLoader(
+                memory, document_details, credential_scope(token),
+                dataset=args.get('datasetId') or workspace_id,
+                source_lang=args.get('sourceLanguage'),
+                target_lang=args.get('targetLanguage')
+            )
+        self.cleaner = UploadCleaner(boundary, strict=(mode == 'strict'),
+                                     sink_for=self.memory_loader.sink_for if self.memory_loader else None)
+        self.content_type = self.cleaner.content_type
+
+    def encode(self, chunk):
+        """Bytes to forward for the next chunk of the original body (b'' at the end)."""
+        return self.cleaner.feed(chunk) if self.cleaner is not None else chunk
+
+    def failed(self):
+        """The upload could not be sent: drop its pairs; returns the validation error that cut it off, or None."""
+        if self.memory_loader is not None:
+            self.memory_loader.rollback()
+        return self.cleaner.rejected if self.cleaner is not None else None
+
+    def settle(self, ok, metadata_cache):
+        """The backend answered: keep the pairs and drop the workspace's cached document list if it accepted."""
+        if self.memory_loader is not None:
+            if ok:
+                self.memory_loader.commit()
+            else:
+                self.memory_loader.rollback()
+        if ok:
+            metadata_cache.invalidate('documents', self.workspace_id)
+
+    def validation_header(self):
+        """X-Import-Validation value, or None when nothing was validated."""
+        return json.dumps(self.cleaner.summary()) if self.cleaner is not None else None
@@ -0,0 +1,164 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files(the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and / or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions :
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+#------------------------------------------------------------------------------
+
+"""
+Cheaper response bodies: upstream JSON relayed as bytes instead of being
+decoded and re-encoded, gzip/brotli for large list responses, and an orjson
+backed JSON provider for the routes that do have to build their payload.
+orjson and brotli are optional; without them the standard library is used
+and only gzip is offered.
+"""
+
+import gzip
+import json
+import os
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Forward upstream JSON bodies byte for byte when the route does not normalize them
+UPSTREAM_PASSTHROUGH = os.getenv("UPSTREAM_PASSTHROUGH", "true").lower() == "true"
+# Smallest list response worth compressing, in bytes (0 turns compression off)
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
+# auto uses orjson when it is installed; json forces the standard library
+JSON_PROVIDER = os.getenv("JSON_PROVIDER", "auto").lower()
+
+FAST_JSON = orjson is not None and JSON_PROVIDER != "json"
+JSON_MIMETYPE = "application/json"
+
+
+def dumps(obj):
+    """Encode obj as compact UTF-8 JSON bytes."""
+    if FAST_JSON:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def loads(data):
+    """Decode JSON from bytes or str."""
+    if FAST_JSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider, with orjson doing the work when it is available."""
+
+    def dumps(self, obj, **kwargs):
+        if FAST_JSON and not kwargs.get("indent"):
+            try:
+                return orjson.dumps(obj, default=self.default,
+                                    option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS).decode("utf-8")
+            except TypeError:
+                pass
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if FAST_JSON and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if not FAST_JSON or (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        try:
+            body = orjson.dumps(obj, default=self.default,
+                                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS | orjson.OPT_APPEND_NEWLINE)
+        except TypeError:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def is_json(content_type):
+    return (content_type or "").split(";", 1)[0].strip().lower().endswith(("/json", "+json"))
+
+
+def can_relay(content, content_type):
+    """Whether an upstream body can be forwarded without decoding it."""
+    return UPSTREAM_PASSTHROUGH and bool(content) and is_json(content_type)
+
+
+def negotiate_encoding(accept_encoding):
+    """The best of br and gzip the client accepts, or None."""
+    offered, wildcard = {}, 0.0
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding == "*":
+            wildcard = quality
+        elif coding in ("gzip", "br"):
+            offered[coding] = quality
+    candidates = {name: offered.get(name, wildcard) for name in ("gzip", "br") if name != "br" or brotli is not None}
+    best = max(candidates, key=lambda name: (candidates[name], name == "br"))
+    return best if candidates[best] > 0 else None
+
+
+def compress(body, accept_encoding):
+    """Return (encoding, body): body compressed for the client when it is large enough, else (None, body)."""
+    if not COMPRESS_MIN_SIZE or len(body) < COMPRESS_MIN_SIZE:
+        return None, body
+    encoding = negotiate_encoding(accept_encoding)
+    if encoding == "br":
+        return encoding, brotli.compress(body, quality=COMPRESS_BROTLI_QUALITY)
+    if encoding == "gzip":
+        return encoding, gzip.compress(body, compresslevel=COMPRESS_GZIP_LEVEL, mtime=0)
+    return None, body
+
+
+def compress_response(response, accept_encoding):
+    """Compress a buffered Flask response in place for the client's Accept-Encoding."""
+    response.vary.add("Accept-Encoding")
+    if response.direct_passthrough or response.is_streamed or "Content-Encoding" in response.headers:
+        return response
+    encoding, body = compress(response.get_data(), accept_encoding)
+    if encoding is not None:
+        response.set_data(body)
+        response.headers["Content-Encoding"] = encoding
+    return response
@@ -0,0 +1,225 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files(the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and / or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions :
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+#------------------------------------------------------------------------------
+
+import os
+import time
+import pickle
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict
+
+from flask_session import Session
+from flask_session.sessions import ServerSideSession, SessionInterface
+from itsdangerous import BadSignature, want_bytes
+
+
+class MemorySessionStore:
+    """
+    Process-local session store: an LRU of at most max_entries sessions,
+    each expiring after its TTL. Suitable for a single-process server.
+    """
+
+    def __init__(self, max_entries=10000, clock=time.time):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sid):
+        """Return (data, written_at) or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is None:
+                return None
+            data, written_at, expires_at = entry
+            if expires_at <= self.clock():
+                del self._entries[sid]
+                return None
+            self._entries.move_to_end(sid)
+            return dict(data), written_at
+
+    def set(self, sid, data, ttl):
+        now = self.clock()
+        with self._lock:
+            self._entries[sid] = (dict(data), now, now + ttl)
+            self._entries.move_to_end(sid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, sid):
+        with self._lock:
+            self._entries.pop(sid, None)
+
+
+class SqliteSessionStore:
+    """
+    Session store in a SQLite database (WAL mode), shared by every worker
+    process on the host. Expired rows are purged periodically on write.
+    """
+
+    PURGE_EVERY = 500
+
+    def __init__(self, path, clock=time.time):
+        self.path = path
+        self.clock = clock
+        self._local = threading.local()
+        self._writes = 0
+        with self._connection() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS sessions ("
+                       "sid TEXT PRIMARY KEY, data BLOB NOT NULL, written_at REAL NOT NULL, expires_at REAL NOT NULL)")
+            db.execute("CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions (expires_at)")
+
+    def _connection(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def get(self, sid):
+        """Return (data, written_at) or None if missing or expired."""
+        row = self._connection().execute(
+            "SELECT data, written_at FROM sessions WHERE sid = ? AND expires_at > ?", (sid, self.clock())
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            return pickle.loads(row[0]), row[1]
+        except Exception:
+            return None
+
+    def set(self, sid, data, ttl):
+        now = self.clock()
+        db = self._connection()
+        db.execute(
+            "INSERT OR REPLACE INTO sessions (sid, data, written_at, expires_at) VALUES (?, ?, ?, ?)",
+            (sid, pickle.dumps(dict(data), protocol=pickle.HIGHEST_PROTOCOL), now, now + ttl)
+        )
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            db.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+
+    def delete(self, sid):
+        self._connection().execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+
+class StoreSession(ServerSideSession):
+    """Server-side session that remembers when its data was last written."""
+
+    def __init__(self, initial=None, sid=None, permanent=None, written_at=None):
+        ServerSideSession.__init__(self, initial, sid, permanent)
+        self.written_at = written_at
+
+
+class StoreSessionInterface(SessionInterface):
+    """
+    Flask session interface on top of a MemorySessionStore or SqliteSessionStore.
+
+    Unchanged sessions are not written back: a session is saved only when it
+    was modified, or when more than refresh_fraction of its lifetime has
+    passed since the last write so an active user is not logged out.
+    """
+
+    session_class = StoreSession
+
+    def __init__(self, store, use_signer=False, permanent=True, refresh_fraction=0.5):
+        self.store = store
+        self.use_signer = use_signer
+        self.permanent = permanent
+        self.refresh_fraction = refresh_fraction
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid and self.use_signer:
+            signer = self._get_signer(app)
+            if signer is None:
+                return None
+            try:
+                sid = signer.unsign(sid).decode()
+            except BadSignature:
+                sid = None
+        if sid:
+            stored = self.store.get(sid)
+            if stored is not None:
+                data, written_at = stored
+                return self.session_class(data, sid=sid, written_at=written_at)
+        return self.session_class(sid=self._generate_sid(), permanent=self.permanent)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if not session:
+            if session.modified:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        lifetime = app.permanent_session_lifetime.total_seconds()
+        stale = session.written_at is None or time.time() - session.written_at > lifetime * self.refresh_fraction
+        if not (session.modified or stale):
+            return
+
+        self.store.set(session.sid, session, lifetime)
+        session_id = session.sid
+        if self.use_signer:
+            session_id = self._get_signer(app).sign(want_bytes(session.sid)).decode()
+        response.set_cookie(
+            name, session_id,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app)
+        )
+
+
+def init_session(app):
+    """
+    Install the session backend named by SESSION_TYPE.
+
+    'memory' and 'sqlite' use the stores in this module; any other value is
+    handed to Flask-Session unchanged (for example 'filesystem').
+    """
+    session_type = app.config.get('SESSION_TYPE')
+    if session_type == 'memory':
+        store = MemorySessionStore(max_entries=app.config.get('SESSION_MAX_ENTRIES', 10000))
+    elif session_type == 'sqlite':
+        path = app.config.get('SESSION_SQLITE_PATH') or os.path.join(tempfile.gettempdir(), 'adapct_sessions.sqlite3')
+        store = SqliteSessionStore(path)
+    else:
+        Session(app)
+        return
+    app.session_interface = StoreSessionInterface(
+        store,
+        use_signer=app.config.get('SESSION_USE_SIGNER', False),
+        permanent=app.config.get('SESSION_PERMANENT', True)
+    )
@@ -0,0 +1,142 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files(the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and / or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions :
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+#------------------------------------------------------------------------------
+import asyncio
+import threading
+
+from client_disconnect import current_scope
+from metrics import upstream_wait
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.scope = current_scope()
+
+
+class SingleFlight:
+    """
+    Collapses concurrent identical calls into one. The first caller for a
+    key runs fn(); callers arriving with the same key before it returns
+    wait for it and share its result, or its exception. Keys must include
+    the caller's credential scope so results are never shared across users.
+    Waiting callers hold the leader's cancel scope, so the shared call is
+    not cancelled while one of them still needs it; a waiter whose own
+    client goes away stops waiting.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            scope = current_scope()
+            if call.scope is not None:
+                call.scope.hold()
+            try:
+                with upstream_wait():
+                    if scope is None:
+                        call.done.wait()
+                    else:
+                        scope.wait(call.done)
+            finally:
+                if call.scope is not None:
+                    call.scope.release()
+            if call.error is not None:
+                raise call.error
+            return call.value
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value
+
+    def stats(self):
+        with self._lock:
+            return {"inFlight": len(self._calls), "upstreamCalls": self.calls, "coalesced": self.coalesced}
+
+
+class AsyncSingleFlight:
+    """
+    asyncio counterpart of SingleFlight for one event loop. The shared call
+    runs as its own task, so a caller that goes away does not cancel it for
+    the others still waiting. With cancel_abandoned=True it is cancelled
+    once every caller has gone.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._waiters = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key, coroutine_function, cancel_abandoned=False):
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(coroutine_function())
+            self._calls[key] = task
+            task.add_done_callback(lambda finished: self._finished(key, finished))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            with upstream_wait():
+                return await asyncio.shield(task)
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                if cancel_abandoned and not task.done():
+                    task.cancel()
+
+    def _finished(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved in case every waiter has gone
+            task.exception()
+
+    def stats(self):
+        return {"inFlight": len(self._calls), "upstreamCalls": self.calls, "coalesced": self.coalesced}
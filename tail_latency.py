@@ -0,0 +1,508 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files(the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and / or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions :
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+#------------------------------------------------------------------------------
+import os
+import time
+import heapq
+import asyncio
+import itertools
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from client_disconnect import CancelScope, current_scope, in_scope
+
+from translation_memory import LATENCY_WINDOW, percentile
+from rate_governor import rate_keys
+
+# Send a second copy of an interactive translate call that is slower than
+# HEDGE_PERCENTILE of recent calls, and use whichever answers first
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "false").lower() == "true"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "0.1"))
+# Most hedges sent, as a fraction of calls
+HEDGE_MAX_RATIO = float(os.getenv("HEDGE_MAX_RATIO", "0.1"))
+HEDGE_THREADS = int(os.getenv("HEDGE_THREADS", "32"))
+
+# A breaker opens when at least BREAKER_MIN_REQUESTS calls in the last
+# BREAKER_WINDOW seconds failed at BREAKER_ERROR_RATE or more
+BREAKER_ERROR_RATE = float(os.getenv("BREAKER_ERROR_RATE", "0.5"))
+BREAKER_MIN_REQUESTS = int(os.getenv("BREAKER_MIN_REQUESTS", "20"))
+BREAKER_WINDOW = float(os.getenv("BREAKER_WINDOW", "60"))
+# Seconds an open breaker waits before letting one trial call through
+BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", "30"))
+# Set to 'false' to fail fast instead of translating without the GPT deployment
+BREAKER_FALLBACK = os.getenv("BREAKER_FALLBACK", "true").lower() == "true"
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+# Target fields kept when a request falls back to plain translation
+PLAIN_TARGET_FIELDS = ("Language", "Script", "ProfanityAction", "ProfanityMarker")
+
+
+class CircuitOpen(Exception):
+    """The upstream is failing and the request cannot fall back."""
+
+    def __init__(self, key, retry_after):
+        super().__init__(f"Upstream {key} is failing, retry after {retry_after:.0f}s")
+        self.key = key
+        self.retry_after = retry_after
+
+
+def charged(keys):
+    """Breakers a call is charged to: its GPT deployments, or else the subscription."""
+    return tuple(key for key in keys if key != "subscription") or ("subscription",)
+
+
+def latency_summary(values):
+    values = sorted(values)
+    return {
+        "samples": len(values),
+        "p50": round(percentile(values, 0.50) * 1000, 1),
+        "p95": round(percentile(values, 0.95) * 1000, 1),
+        "p99": round(percentile(values, 0.99) * 1000, 1),
+    }
+
+
+class CircuitBreaker:
+    def __init__(self, clock):
+        self.clock = clock
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.outcomes = deque()
+        self.trial_running = False
+        self.opened = 0
+
+    def _prune(self, now, window):
+        while self.outcomes and now - self.outcomes[0][0] > window:
+            self.outcomes.popleft()
+
+
+class CircuitBreakers:
+    """
+    One breaker per rate_governor bucket key: the subscription, and each GPT
+    deployment. Outcomes are charged like 429s, to the deployments a call
+    used or else to the subscription (see charged()). An open deployment breaker rewrites
+    targets that allow fallback into plain translation targets; an open
+    subscription breaker, or a target with AllowFallback false, fails fast.
+    After the cooldown one trial call is let through: success closes the
+    breaker, failure opens it again.
+    """
+
+    def __init__(self, error_rate=BREAKER_ERROR_RATE, min_requests=BREAKER_MIN_REQUESTS,
+                 window=BREAKER_WINDOW, cooldown=BREAKER_COOLDOWN, fallback=BREAKER_FALLBACK,
+                 clock=time.monotonic):
+        self.error_rate = error_rate
+        self.min_requests = min_requests
+        self.window = window
+        self.cooldown = cooldown
+        self.fallback = fallback
+        self.clock = clock
+        self._breakers = {}
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.fallbacks = 0
+
+    def _breaker(self, key):
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers[key] = CircuitBreaker(self.clock)
+        return breaker
+
+    def _available(self, key, now):
+        """Whether a call may be charged to key; an open breaker turns half-open after the cooldown."""
+        breaker = self._breakers.get(key)
+        if breaker is None or breaker.state == CLOSED:
+            return True
+        if breaker.state == OPEN and now - breaker.opened_at >= self.cooldown:
+            breaker.state = HALF_OPEN
+        return breaker.state == HALF_OPEN and not breaker.trial_running
+
+    def _reject(self, key, now):
+        self.rejected += 1
+        breaker = self._breakers[key]
+        raise CircuitOpen(key, max(1.0, self.cooldown - (now - breaker.opened_at)))
+
+    def admit(self, body, keys):
+        """
+        Return (body, keys, fallback): the body to send, with targets of open
+        deployments turned into plain targets, its rate keys, and whether
+        that happened. Raises CircuitOpen when the call must not be sent.
+        """
+        with self._lock:
+            now = self.clock()
+            blocked = sorted(key for key in charged(keys) if key != "subscription" and not self._available(key, now))
+            if blocked:
+                if not self.fallback:
+                    self._reject(blocked[0], now)
+                body = self._plain(body, set(blocked), now)
+                keys = rate_keys(body)
+                self.fallbacks += 1
+            for key in charged(keys):
+                if not self._available(key, now):
+                    self._reject(key, now)
+            for key in charged(keys):
+                breaker = self._breakers.get(key)
+                if breaker is not None and breaker.state == HALF_OPEN:
+                    breaker.trial_running = True
+            return body, keys, bool(blocked)
+
+    def _plain(self, body, blocked, now):
+        result = []
+        for element in body:
+            targets = element.get("Targets") if isinstance(element, dict) else None
+            if not targets:
+                result.append(element)
+                continue
+            new_targets = []
+            for target in targets:
+                key = f"deployment:{target.get('DeploymentName')}" if isinstance(target, dict) else None
+                if key in blocked:
+                    if target.get("AllowFallback") is False:
+                        self._reject(key, now)
+                    target = {name: target[name] for name in PLAIN_TARGET_FIELDS if name in target}
+                new_targets.append(target)
+            result.append(dict(element, Targets=new_targets))
+        return result
+
+    def release(self, keys):
+        """Forget a call admitted by admit() that was never sent."""
+        with self._lock:
+            for key in charged(keys):
+                breaker = self._breakers.get(key)
+                if breaker is not None and breaker.state == HALF_OPEN:
+                    breaker.trial_running = False
+
+    def record(self, keys, ok):
+        """Record the outcome of a call sent with the given rate keys."""
+        with self._lock:
+            now = self.clock()
+            for key in charged(keys):
+                breaker = self._breaker(key)
+                if breaker.state == HALF_OPEN and breaker.trial_running:
+                    breaker.trial_running = False
+                    breaker.outcomes.clear()
+                    if ok:
+                        breaker.state = CLOSED
+                    else:
+                        breaker.state, breaker.opened_at = OPEN, now
+                        breaker.opened += 1
+                    continue
+                breaker.outcomes.append((now, ok))
+                breaker._prune(now, self.window)
+                failures = sum(1 for _, success in breaker.outcomes if not success)
+                if (breaker.state == CLOSED and len(breaker.outcomes) >= self.min_requests
+                        and failures >= self.error_rate * len(breaker.outcomes)):
+                    breaker.state, breaker.opened_at = OPEN, now
+                    breaker.opened += 1
+
+    def stats(self):
+        with self._lock:
+            now = self.clock()
+            breakers = {}
+            for key, breaker in self._breakers.items():
+                breaker._prune(now, self.window)
+                breakers[key] = {
+                    "state": breaker.state,
+                    "calls": len(breaker.outcomes),
+                    "failures": sum(1 for _, success in breaker.outcomes if not success),
+                    "timesOpened": breaker.opened,
+                }
+            return {"breakers": breakers, "rejected": self.rejected, "fallbacks": self.fallbacks}
+
+
+class _Timer:
+    """One daemon thread calling each scheduled function once its delay has passed."""
+
+    def __init__(self):
+        self._heap = []
+        self._order = itertools.count()
+        self._wake = threading.Condition()
+        self._thread = None
+
+    def schedule(self, delay, fn):
+        with self._wake:
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._order), fn))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="hedge-timer", daemon=True)
+                self._thread.start()
+            self._wake.notify()
+
+    def _run(self):
+        while True:
+            with self._wake:
+                while not self._heap:
+                    self._wake.wait()
+                due, _, fn = self._heap[0]
+                remaining = due - time.monotonic()
+                if remaining > 0:
+                    self._wake.wait(remaining)
+                    continue
+                heapq.heappop(self._heap)
+            fn()
+
+
+class _HedgedCall:
+    """The race between a primary call on the caller's thread and its hedge."""
+
+    PRIMARY, HEDGE = "primary", "hedge"
+
+    def __init__(self, scope, hedge_scope, status_of, close):
+        self.scope = scope
+        self.hedge_scope = hedge_scope
+        self.status_of = status_of
+        self.close = close
+        self.finished = False
+        self.winner = None
+        self._hedge = None
+        self._hedge_settled = False
+        self._hedge_result = None
+        self._hedge_done = threading.Event()
+        self._lock = threading.Lock()
+
+    def _usable(self, result):
+        return result is not None and self.status_of(result) < 500
+
+    def hedge_started(self, future):
+        with self._lock:
+            if self.finished:
+                return False
+            self._hedge = future
+            return True
+
+    def hedge_done(self, future):
+        result = None if future.exception() is not None else future.result()
+        discard = None
+        with self._lock:
+            self._hedge_settled = True
+            self._hedge_result = result
+            if self.winner is None and self._usable(result):
+                self.winner = self.HEDGE
+            elif self.winner is self.PRIMARY:
+                discard, self._hedge_result = self._hedge_result, None
+            won = self.winner is self.HEDGE
+        if won:
+            # The primary is still waiting on its response; shut its connection down
+            self.scope.abort()
+        elif discard is not None:
+            self.close(discard)
+        self._hedge_done.set()
+
+    def close_late(self, future):
+        if not future.cancelled() and future.exception() is None and future.result() is not None:
+            self.close(future.result())
+
+    def primary_done(self, result, error):
+        """Settle the race once the primary returned; returns (winner, hedge result)."""
+        with self._lock:
+            self.finished = True
+            if self.winner is None and error is None and self._usable(result):
+                self.winner = self.PRIMARY
+            waiting = self._hedge is not None and not self._hedge_settled
+        if waiting and self.winner is self.PRIMARY:
+            # The hedge lost while still waiting on its response
+            self.hedge_scope.abort()
+        elif waiting and self.winner is None:
+            # The primary failed; the hedge may still answer
+            self._hedge_done.wait()
+        with self._lock:
+            if self.winner is None:
+                self.winner = self.PRIMARY
+            if self.winner is self.HEDGE:
+                hedge_result = self._hedge_result
+            else:
+                discard, self._hedge_result = self._hedge_result, None
+        if self.winner is self.HEDGE:
+            if result is not None:
+                self.close(result)
+            return self.HEDGE, hedge_result
+        if discard is not None:
+            self.close(discard)
+        return self.PRIMARY, None
+
+
+class Hedger:
+    """
+    Sends a duplicate of a call that has not answered within the
+    HEDGE_PERCENTILE latency of recent calls, and returns whichever copy
+    answers first with a non-5xx status. Hedges are capped at max_ratio of
+    calls. Latencies of single attempts (what callers would see without
+    hedging) and of hedged calls as the caller saw them are kept apart.
+    """
+
+    def __init__(self, enabled=HEDGE_ENABLED, quantile=HEDGE_PERCENTILE / 100, min_samples=HEDGE_MIN_SAMPLES,
+                 min_delay=HEDGE_MIN_DELAY, max_ratio=HEDGE_MAX_RATIO, threads=HEDGE_THREADS):
+        self.enabled = enabled
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.max_ratio = max_ratio
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="hedge") if enabled else None
+        self._timer = _Timer()
+        self._attempts = deque(maxlen=LATENCY_WINDOW)
+        self._effective = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def delay(self):
+        """Seconds to wait before hedging, or None while there are too few samples."""
+        with self._lock:
+            if len(self._attempts) < self.min_samples:
+                return None
+            return max(self.min_delay, percentile(sorted(self._attempts), self.quantile))
+
+    def _claim_hedge(self):
+        with self._lock:
+            if self.hedges + 1 > self.max_ratio * self.calls:
+                return False
+            self.hedges += 1
+            return True
+
+    def _timed(self, send):
+        start = time.perf_counter()
+        result = send()
+        with self._lock:
+            self._attempts.append(time.perf_counter() - start)
+        return result
+
+    def _finish(self, start, hedge_won=False):
+        with self._lock:
+            self._effective.append(time.perf_counter() - start)
+            if hedge_won:
+                self.hedge_wins += 1
+
+    def run(self, send, send_hedge, status_of=lambda response: response.status_code,
+            close=lambda response: response.close()):
+        """
+        Run send() on the calling thread, hedging with send_hedge() on the
+        hedge executor when it is slow. send_hedge may return None when there
+        is no capacity for a second copy. Both run in cancel scopes of their
+        own under the caller's, so the losing copy has its upstream
+        connection shut down while it is still waiting, and is closed if it
+        answers anyway.
+        """
+        start = time.perf_counter()
+        with self._lock:
+            self.calls += 1
+        delay = self.delay() if self.enabled else None
+        if delay is None:
+            result = self._timed(send)
+            self._finish(start)
+            return result
+
+        parent = current_scope()
+        call = _HedgedCall(CancelScope(parent=parent), CancelScope(parent=parent), status_of, close)
+        send_hedge = in_scope(send_hedge, call.hedge_scope)
+        self._timer.schedule(delay, lambda: self._launch_hedge(call, send_hedge))
+        try:
+            result, error = self._timed(in_scope(send, call.scope)), None
+        except Exception as e:
+            result, error = None, e
+        winner, hedge_result = call.primary_done(result, error)
+        if winner is call.HEDGE:
+            self._finish(start, hedge_won=True)
+            return hedge_result
+        self._finish(start)
+        if error is not None:
+            raise error
+        return result
+
+    def _launch_hedge(self, call, send_hedge):
+        if call.finished or not self._claim_hedge():
+            return
+        future = self._executor.submit(self._timed, send_hedge)
+        if call.hedge_started(future):
+            future.add_done_callback(call.hedge_done)
+        else:
+            future.cancel()
+            future.add_done_callback(call.close_late)
+
+    async def run_async(self, send, send_hedge, status_of=lambda result: result[0]):
+        """asyncio counterpart of run(); send and send_hedge are coroutine functions."""
+        start = time.perf_counter()
+        with self._lock:
+            self.calls += 1
+        delay = self.delay() if self.enabled else None
+
+        async def timed(coroutine_function):
+            attempt_start = time.perf_counter()
+            result = await coroutine_function()
+            with self._lock:
+                self._attempts.append(time.perf_counter() - attempt_start)
+            return result
+
+        if delay is None:
+            result = await timed(send)
+            self._finish(start)
+            return result
+
+        primary = asyncio.ensure_future(timed(send))
+        done, _ = await asyncio.wait([primary], timeout=delay)
+        if done or not self._claim_hedge():
+            result = await primary
+            self._finish(start)
+            return result
+
+        hedge = asyncio.ensure_future(timed(send_hedge))
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None or task.result() is None:
+                        if not pending and task is primary:
+                            result = primary.result()
+                            self._finish(start)
+                            return result
+                        continue
+                    result = task.result()
+                    if pending and status_of(result) >= 500:
+                        continue
+                    self._finish(start, hedge_won=task is hedge)
+                    return result
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self):
+        with self._lock:
+            attempts, effective = list(self._attempts), list(self._effective)
+            calls, hedges, wins = self.calls, self.hedges, self.hedge_wins
+        delay = self.delay() if self.enabled else None
+        return {
+            "enabled": self.enabled,
+            "calls": calls,
+            "hedges": hedges,
+            "hedgeWins": wins,
+            "hedgeDelayMs": round(delay * 1000, 1) if delay is not None else None,
+            "latencyMs": {
+                "withoutHedging": latency_summary(attempts),
+                "withHedging": latency_summary(effective),
+            },
+        }
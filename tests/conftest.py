@@ -0,0 +1,35 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+
+@pytest.fixture(scope="session")
+def app_module(tmp_path_factory):
+    """The Flask app, talking to the local Adaptive CT stub, with its own translation memory file."""
+    from stub_server import start_stub_server
+
+    server, base_url = start_stub_server(job_duration=0.2)
+    os.environ["API_URL"] = base_url
+    os.environ["TRANSLATOR_URL"] = f"{base_url}/translate"
+    os.environ["TRANSLATION_MEMORY_PATH"] = str(tmp_path_factory.mktemp("memory") / "tm.sqlite3")
+    os.environ["METRICS_ENABLED"] = "false"
+    import app
+    yield app
+    server.shutdown()
+
+
+def login(app_module, token):
+    client = app_module.app.test_client()
+    with client.session_transaction() as flask_session:
+        flask_session["access_token"] = token
+    return client
+
+
+@pytest.fixture
+def client(app_module):
+    return login(app_module, "alice-token")
@@ -0,0 +1,60 @@
+import asyncio
+import os
+
+import requests
+from aiohttp.test_utils import TestClient, TestServer
+
+from conftest import login
+from metadata_cache import credential_scope
+
+
+def session_cookie(app_module, token):
+    client = login(app_module, token)
+    client.get("/api/translate/resilience")
+    name = app_module.app.config["SESSION_COOKIE_NAME"]
+    return f"{name}={client.get_cookie(name).value}"
+
+
+def test_import_job_status_is_served_from_the_shared_poller(app_module):
+    import async_app
+
+    response = requests.post(f"{os.environ['API_URL']}/api/texttranslator/v1.0/documents/import?workspaceId=ws-1",
+                             files={"file": ("pairs.tsv", b"a\tb\n")})
+    job_id = response.json()["jobId"]
+    cookie = session_cookie(app_module, "alice-token")
+
+    async def status():
+        async with TestClient(TestServer(async_app.create_app())) as client:
+            response = await client.get(f"/api/documents/import/jobs/{job_id}", headers={"Cookie": cookie})
+            return response.status, response.headers.get("X-Cache"), await response.json()
+
+    code, cache, payload = asyncio.run(status())
+    assert code == 200 and cache is None and payload["jobId"] == job_id
+
+    watch = app_module.import_job_poller.watch(credential_scope("alice-token"), job_id,
+                                               app_module.api_headers.for_token("alice-token"))
+    assert watch.wait_for_change(float("inf"), timeout=5)["done"]
+    polls = app_module.import_job_poller.upstream_polls
+    code, cache, payload = asyncio.run(status())
+    assert code == 200 and cache == "HIT" and payload["status"] == "Succeeded"
+    assert app_module.import_job_poller.upstream_polls == polls
+
+
+def test_uploads_are_streamed_through_to_flask_routes(app_module):
+    import async_app
+
+    async def chunks():
+        for line in (b"one\tun\n", b"bad line\n", b"two\tdeux\n"):
+            yield line
+
+    async def validate():
+        async with TestClient(TestServer(async_app.create_app())) as client:
+            chunked = await client.post("/api/documents/import/validate?filename=pairs.tsv", data=chunks())
+            sized = await client.post("/api/documents/import/validate?filename=pairs.tsv",
+                                      data=b"one\tun\nbad line\ntwo\tdeux\n")
+            return [(response.status, await response.json()) for response in (chunked, sized)]
+
+    for status, report in asyncio.run(validate()):
+        assert status == 200
+        assert report["valid"] is False
+        assert report["files"][0]["name"] == "pairs.tsv" and report["files"][0]["lines"] == 3
@@ -0,0 +1,13 @@
+def test_responses_without_paginated_documents_are_not_errors(app_module):
+    assert app_module.extract_documents({"error": "x"}) == [{"error": "x"}]
+    assert app_module.extract_documents({"paginatedDocuments": None, "x": 1}) == [{"paginatedDocuments": None, "x": 1}]
+    assert app_module.extract_documents({"paginatedDocuments": ["odd"]}) == [{"paginatedDocuments": ["odd"]}]
+    assert app_module.get_document_page_count({"paginatedDocuments": "odd"}) == 1
+
+
+def test_malformed_documents_give_a_502(app_module, client, monkeypatch):
+    documents = [{"documentInfo": {"id": "d1", "languages": [{"code": "en"}, {"code": "fr"}]}}]
+    monkeypatch.setattr(app_module, "fetch_all_documents", lambda workspace_id, headers: (documents, None))
+    response = client.get("/api/documents?workspaceId=ws-malformed&refresh=true")
+    assert response.status_code == 502
+    assert response.get_json() == {"error": "Unexpected documents response from backend"}
@@ -0,0 +1,74 @@
+import io
+import json
+import tempfile
+
+from import_stream import MultipartReader, UploadCleaner, iter_pipeline_file
+
+
+def multipart(parts, boundary="pipelineboundary"):
+    body = b""
+    for name, filename, value in parts:
+        disposition = f'form-data; name="{name}"' + (f'; filename="{filename}"' if filename else "")
+        body += f"--{boundary}\r\nContent-Disposition: {disposition}\r\n\r\n".encode() + value + b"\r\n"
+    return body + f"--{boundary}--\r\n".encode(), f"multipart/form-data; boundary={boundary}"
+
+
+def test_pipeline_upload_reads_each_file_as_it_is_forwarded():
+    body, content_type = multipart([
+        ("Manifest", None, b"[]"),
+        ("FILES", "a.tsv", b"one\tun\nbad\n"),
+        ("FILES", "skipped.tsv", b"x\ty\n"),
+        ("FILES", "b.tsv", b"two\tdeux\n"),
+    ])
+    upload = MultipartReader(io.BytesIO(body), "pipelineboundary", chunk_size=5)
+    assert upload.read_fields() == {"Manifest": "[]"}
+    forwarded = {}
+    for part, data in upload.files():
+        if part.filename == "skipped.tsv":
+            continue
+        cleaner = UploadCleaner(strict=False)
+        forwarded[part.filename] = b"".join(iter_pipeline_file(cleaner, [{"DocumentName": "d"}], part, data))
+        assert cleaner.summary()["files"] == 1
+    assert sorted(forwarded) == ["a.tsv", "b.tsv"]
+    assert b'name="DocumentDetails"' in forwarded["a.tsv"]
+    assert b"one\tun\n" in forwarded["a.tsv"] and b"bad" not in forwarded["a.tsv"]
+    assert b"two\tdeux\n" in forwarded["b.tsv"] and forwarded["b.tsv"].endswith(b"--\r\n")
+
+
+def test_pipeline_streams_files_without_temp_files(app_module, client, monkeypatch):
+    def no_temp_dir(*args, **kwargs):
+        raise AssertionError("pipelines must not write uploads to disk")
+    monkeypatch.setattr(tempfile, "mkdtemp", no_temp_dir)
+
+    manifest = [
+        {"file": "good.tsv", "sourceLanguage": "en", "targetLanguage": "fr", "indexName": "shared"},
+        {"file": "bad.tsv", "sourceLanguage": "en", "targetLanguage": "fr", "indexName": "shared"},
+        {"file": "missing.tsv", "sourceLanguage": "en", "targetLanguage": "de"},
+    ]
+    body, content_type = multipart([
+        ("Manifest", None, json.dumps(manifest).encode()),
+        ("FILES", "good.tsv", b"hello\tbonjour\n"),
+        ("FILES", "bad.tsv", b"hello\tbonjour\nno tab here\n"),
+    ])
+    response = client.post("/api/pipelines?workspaceId=ws-pipeline", data=body, content_type=content_type)
+    assert response.status_code == 202
+    assert json.loads(response.headers["X-Import-Validation"])["errors"] == 1
+
+    snapshot = response.get_json()
+    while not snapshot["done"]:
+        snapshot = client.get(f"{response.headers['Location']}?since={snapshot['version']}&timeout=5").get_json()
+    states = {entry["file"]: entry for entry in snapshot["entries"]}
+    assert states["good.tsv"]["state"] == "imported"
+    assert states["bad.tsv"]["state"] == "failed" and states["bad.tsv"]["validation"]["valid"] is False
+    assert states["missing.tsv"]["error"] == "File 'missing.tsv' was not uploaded"
+    indexes = {index["name"]: index for index in snapshot["indexes"]}
+    assert indexes["shared"]["state"] == "created"
+    assert indexes["shared"]["documentIds"] == states["good.tsv"]["documentIds"]
+    assert indexes["missing"]["state"] == "failed"
+
+
+def test_manifest_must_precede_the_files(client):
+    body, content_type = multipart([("FILES", "a.tsv", b"one\tun\n"), ("Manifest", None, b"[]")])
+    response = client.post("/api/pipelines?workspaceId=ws-pipeline", data=body, content_type=content_type)
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Manifest must precede the uploaded FILES"}
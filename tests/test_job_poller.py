@@ -0,0 +1,37 @@
+import time
+
+from job_poller import ImportJobPoller
+
+
+class Response:
+    status_code = 200
+    text = '{"status": "Running"}'
+
+    def json(self):
+        return {"status": "Running"}
+
+
+def test_an_unexpected_poller_error_ends_the_job_for_its_subscribers():
+    calls = []
+
+    def fetch(job_id, headers):
+        calls.append(job_id)
+        if len(calls) == 1:
+            raise KeyError("token")
+        return Response()
+
+    poller = ImportJobPoller(fetch, min_interval=0.01, idle_timeout=1)
+    watch = poller.watch("scope", "job-1", {})
+    watch.subscribe()
+    snapshot = watch.wait_for_change(0, timeout=5)
+    watch.unsubscribe()
+    assert snapshot["done"] and snapshot["statusCode"] == 502
+    assert "Polling the import job failed" in snapshot["status"]["error"]
+
+    # The failed poller is forgotten, so the next subscriber polls again
+    deadline = time.monotonic() + 5
+    while poller.peek("scope", "job-1") is not None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    retry = poller.watch("scope", "job-1", {})
+    assert retry is not watch
+    assert retry.wait_for_change(0, timeout=5)["status"] == {"status": "Running"}
@@ -0,0 +1,35 @@
+import io
+
+from werkzeug.test import EnvironBuilder
+from werkzeug.wsgi import FileWrapper
+
+from metrics import Metrics
+
+
+def serve(body, headers, wrap_file):
+    metrics = Metrics(enabled=True)
+
+    def wsgi_app(environ, start_response):
+        environ["metrics.route"] = "files"
+        start_response("200 OK", headers)
+        return environ["wsgi.file_wrapper"](io.BytesIO(body)) if wrap_file else [body]
+
+    environ = EnvironBuilder(path="/file").get_environ()
+    environ["wsgi.file_wrapper"] = FileWrapper
+    result = metrics.wsgi_middleware(wsgi_app)(environ, lambda status, headers, exc_info=None: None)
+    return metrics, result
+
+
+def test_file_wrapper_responses_are_passed_through():
+    metrics, result = serve(b"x" * 300, [("Content-Length", "300")], wrap_file=True)
+    assert isinstance(result, FileWrapper)
+    assert metrics.response_bytes._series[("files",)][1] == 300
+    assert 'adaptct_http_requests_total{route="files",method="GET",status="200"} 1' in metrics.requests.render()
+    assert b"".join(result) == b"x" * 300
+
+
+def test_other_responses_are_counted_as_they_are_sent():
+    metrics, result = serve(b"y" * 120, [], wrap_file=False)
+    assert ("files",) not in metrics.response_bytes._series
+    assert b"".join(result) == b"y" * 120
+    assert metrics.response_bytes._series[("files",)][1] == 120
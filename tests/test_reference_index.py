@@ -0,0 +1,64 @@
+from conftest import login
+from reference_index import ReferenceIndex, inject_reference_pairs
+from translation_memory import TranslationMemory
+
+PARAMS = {"from": "en", "to": "fr"}
+BODY = [{"Text": "The red car is fast", "Language": "en", "Targets": [{"Language": "fr"}]}]
+
+
+def index_with_pairs(tmp_path):
+    memory = TranslationMemory(str(tmp_path / "tm.sqlite3"))
+    memory.bulk_load("alice", "ws-1", "en", "fr", [("The red car", "La voiture rouge"), ("A blue sky", "Un ciel bleu")])
+    index = ReferenceIndex(memory)
+    index.catch_up()
+    return index
+
+
+def test_search_is_limited_to_the_owners_dataset(tmp_path):
+    index = index_with_pairs(tmp_path)
+    assert index.search("en", "fr", "red car", "alice", "ws-1")[0]["Target"] == "La voiture rouge"
+    assert index.search("en", "fr", "red car", "bob", "ws-1") == []
+    assert index.search("en", "fr", "red car", "alice", None) == []
+
+
+def test_nothing_is_injected_unless_asked_for(tmp_path):
+    index = index_with_pairs(tmp_path)
+    body, injected = inject_reference_pairs(index, BODY, PARAMS, "alice", None)
+    assert injected == 0 and body is BODY
+    body, injected = inject_reference_pairs(index, BODY, PARAMS, "bob", "ws-1")
+    assert injected == 0
+    body, injected = inject_reference_pairs(index, BODY, PARAMS, "alice", "ws-1")
+    assert injected == 1 and body[0]["Targets"][0]["ReferenceTextPairs"][0]["Source"] == "The red car"
+
+
+def test_plain_translate_calls_are_sent_unchanged(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "reference_index", ReferenceIndex(app_module.translation_memory))
+    client = login(app_module, "alice-token")
+    client.post("/api/translate/memory?sourceLanguage=en&targetLanguage=fr&datasetId=ws-ref",
+                data="The red car\tLa voiture rouge\n".encode())
+    app_module.reference_index.catch_up()
+    response = client.post("/api/translate?from=en&to=fr&nocache=true", json=BODY)
+    assert response.status_code == 200
+    assert "X-Reference-Pairs" not in response.headers
+    response = login(app_module, "bob-token").post("/api/translate?from=en&to=fr&nocache=true&references=ws-ref",
+                                                   json=BODY)
+    assert response.headers.get("X-Reference-Pairs") == "0"
+    response = client.post("/api/translate?from=en&to=fr&nocache=true&references=ws-ref", json=BODY)
+    assert response.headers.get("X-Reference-Pairs") == "1"
+
+
+def test_reference_grounded_results_are_not_shared_through_the_cache(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "reference_index", ReferenceIndex(app_module.translation_memory))
+    app_module.translation_cache.clear()
+    alice = login(app_module, "alice-token")
+    alice.post("/api/translate/memory?sourceLanguage=en&targetLanguage=fr&datasetId=ws-ref",
+               data="The red car\tLa voiture rouge\n".encode())
+    app_module.reference_index.catch_up()
+    body = [{"Text": "The red car is slow", "Language": "en", "Targets": [{"Language": "fr"}]}]
+
+    grounded = alice.post("/api/translate?from=en&to=fr&references=ws-ref", json=body)
+    assert grounded.headers["X-Reference-Pairs"] == "1" and "X-Cache" not in grounded.headers
+    plain = login(app_module, "bob-token").post("/api/translate?from=en&to=fr", json=body)
+    assert "X-Cache" not in plain.headers and "X-Reference-Pairs" not in plain.headers
+    again = alice.post("/api/translate?from=en&to=fr&references=ws-ref", json=body)
+    assert "X-Cache" not in again.headers and again.headers["X-Reference-Pairs"] == "1"
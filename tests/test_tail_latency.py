@@ -0,0 +1,87 @@
+import threading
+import time
+
+from client_disconnect import ClientDisconnected, current_scope
+from tail_latency import Hedger
+
+
+class FakeResponse:
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+        self.closed = threading.Event()
+
+    def close(self):
+        self.closed.set()
+
+
+def until_aborted():
+    while not current_scope().aborted:
+        time.sleep(0.005)
+    raise ClientDisconnected()
+
+
+def warmed_up_hedger():
+    hedger = Hedger(enabled=True, min_samples=1, min_delay=0.02, max_ratio=1.0, threads=2)
+    hedger.run(FakeResponse, FakeResponse)
+    return hedger
+
+
+def test_primary_runs_on_the_calling_thread():
+    hedger = warmed_up_hedger()
+    threads = []
+
+    def send():
+        threads.append(threading.current_thread())
+        return FakeResponse()
+
+    hedger.run(send, FakeResponse)
+    assert threads == [threading.current_thread()]
+    assert hedger.stats()["hedges"] == 0
+
+
+def test_hedge_win_aborts_the_waiting_primary():
+    hedger = warmed_up_hedger()
+    hedge = FakeResponse()
+    assert hedger.run(until_aborted, lambda: hedge) is hedge
+    assert hedger.stats()["hedgeWins"] == 1
+
+
+def test_losing_hedge_is_aborted():
+    hedger = warmed_up_hedger()
+    aborted = threading.Event()
+
+    def slow_hedge():
+        try:
+            until_aborted()
+        finally:
+            aborted.set()
+
+    primary = FakeResponse()
+    assert hedger.run(lambda: (time.sleep(0.1), primary)[1], slow_hedge) is primary
+    assert aborted.wait(1)
+
+
+def test_hedge_answering_after_the_primary_is_closed():
+    hedger = warmed_up_hedger()
+    primary, late = FakeResponse(), FakeResponse()
+    released = threading.Event()
+
+    def late_hedge():
+        released.wait(1)
+        return late
+
+    assert hedger.run(lambda: (time.sleep(0.1), primary)[1], late_hedge) is primary
+    released.set()
+    assert late.closed.wait(1)
+
+
+def test_failed_primary_waits_for_the_hedge():
+    hedger = warmed_up_hedger()
+    primary, hedge = FakeResponse(503), FakeResponse()
+
+    def slow_hedge():
+        time.sleep(0.1)
+        return hedge
+
+    assert hedger.run(lambda: (time.sleep(0.05), primary)[1], slow_hedge) is hedge
+    assert primary.closed.is_set()
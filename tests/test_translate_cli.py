@@ -0,0 +1,42 @@
+import csv
+import io
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT
+
+
+def test_importing_the_cli_does_not_start_the_app():
+    code = "import sys, translate_cli; sys.exit('app' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", code], cwd=ROOT).returncode == 0
+
+
+def test_tsv_rows_are_escaped():
+    from translate_cli import format_row
+
+    row = {"source": 'say "hi"\tthere', "translation": "line\nbreak"}
+    line = format_row(row, "tsv")
+    assert list(csv.reader(io.StringIO(line), delimiter="\t")) == [['say "hi"\tthere', "line\nbreak"]]
+    assert format_row({"source": "plain", "translation": "text"}, "tsv") == "plain\ttext\n"
+
+
+def test_token_is_read_from_stdin(app_module, tmp_path, monkeypatch):
+    import translate_cli
+
+    source = tmp_path / "in.txt"
+    source.write_text('a "quoted" line\n', encoding="utf-8")
+    output = tmp_path / "out.tsv"
+    monkeypatch.setattr(translate_cli, "ACCESS_TOKEN", "")
+    with pytest.raises(SystemExit):
+        translate_cli.main([str(source), "-o", str(output), "--to", "fr"])
+
+    monkeypatch.setattr(sys, "stdin", io.StringIO("cli-token\n"))
+    assert translate_cli.main([str(source), "-o", str(output), "--to", "fr", "--format", "tsv",
+                               "--token-stdin", "--nocache", "--progress", "60"]) == 0
+    with open(output, encoding="utf-8", newline="") as file:
+        rows = list(csv.reader(file, delimiter="\t"))
+    assert rows[0][0] == 'a "quoted" line' and len(rows) == 1
+    assert not os.path.exists(str(output) + ".checkpoint")
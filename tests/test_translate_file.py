@@ -0,0 +1,22 @@
+import json
+
+from test_import_pipeline import multipart
+
+
+def test_multipart_files_are_translated_from_the_stream(client):
+    body, content_type = multipart([
+        ("Note", None, b"ignored"),
+        ("FILE", "pairs.tsv", b"hello\tbonjour\n\nworld\tmonde\n"),
+    ])
+    response = client.post("/api/translate/file?to=fr&nocache=true", data=body, content_type=content_type)
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [row.get("source") for row in rows[:3]] == ["hello", "", "world"]
+    assert rows[0]["translation"] and rows[-1] == {"summary": {"lines": 3, "translated": 3, "errors": 0}}
+
+
+def test_multipart_without_a_file_is_rejected(client):
+    body, content_type = multipart([("Note", None, b"no file")])
+    response = client.post("/api/translate/file", data=body, content_type=content_type)
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Missing FILE upload"}
@@ -0,0 +1,50 @@
+from translation_cache import TranslationCache, translation_cache_key
+
+PARAMS = {"from": "en", "to": "fr"}
+
+
+def test_fallback_keys_count_as_one_lookup():
+    cache = TranslationCache()
+    cache.set("b", [1], 1)
+    assert cache.get("a", "b") == [1]
+    assert cache.get("a", "c") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_translate_then_batch_share_one_value_shape(app_module, client):
+    app_module.translation_cache.clear()
+    segment = {"Text": "cache shape", "Targets": [{"Language": "fr"}]}
+    first = client.post("/api/translate?from=en&to=fr&nomemory=true", json=[segment])
+    batch = client.post("/api/translate/batch?from=en&to=fr", json=[segment])
+    assert batch.status_code == 200
+    assert batch.get_json()["results"][0] == first.get_json()[0]
+    again = client.post("/api/translate?from=en&to=fr&nomemory=true", json=[segment])
+    assert again.headers["X-Cache"] == "HIT" and again.get_json() == first.get_json()
+
+
+def test_batch_entries_answer_translate(app_module, client):
+    app_module.translation_cache.clear()
+    segment = {"Text": "batch first", "Targets": [{"Language": "fr"}]}
+    batch = client.post("/api/translate/batch?from=en&to=fr", json=[segment])
+    single = client.post("/api/translate?from=en&to=fr&nomemory=true", json=[segment])
+    assert single.headers["X-Cache"] == "HIT"
+    assert single.get_json() == [batch.get_json()["results"][0]]
+
+
+def test_key_normalizes_unicode_but_keeps_surrounding_whitespace():
+    def key(text):
+        return translation_cache_key(PARAMS, [{"Text": text, "Targets": [{"Language": "fr"}]}])
+
+    assert key("café") == key("café")
+    assert key("hello") != key(" hello ")
+    assert key("hello") != key("hello\n")
+
+
+def test_clearing_the_cache_needs_a_session_and_the_flag(app_module, client, monkeypatch):
+    app_module.translation_cache.set("kept", [1], 1)
+    assert app_module.app.test_client().delete("/api/translate/cache").status_code == 401
+    assert client.delete("/api/translate/cache").status_code == 403
+    assert app_module.translation_cache.get("kept") == [1]
+    monkeypatch.setattr(app_module, "TRANSLATION_CACHE_CLEAR_ENABLED", True)
+    assert client.delete("/api/translate/cache").status_code == 200
+    assert app_module.translation_cache.get("kept") is None
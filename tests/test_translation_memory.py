@@ -0,0 +1,114 @@
+from conftest import login
+from translation_memory import TranslationMemory, split_by_memory
+
+PARAMS = {"from": "en", "to": "fr", "texttype": "Plain"}
+# Target options translation.js sends with every request
+UI_DEFAULTS = {"DeploymentName": "gpt-4o-mini", "Grade": "basic", "Tone": "informal", "Gender": "neutral"}
+
+
+def element(text, **target):
+    return {"Text": text, "Language": "en", "TextType": "Plain", "Targets": [dict({"Language": "fr"}, **target)]}
+
+
+def memory_with_pair(tmp_path, owner="alice", dataset="ws-1"):
+    memory = TranslationMemory(str(tmp_path / "tm.sqlite3"))
+    memory.bulk_load(owner, dataset, "en", "fr", [("Hello world", "Bonjour le monde")])
+    return memory
+
+
+def test_lookup_needs_owner_and_dataset(tmp_path):
+    memory = memory_with_pair(tmp_path)
+    assert memory.lookup("en", "fr", ["Hello world"], "alice", "ws-1") == {"Hello world": "Bonjour le monde"}
+    assert memory.lookup("en", "fr", ["Hello world"], "alice", None) == {}
+    assert memory.lookup("en", "fr", ["Hello world"], "bob", "ws-1") == {}
+
+
+def test_aliases_are_per_owner(tmp_path):
+    memory = memory_with_pair(tmp_path)
+    memory.alias("alice", "index-7", "ws-1")
+    assert memory.lookup("en", "fr", ["Hello world"], "alice", "index-7")
+    assert memory.lookup("en", "fr", ["Hello world"], "bob", "index-7") == {}
+    memory.alias("bob", "index-7", "ws-1")
+    assert memory.lookup("en", "fr", ["Hello world"], "bob", "index-7") == {}
+
+
+def test_plain_requests_never_hit_the_memory(tmp_path):
+    memory = memory_with_pair(tmp_path)
+    body = [element("Hello world")]
+    upstream_body, _, hits = split_by_memory(memory, body, PARAMS, "alice")
+    assert hits == 0 and upstream_body == body
+
+
+def test_other_tenants_do_not_hit_the_memory(tmp_path):
+    memory = memory_with_pair(tmp_path)
+    _, _, hits = split_by_memory(memory, [element("Hello world", AdaptiveDatasetId="ws-1")], PARAMS, "bob")
+    assert hits == 0
+
+
+def test_owner_with_explicit_dataset_hits(tmp_path):
+    memory = memory_with_pair(tmp_path)
+    upstream_body, _, hits = split_by_memory(memory, [element("Hello world", AdaptiveDatasetId="ws-1")],
+                                             PARAMS, "alice")
+    assert hits == 1 and upstream_body == []
+
+
+def test_shaping_fields_skip_the_memory(tmp_path):
+    memory = memory_with_pair(tmp_path)
+    for field, value in (("Tone", "formal"), ("Grade", "advanced"), ("Gender", "female"),
+                         ("DeploymentName", "gpt-4o"),
+                         ("ReferenceTextPairs", [{"Source": "a", "Target": "b"}])):
+        body = [element("Hello world", AdaptiveDatasetId="ws-1", **{field: value})]
+        _, _, hits = split_by_memory(memory, body, PARAMS, "alice")
+        assert hits == 0, field
+
+
+def test_ui_default_options_still_hit_the_memory(tmp_path):
+    memory = memory_with_pair(tmp_path)
+    body = [element("Hello world", AdaptiveDatasetId="ws-1", **UI_DEFAULTS)]
+    assert split_by_memory(memory, body, PARAMS, "alice")[2] == 1
+    body = [element("Hello world", AdaptiveDatasetId="ws-1", Tone="Standard", DeploymentName="")]
+    assert split_by_memory(memory, body, PARAMS, "alice")[2] == 1
+
+
+def test_clear_is_scoped_to_the_owner(tmp_path):
+    memory = memory_with_pair(tmp_path)
+    memory.bulk_load("bob", "ws-1", "en", "fr", [("Hello world", "Salut")])
+    memory.clear("bob", "ws-1")
+    assert memory.lookup("en", "fr", ["Hello world"], "alice", "ws-1")
+    assert memory.lookup("en", "fr", ["Hello world"], "bob", "ws-1") == {}
+
+
+def test_memory_routes_need_a_session_and_a_dataset(app_module):
+    anonymous = app_module.app.test_client()
+    assert anonymous.post("/api/translate/memory?sourceLanguage=en&targetLanguage=fr&datasetId=ws-1",
+                          data=b"a\tb\n").status_code == 401
+    assert anonymous.delete("/api/translate/memory?datasetId=ws-1").status_code == 401
+    client = login(app_module, "alice-token")
+    assert client.delete("/api/translate/memory").status_code == 400
+    assert client.post("/api/translate/memory?sourceLanguage=en&targetLanguage=fr",
+                       data=b"a\tb\n").status_code == 400
+
+
+def test_loaded_pairs_only_answer_their_owner(app_module):
+    alice, bob = login(app_module, "alice-token"), login(app_module, "bob-token")
+    assert alice.post("/api/translate/memory?sourceLanguage=en&targetLanguage=fr&datasetId=ws-tm",
+                      data="Good morning\tBonjour\n".encode()).status_code == 200
+    body = [element("Good morning", AdaptiveDatasetId="ws-tm")]
+    hit = alice.post("/api/translate?from=en&to=fr&nocache=true", json=body)
+    assert hit.headers.get("X-Translation-Memory-Hits") == "1"
+    assert hit.get_json()[0]["translations"][0]["text"] == "Bonjour"
+    miss = bob.post("/api/translate?from=en&to=fr&nocache=true", json=body)
+    assert miss.headers.get("X-Translation-Memory-Hits") == "0"
+    plain = alice.post("/api/translate?from=en&to=fr&nocache=true", json=[element("Good morning")])
+    assert plain.headers.get("X-Translation-Memory-Hits") == "0"
+
+
+def test_incremental_translation_uses_the_memory(app_module, client):
+    assert client.post("/api/translate/memory?sourceLanguage=en&targetLanguage=fr&datasetId=ws-inc",
+                       data="The red car.\tLa voiture rouge.\n".encode()).status_code == 200
+    body = [element("The red car. A new sentence.", AdaptiveDatasetId="ws-inc", **UI_DEFAULTS)]
+    hits = app_module.translation_memory.stats()["hits"]
+    response = client.post("/api/translate/incremental?from=en&to=fr&nocache=true&docId=tm", json=body)
+    assert response.status_code == 200
+    assert response.get_json()[0]["translations"][0]["text"].startswith("La voiture rouge.")
+    assert app_module.translation_memory.stats()["hits"] == hits + 1
@@ -0,0 +1,43 @@
+from tsv_preprocess import TsvCleaner
+
+
+def clean(chunks, **options):
+    cleaner = TsvCleaner(**options)
+    out = b"".join(cleaner.feed(chunk) for chunk in chunks) + cleaner.finish()
+    return out, cleaner.report()
+
+
+def test_output_does_not_depend_on_chunk_boundaries():
+    data = "﻿hello\tbonjour\r\n\nbad line\nhello \t bonjour\ncafé\tcafé\n\xff\tx\nlast\tdernier".encode("utf-8")
+    data = data.replace("\xff".encode("utf-8"), b"\xff")
+    whole = clean([data])
+    for size in (1, 2, 3, 7):
+        assert clean([data[i:i + size] for i in range(0, len(data), size)]) == whole
+    out, report = whole
+    assert out == "hello\tbonjour\ncafé\tcafé\nlast\tdernier\n".encode("utf-8")
+    assert report["lines"] == 7 and report["blankLines"] == 1 and report["duplicates"] == 1
+    assert report["errorLines"] == [{"line": 3, "error": "columns"}, {"line": 6, "error": "encoding"}]
+
+
+def test_overlong_partial_line_keeps_the_completed_lines_before_it():
+    out, report = clean([b"good\tline\n" + b"x" * 8 + b"\t" + b"y" * 8, b"zz\tkeep\n", b"next\tok\n"],
+                        max_line_bytes=10)
+    assert out == b"good\tline\nnext\tok\n"
+    assert report["lines"] == 3
+    assert report["errorLines"] == [{"line": 2, "error": "lineTooLong"}]
+
+
+def test_overlong_line_is_reported_once_however_it_is_chunked():
+    long_line = b"a" * 30 + b"\t" + b"b" * 30 + b"\n"
+    data = b"one\tun\n" + long_line + b"two\tdeux"
+    for size in (4, 16, len(data)):
+        out, report = clean([data[i:i + size] for i in range(0, len(data), size)], max_line_bytes=20)
+        assert out == b"one\tun\ntwo\tdeux\n"
+        assert report["lines"] == 3
+        assert report["errorLines"] == [{"line": 2, "error": "lineTooLong"}]
+
+
+def test_overlong_final_line_is_counted():
+    out, report = clean([b"one\tun\n", b"c" * 40], max_line_bytes=20)
+    assert out == b"one\tun\n"
+    assert report["lines"] == 2 and report["errorCounts"]["lineTooLong"] == 1
@@ -0,0 +1,261 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files(the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and / or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions :
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+#------------------------------------------------------------------------------
+
+"""
+Headless bulk translation of TXT/TSV files, without the web UI or a session.
+
+    python translate_cli.py corpus.tsv -o corpus.fr.ndjson --to fr --workers 8
+
+Lines are read in windows and translated by a pool of workers through the
+same headers, request body, rate governor and circuit breakers as
+/api/translate/file (as bulk traffic). Results are written in input order
+as they arrive, NDJSON rows like /api/translate/file or `source<TAB>translation`
+with --format tsv (fields are quoted like csv when they hold tabs, quotes or
+line breaks). The bearer token comes from ACCESS_TOKEN, or from stdin with
+--token-stdin, so it never shows up in the process list. After every completed window the output is flushed and
+a checkpoint (<output>.checkpoint) records how far the run got; running the
+same command again resumes from there. Progress in segments/sec goes to stderr.
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from itertools import islice
+
+from rate_governor import BULK
+from translation_upstream import (
+    api_headers, get_translate_params, get_translate_target, post_translation, translation_elements,
+    translation_cache,
+)
+from translation_batch import translate_batch
+from translation_cache import translation_cache_key
+from translation_stream import iter_source_lines, translate_rows, STREAM_WINDOW_LINES
+
+# Bearer token sent to the Translator unless --token-stdin is given
+ACCESS_TOKEN = os.getenv("ACCESS_TOKEN", "")
+# Seconds between progress lines on stderr
+CLI_PROGRESS_INTERVAL = float(os.getenv("CLI_PROGRESS_INTERVAL", "5"))
+
+
+class CheckpointMismatch(Exception):
+    """The checkpoint next to the output does not belong to this run."""
+
+
+class Checkpoint:
+    """
+    Progress of one run, stored next to the output file. `lines` input lines
+    are done and their results fill the first `output_bytes` bytes of the output.
+    """
+
+    def __init__(self, path, fingerprint):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.lines = 0
+        self.output_bytes = 0
+        self.translated = 0
+        self.errors = 0
+
+    def load(self):
+        """Read a previous checkpoint; return False when there is none. Raises CheckpointMismatch."""
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                state = json.load(file)
+        except FileNotFoundError:
+            return False
+        except ValueError:
+            raise CheckpointMismatch(f"{self.path} is unreadable; pass --restart to start over")
+        if not isinstance(state, dict) or state.get("fingerprint") != self.fingerprint:
+            raise CheckpointMismatch(f"{self.path} belongs to a run with another input or other options; "
+                             f"pass --restart to start over")
+        self.lines, self.output_bytes = state["lines"], state["outputBytes"]
+        self.translated, self.errors = state.get("translated", 0), state.get("errors", 0)
+        return True
+
+    def save(self):
+        temporary = self.path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump({"fingerprint": self.fingerprint, "lines": self.lines, "outputBytes": self.output_bytes,
+                       "translated": self.translated, "errors": self.errors}, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.path)
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def run_fingerprint(input_path, options):
+    """Digest of the input file and the options that change results, so a resume cannot mix runs."""
+    stat = os.stat(input_path)
+    identity = [os.path.abspath(input_path), stat.st_size, stat.st_mtime_ns, options]
+    return hashlib.sha256(json.dumps(identity, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def format_row(row, output_format):
+    if output_format == "tsv":
+        # Quote fields holding tabs, quotes or line breaks so every row stays one record
+        line = io.StringIO()
+        csv.writer(line, delimiter="\t", lineterminator="\n").writerow([row["source"], row.get("translation", "")])
+        return line.getvalue()
+    return json.dumps(row, ensure_ascii=False) + "\n"
+
+
+class Progress:
+    """Prints lines done and segments/sec to stderr every `interval` seconds."""
+
+    def __init__(self, interval, done=0, stream=sys.stderr):
+        self.interval = interval
+        self.stream = stream
+        self.started = self.last = time.monotonic()
+        self.start_lines = done
+
+    def update(self, checkpoint, final=False):
+        now = time.monotonic()
+        if not final and now - self.last < self.interval:
+            return
+        self.last = now
+        rate = (checkpoint.lines - self.start_lines) / max(now - self.started, 1e-9)
+        print(f"{checkpoint.lines:,} lines  {rate:,.1f} segments/s  "
+              f"translated {checkpoint.translated:,}  errors {checkpoint.errors:,}", file=self.stream, flush=True)
+
+
+def translate_file(input_path, output_path, args, token):
+    """Translate input_path into output_path, resuming from its checkpoint. Returns the final Checkpoint."""
+    query = {"from": args.source, "to": args.to, "texttype": args.texttype, "deploymentName": args.deployment,
+             "grade": args.grade, "tone": args.tone, "gender": args.gender, "datasetId": args.dataset}
+    query = {name: value for name, value in query.items() if value}
+    if args.nocache:
+        query["nocache"] = "true"
+    params = get_translate_params(query)
+    target = get_translate_target(query)
+    headers = api_headers.for_token(token)
+    is_tsv = args.input_format == "tsv" or (args.input_format is None and input_path.lower().endswith(".tsv"))
+
+    checkpoint = Checkpoint(output_path + ".checkpoint",
+                            run_fingerprint(input_path, [query, is_tsv, args.format, args.window]))
+    if args.restart:
+        checkpoint.remove()
+    resumed = checkpoint.load()
+    if resumed and (not os.path.exists(output_path) or os.path.getsize(output_path) < checkpoint.output_bytes):
+        raise CheckpointMismatch(f"{output_path} is shorter than its checkpoint; pass --restart to start over")
+    if resumed:
+        print(f"Resuming after line {checkpoint.lines:,}", file=sys.stderr)
+
+    def send(elements):
+        return post_translation(params, headers, elements, priority=BULK)
+
+    def translate_window(texts):
+        results, _ = translate_batch(
+            translation_elements(texts, params, target), send,
+            key_for=lambda item: translation_cache_key(params, [item], scope=token),
+            cache=None if args.nocache else translation_cache,
+            concurrency=1
+        )
+        return results
+
+    progress = Progress(args.progress, checkpoint.lines)
+    with open(input_path, "rb") as source, open(output_path, "r+b" if resumed else "wb") as output:
+        # Drop anything written after the last checkpoint, then carry on from there
+        output.truncate(checkpoint.output_bytes)
+        output.seek(checkpoint.output_bytes)
+        lines = islice(iter_source_lines(source, tsv=is_tsv), checkpoint.lines, None)
+        pending = 0
+        for row in translate_rows(lines, translate_window, window_size=args.window, concurrency=args.workers):
+            output.write(format_row(row, args.format).encode("utf-8"))
+            checkpoint.lines += 1
+            checkpoint.errors += "error" in row
+            checkpoint.translated += "error" not in row
+            pending += 1
+            if pending == args.window:
+                output.flush()
+                os.fsync(output.fileno())
+                checkpoint.output_bytes = output.tell()
+                checkpoint.save()
+                pending = 0
+            progress.update(checkpoint)
+        output.flush()
+        os.fsync(output.fileno())
+        checkpoint.output_bytes = output.tell()
+    progress.update(checkpoint, final=True)
+    if args.keep_checkpoint:
+        checkpoint.save()
+    else:
+        checkpoint.remove()
+    return checkpoint
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="TXT file (one segment per line) or TSV file (first column is translated)")
+    parser.add_argument("-o", "--output", help="result file (default: <input>.<to>.<format>)")
+    parser.add_argument("--format", choices=("ndjson", "tsv"), default="ndjson", help="output format")
+    parser.add_argument("--input-format", choices=("txt", "tsv"), help="input format (default: from the extension)")
+    parser.add_argument("--from", dest="source", default="en")
+    parser.add_argument("--to", default="de")
+    parser.add_argument("--texttype", default="Plain")
+    parser.add_argument("--deployment", help="GPT deployment (default: GPT_DEPLOYMENT_NAME)")
+    parser.add_argument("--dataset", help="AdaptiveDatasetId of the index to use")
+    parser.add_argument("--grade")
+    parser.add_argument("--tone")
+    parser.add_argument("--gender")
+    parser.add_argument("--nocache", action="store_true", help="skip the translation cache")
+    parser.add_argument("--workers", type=int, default=8, help="windows translated in parallel")
+    parser.add_argument("--window", type=int, default=STREAM_WINDOW_LINES,
+                        help="lines per window; a checkpoint is written after each one")
+    parser.add_argument("--token-stdin", action="store_true",
+                        help="read the bearer token from the first line of stdin instead of ACCESS_TOKEN")
+    parser.add_argument("--progress", type=float, default=CLI_PROGRESS_INTERVAL, help="seconds between progress lines")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint and start over")
+    parser.add_argument("--keep-checkpoint", action="store_true", help="keep the checkpoint after a finished run")
+    args = parser.parse_args(argv)
+
+    token = sys.stdin.readline().strip() if args.token_stdin else ACCESS_TOKEN
+    if not token:
+        parser.error("no bearer token; set ACCESS_TOKEN or pass it on stdin with --token-stdin")
+
+    output_path = args.output or f"{args.input}.{args.to}.{args.format}"
+    try:
+        checkpoint = translate_file(args.input, output_path, args, token)
+    except CheckpointMismatch as e:
+        parser.error(str(e))
+    except KeyboardInterrupt:
+        print("Interrupted; run the same command again to resume", file=sys.stderr)
+        return 130
+    print(f"Wrote {checkpoint.lines:,} lines to {output_path} ({checkpoint.errors:,} errors)", file=sys.stderr)
+    return 1 if checkpoint.errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
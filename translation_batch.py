@@ -0,0 +1,162 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files(the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and / or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions :
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+#------------------------------------------------------------------------------
+
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from rate_governor import RateLimited
+from tail_latency import CircuitOpen
+
+# Per-request packing limits. The Translator accepts at most 1,000 elements and
+# 50,000 characters per call; smaller chunks keep LLM-backed calls short and
+# give the concurrent senders more to work with.
+BATCH_MAX_ELEMENTS = int(os.getenv("BATCH_MAX_ELEMENTS", "100"))
+BATCH_MAX_CHARS = int(os.getenv("BATCH_MAX_CHARS", "10000"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+BATCH_MAX_SEGMENTS = int(os.getenv("BATCH_MAX_SEGMENTS", "50000"))
+
+
+def element_chars(item):
+    """Characters an element counts against the limit (text length times targets)."""
+    text = item.get("Text") or ""
+    return len(text) * max(1, len(item.get("Targets") or []))
+
+
+def pack_chunks(entries, max_elements=BATCH_MAX_ELEMENTS, max_chars=BATCH_MAX_CHARS):
+    """
+    Greedily pack (key, item) entries into chunks that respect both limits.
+    Order is preserved within and across chunks.
+    """
+    chunk, chars = [], 0
+    for key, item in entries:
+        size = element_chars(item)
+        if chunk and (len(chunk) >= max_elements or chars + size > max_chars):
+            yield chunk
+            chunk, chars = [], 0
+        chunk.append((key, item))
+        chars += size
+    if chunk:
+        yield chunk
+
+
+def segment_error(status, message):
+    return {"error": {"code": status, "message": message}}
+
+
+def send_elements(send, elements):
+    """
+    Post one upstream request with `send(elements)` and return (status, payload).
+    Transport failures, throttling and open breakers become an error payload.
+    """
+    try:
+        response = send(elements)
+    except requests.exceptions.RequestException as e:
+        return 502, segment_error(502, f"Upstream request failed: {e}")
+    except RateLimited as e:
+        return 429, segment_error(429, str(e))
+    except CircuitOpen as e:
+        return 503, segment_error(503, str(e))
+    try:
+        payload = response.json() if response.text else None
+    except ValueError:
+        return response.status_code, segment_error(response.status_code, "Invalid JSON response from backend")
+    return response.status_code, payload
+
+
+def translate_batch(items, send, key_for, cache=None, max_elements=BATCH_MAX_ELEMENTS,
+                    max_chars=BATCH_MAX_CHARS, concurrency=BATCH_CONCURRENCY):
+    """
+    Translate a list of Translator request elements and return one result per
+    element, in input order.
+
+    `send(elements)` posts a chunk upstream and returns the requests Response.
+    `key_for(item)` returns the cache digest of a single element; elements with
+    the same digest are sent upstream once. When `cache` is given, hits are
+    served from it and fresh results are stored back. Failed chunks or
+    rejected elements yield {"error": {...}} entries at their positions.
+
+    Returns (results, summary).
+    """
+    results = [None] * len(items)
+    positions = {}
+    pending = []
+    cached = 0
+
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not isinstance(item.get("Text"), str):
+            results[index] = segment_error(400, "Each segment must be an object with a Text field")
+            continue
+        if element_chars(item) > max_chars:
+            results[index] = segment_error(400, f"Segment exceeds {max_chars} characters")
+            continue
+        key = key_for(item)
+        if key in positions:
+            positions[key].append(index)
+            continue
+        hit = cache.get(key) if cache is not None else None
+        if hit is not None:
+            results[index] = hit[0]
+            positions[key] = [index]
+            cached += 1
+            continue
+        positions[key] = [index]
+        pending.append((key, item))
+
+    def send_chunk(chunk):
+        return (chunk,) + send_elements(send, [item for _, item in chunk])
+
+    chunks = list(pack_chunks(pending, max_elements, max_chars))
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(chunks) or 1))) as pool:
+        for chunk, status, payload in pool.map(send_chunk, chunks):
+            ok = status == 200 and isinstance(payload, list) and len(payload) == len(chunk)
+            for offset, (key, _) in enumerate(chunk):
+                if ok:
+                    result = payload[offset]
+                    if cache is not None:
+                        cache.set(key, [result], len(json.dumps(result)))
+                elif isinstance(payload, dict) and "error" in payload:
+                    result = payload
+                else:
+                    result = segment_error(status, "Unexpected response from backend")
+                results[positions[key][0]] = result
+
+    # Fan results out to duplicate segments
+    for indices in positions.values():
+        for index in indices[1:]:
+            results[index] = results[indices[0]]
+
+    summary = {
+        "segments": len(items),
+        "unique": len(positions),
+        "cached": cached,
+        "upstreamRequests": len(chunks),
+        "errors": sum(1 for result in results if isinstance(result, dict) and "error" in result),
+    }
+    return results, summary
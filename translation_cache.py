@@ -0,0 +1,204 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files(the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and / or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions :
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+#------------------------------------------------------------------------------
+
+import os
+import json
+import time
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+
+TRANSLATION_CACHE_MAX_BYTES = int(os.getenv("TRANSLATION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+TRANSLATION_CACHE_TTL = float(os.getenv("TRANSLATION_CACHE_TTL", "3600"))
+# The cache is shared by every user; set to 'true' to let signed-in users clear it
+TRANSLATION_CACHE_CLEAR_ENABLED = os.getenv("TRANSLATION_CACHE_CLEAR_ENABLED", "false").lower() == "true"
+
+# Target options that change what the Translator returns for the same text
+TARGET_OPTIONS = (
+    "Language", "Script", "DeploymentName", "Grade", "Tone", "Gender",
+    "AllowFallback", "ProfanityAction", "ProfanityMarker",
+)
+
+# Rough per-entry bookkeeping overhead (key, tuple, OrderedDict node)
+ENTRY_OVERHEAD = 200
+
+
+def _digest(value):
+    encoded = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _normalize_text(text):
+    # Surrounding whitespace is kept: the Translator preserves it in the result
+    return unicodedata.normalize("NFC", text or "")
+
+
+def relay_cache_key(key):
+    """
+    Key under which /api/translate stores relayed upstream bytes.
+
+    Every other entry holds the decoded result list, so the bytes are kept in
+    their own namespace where the per-segment readers never see them.
+    """
+    return "relay:" + key
+
+
+def translation_cache_key(params, body, scope=None):
+    """
+    Build a digest for a translate request from the fields that affect its result.
+
+    `params` are the upstream query parameters and `body` the Translator
+    request array. Reference pairs are reduced to their own hash. `scope` is
+    mixed in for requests that use an AdaptiveDatasetId, so results grounded
+    on a private dataset are only shared between callers with the same
+    credential.
+    """
+    items = []
+    uses_dataset = False
+    for item in body if isinstance(body, list) else [body]:
+        if not isinstance(item, dict):
+            items.append(item)
+            continue
+        targets = []
+        for target in item.get("Targets") or []:
+            if not isinstance(target, dict):
+                continue
+            normalized = {name: target.get(name) for name in TARGET_OPTIONS}
+            if target.get("AdaptiveDatasetId"):
+                uses_dataset = True
+                normalized["AdaptiveDatasetId"] = target["AdaptiveDatasetId"]
+            if target.get("ReferenceTextPairs"):
+                normalized["ReferenceTextPairs"] = _digest(target["ReferenceTextPairs"])
+            targets.append(normalized)
+        items.append({
+            "Text": _normalize_text(item.get("Text")),
+            "Language": item.get("Language"),
+            "TextType": item.get("TextType"),
+            "Targets": targets,
+        })
+
+    key = {
+        "from": params.get("from"),
+        "to": params.get("to"),
+        "texttype": params.get("texttype"),
+        "items": items,
+    }
+    if uses_dataset and scope:
+        key["scope"] = hashlib.sha256(scope.encode("utf-8")).hexdigest()
+    return _digest(key)
+
+
+class TranslationCache:
+    """
+    In-process LRU cache of translate results with a TTL and a byte budget.
+
+    Entries are evicted least-recently-used first whenever the total size
+    exceeds max_bytes, and are dropped on read once older than ttl seconds.
+    """
+
+    def __init__(self, max_bytes=TRANSLATION_CACHE_MAX_BYTES, ttl=TRANSLATION_CACHE_TTL, clock=time.monotonic):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, *fallbacks):
+        """
+        Return the cached value for key, or None on a miss.
+
+        Any `fallbacks` are tried in order after key; the lookup counts as a
+        single hit or miss.
+        """
+        with self._lock:
+            now = self.clock()
+            for candidate in (key,) + fallbacks:
+                entry = self._entries.get(candidate)
+                if entry is None:
+                    continue
+                value, size, expires_at = entry
+                if expires_at <= now:
+                    self._remove(candidate)
+                    self.expirations += 1
+                    continue
+                self._entries.move_to_end(candidate)
+                self.hits += 1
+                return value
+            self.misses += 1
+            return None
+
+    def set(self, key, value, size):
+        """Store value, accounting `size` bytes against the budget."""
+        size += ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, self.clock() + self.ttl)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def record_bypass(self):
+        with self._lock:
+            self.bypasses += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Counters used to size the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "maxBytes": self.max_bytes,
+                "ttlSeconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypasses": self.bypasses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hitRatio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
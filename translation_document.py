@@ -0,0 +1,204 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files(the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and / or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions :
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+#------------------------------------------------------------------------------
+
+import os
+import re
+from html import unescape
+
+# Largest document accepted by /api/translate/document, in characters
+DOCUMENT_MAX_CHARS = int(os.getenv("DOCUMENT_MAX_CHARS", "1000000"))
+# Characters packed into one upstream request; smaller chunks finish sooner and run side by side
+DOCUMENT_CHUNK_CHARS = int(os.getenv("DOCUMENT_CHUNK_CHARS", "2000"))
+# Upstream requests of one document sent in parallel
+DOCUMENT_CONCURRENCY = int(os.getenv("DOCUMENT_CONCURRENCY", "8"))
+
+TAG_RE = re.compile(r"<!--.*?-->|<![^>]*>|<[^>]+>", re.S)
+TAG_NAME_RE = re.compile(r"<\s*(/?)\s*([a-zA-Z][\w:-]*)")
+# A sentence ends at terminal punctuation (plus closing quotes or brackets) followed by
+# whitespace, at CJK terminal punctuation, or at a line break
+SENTENCE_END_RE = re.compile(r"[.!?…]+[)\"'”’»\]]*\s+|[。！？]+[」』）”]*\s*|\n\s*")
+WORD_BEFORE_RE = re.compile(r"(\w+)$")
+ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "prof", "st", "jr", "sr", "vs", "etc", "eg", "ie", "e.g", "i.e",
+                 "no", "fig", "inc", "ltd", "co", "corp", "approx", "dept", "est", "vol"}
+
+# Elements that start a new block of text; everything between them is translated in context
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "body", "br", "caption", "dd", "div", "dl", "dt",
+    "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "head", "header",
+    "hr", "html", "li", "main", "nav", "ol", "option", "p", "pre", "section", "table", "tbody", "td",
+    "tfoot", "th", "thead", "title", "tr", "ul",
+}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+# Elements whose content is never translated
+RAW_TEXT_TAGS = {"script", "style", "code", "textarea"}
+
+
+def parse_tag(token):
+    """(name, closing, self_closing) of a tag token; name is '' for comments and declarations."""
+    match = TAG_NAME_RE.match(token)
+    if not match:
+        return "", False, True
+    name = match.group(2).lower()
+    return name, bool(match.group(1)), token.rstrip().endswith("/>") or name in VOID_TAGS
+
+
+def sentence_cuts(text):
+    """Offsets in text just after each sentence end and the whitespace that follows it."""
+    for match in SENTENCE_END_RE.finditer(text):
+        if match.group().rstrip() == ".":
+            # Not after an abbreviation or an initial
+            word = WORD_BEFORE_RE.search(text, max(0, match.start() - 20), match.start())
+            if word and (word.group(1).lower() in ABBREVIATIONS or (len(word.group(1)) == 1 and word.group(1).isalpha())):
+                continue
+        if match.end() < len(text):
+            yield match.end()
+
+
+def has_text(piece, html):
+    if html:
+        piece = unescape(TAG_RE.sub("", piece))
+    return any(character.isalnum() for character in piece)
+
+
+def wrap(text, limit):
+    """Split plain text longer than limit at the last whitespace before the limit."""
+    while len(text) > limit:
+        cut = text.rfind(" ", 0, limit) + 1 or limit
+        yield text[:cut]
+        text = text[cut:]
+    yield text
+
+
+def segment_document(text, html=False, max_segment=DOCUMENT_CHUNK_CHARS):
+    """
+    Split a document into [(translate, piece)] whose pieces concatenate back to it.
+
+    Translated pieces are single sentences. In HTML, block elements (p, li,
+    td, br, ...) end a sentence too, tags are kept out of the pieces except
+    inline markup that lies inside a sentence, sentences are only cut outside
+    inline elements so every piece keeps balanced tags, and script, style,
+    code and textarea content is left alone. Surrounding whitespace and
+    pieces without words are kept as they are; plain sentences longer than
+    max_segment are wrapped at whitespace.
+    """
+    parts = []
+
+    def keep(piece):
+        if piece:
+            if parts and not parts[-1][0]:
+                parts[-1] = (False, parts[-1][1] + piece)
+            else:
+                parts.append((False, piece))
+
+    def emit(piece):
+        core = piece.strip()
+        if not has_text(core, html):
+            keep(piece)
+            return
+        start = piece.index(core[0])
+        keep(piece[:start])
+        for chunk in ([core] if html else wrap(core, max_segment)):
+            words = chunk.rstrip()
+            parts.append((True, words))
+            keep(chunk[len(words):])
+        keep(piece[start + len(core):])
+
+    def flush(block):
+        depth, current = 0, []
+        for is_tag, token in block:
+            if is_tag:
+                name, closing, self_closing = parse_tag(token)
+                if closing:
+                    depth = max(depth - 1, 0)
+                elif not self_closing and name:
+                    depth += 1
+                current.append(token)
+            elif depth:
+                current.append(token)
+            else:
+                start = 0
+                for cut in sentence_cuts(token):
+                    current.append(token[start:cut])
+                    emit("".join(current))
+                    current, start = [], cut
+                current.append(token[start:])
+        emit("".join(current))
+        block.clear()
+
+    if not html:
+        flush([(False, text)])
+        return parts
+
+    block, raw_text = [], None
+    position = 0
+    tokens = []
+    for match in TAG_RE.finditer(text):
+        if match.start() > position:
+            tokens.append((False, text[position:match.start()]))
+        tokens.append((True, match.group()))
+        position = match.end()
+    if position < len(text):
+        tokens.append((False, text[position:]))
+
+    for is_tag, token in tokens:
+        name, closing, _ = parse_tag(token) if is_tag else ("", False, False)
+        if raw_text is not None:
+            keep(token)
+            if is_tag and closing and name == raw_text:
+                raw_text = None
+        elif is_tag and (name in BLOCK_TAGS or name in RAW_TEXT_TAGS or not name):
+            flush(block)
+            keep(token)
+            if name in RAW_TEXT_TAGS and not closing:
+                raw_text = name
+        else:
+            block.append((is_tag, token))
+    flush(block)
+    return parts
+
+
+def assemble_document(parts, results):
+    """
+    Join the kept pieces and the translations of the translated pieces, in order.
+    A piece whose result is an error keeps its source text and is listed in errors.
+    Returns (text, errors).
+    """
+    results = iter(results)
+    output, errors = [], []
+    for number, (translate, piece) in enumerate(parts):
+        if not translate:
+            output.append(piece)
+            continue
+        result = next(results)
+        translations = result.get("translations") if isinstance(result, dict) else None
+        if translations:
+            output.append(translations[0].get("text", ""))
+        else:
+            output.append(piece)
+            errors.append({"part": number, "source": piece[:200],
+                           "error": result.get("error") if isinstance(result, dict) else None})
+    return "".join(output), errors
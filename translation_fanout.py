@@ -0,0 +1,129 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files(the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and / or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions :
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+#------------------------------------------------------------------------------
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from translation_batch import BATCH_MAX_ELEMENTS, BATCH_MAX_CHARS, pack_chunks, segment_error, send_elements
+
+# Largest number of targets accepted for one source
+FANOUT_MAX_TARGETS = int(os.getenv("FANOUT_MAX_TARGETS", "100"))
+# Upstream requests of one fan-out sent in parallel
+FANOUT_CONCURRENCY = int(os.getenv("FANOUT_CONCURRENCY", "8"))
+
+
+def group_targets(source, targets, max_chars=BATCH_MAX_CHARS):
+    """
+    Spread targets over as few copies of the source element as possible.
+    Results of an element are matched to its targets by language, so one copy
+    never names a language twice (several datasets or tones for the same pair
+    go to separate copies), and a copy holds no more targets than max_chars
+    allows. Returns [(target positions, element)].
+    """
+    per_element = max(1, max_chars // max(1, len(source.get("Text") or "")))
+    groups = []
+    for position, target in enumerate(targets):
+        language = str(target.get("Language", "")).lower()
+        for languages, positions in groups:
+            if language not in languages and len(positions) < per_element:
+                languages.add(language)
+                positions.append(position)
+                break
+        else:
+            groups.append(({language}, [position]))
+    return [(positions, dict(source, Targets=[targets[position] for position in positions]))
+            for _, positions in groups]
+
+
+def match_translations(targets, translations):
+    """Pair each target with its translation: by position when the languages agree, else by 'to'."""
+    by_language = {}
+    for translation in translations:
+        if isinstance(translation, dict):
+            by_language.setdefault(str(translation.get("to", "")).lower(), translation)
+    matched = []
+    for offset, target in enumerate(targets):
+        language = str(target.get("Language", "")).lower()
+        translation = translations[offset] if offset < len(translations) else None
+        if not isinstance(translation, dict) or str(translation.get("to", language)).lower() != language:
+            translation = by_language.get(language)
+        matched.append(translation)
+    return matched
+
+
+def translate_fanout(source, targets, send, concurrency=FANOUT_CONCURRENCY,
+                     max_elements=BATCH_MAX_ELEMENTS, max_chars=BATCH_MAX_CHARS):
+    """
+    Translate one source element into every target.
+
+    Targets are grouped into source copies (group_targets), the copies are
+    packed into as few upstream requests as the element and character limits
+    allow, and the requests are sent concurrently with `send(elements)`.
+    Returns (results, summary): one result per target in input order, with
+    the translation or an error, the upstream request that carried it and
+    that request's latency.
+    """
+    groups = group_targets(source, targets, max_chars)
+    calls = list(pack_chunks(groups, max_elements, max_chars))
+
+    def run(call):
+        start = time.perf_counter()
+        status, payload = send_elements(send, [element for _, element in call])
+        return status, payload, (time.perf_counter() - start) * 1000
+
+    results = [None] * len(targets)
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(calls)))) as pool:
+        for number, (call, (status, payload, latency)) in enumerate(zip(calls, pool.map(run, calls))):
+            ok = status == 200 and isinstance(payload, list) and len(payload) == len(call)
+            for offset, (positions, element) in enumerate(call):
+                if ok and isinstance(payload[offset], dict):
+                    translations = match_translations(element["Targets"], payload[offset].get("translations") or [])
+                else:
+                    translations = [None] * len(positions)
+                for position, translation in zip(positions, translations):
+                    target = targets[position]
+                    result = {"language": target.get("Language"), "request": number, "latencyMs": round(latency, 1)}
+                    if target.get("AdaptiveDatasetId"):
+                        result["datasetId"] = target["AdaptiveDatasetId"]
+                    if translation is not None:
+                        result["text"] = translation.get("text", "")
+                    elif isinstance(payload, dict) and "error" in payload:
+                        result.update(payload)
+                    elif ok and isinstance(payload[offset], dict) and "error" in payload[offset]:
+                        result.update(error=payload[offset]["error"])
+                    else:
+                        result.update(segment_error(status, "Unexpected response from backend"))
+                    results[position] = result
+
+    summary = {
+        "targets": len(targets),
+        "upstreamRequests": len(calls),
+        "errors": sum(1 for result in results if "error" in result),
+        "maxLatencyMs": max((result["latencyMs"] for result in results), default=0),
+    }
+    return results, summary
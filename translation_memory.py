@@ -0,0 +1,448 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files(the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and / or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions :
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+#------------------------------------------------------------------------------
+import os
+import sys
+import time
+import sqlite3
+import uuid
+import argparse
+import tempfile
+import threading
+from collections import deque
+
+from tsv_preprocess import TsvCleaner, normalize_text
+
+TRANSLATION_MEMORY_PATH = os.getenv(
+    "TRANSLATION_MEMORY_PATH", os.path.join(tempfile.gettempdir(), 'adapct_translation_memory.sqlite3'))
+# Set to 'false' to send every segment upstream
+TRANSLATION_MEMORY_ENABLED = os.getenv("TRANSLATION_MEMORY_ENABLED", "true").lower() == "true"
+# Pairs inserted per statement batch while loading
+TM_LOAD_BATCH = int(os.getenv("TM_LOAD_BATCH", "5000"))
+
+UPSERT_PAIR = ("INSERT INTO pairs (source_lang, target_lang, source, dataset, target) VALUES (?, ?, ?, ?, ?) "
+               "ON CONFLICT (source_lang, target_lang, source, dataset) DO UPDATE SET target = excluded.target")
+
+# Recent lookup latencies kept for percentiles
+LATENCY_WINDOW = 2048
+
+# Target fields that change the translation, so a stored pair cannot answer it
+SHAPING_FIELDS = ("Tone", "Grade", "Gender", "DeploymentName", "ReferenceTextPairs")
+# Values of those fields that ask for nothing beyond the defaults the UI and
+# /api/translate/file send, so they do not keep the memory from answering
+NEUTRAL_VALUES = {
+    "Tone": ("informal", "standard"),
+    "Grade": ("basic",),
+    "Gender": ("neutral",),
+    "DeploymentName": (os.getenv("GPT_DEPLOYMENT_NAME", "gpt-4o-mini").lower(),),
+}
+
+
+def scoped_dataset(owner, dataset):
+    """
+    Stored name of a caller's dataset. Pairs are only visible to the
+    credential scope (see metadata_cache.credential_scope) that loaded them.
+    """
+    return f"{owner}/{dataset}"
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class MemoryWriter:
+    """
+    Adds pairs to one owner's (dataset, language pair), inserted in batches of
+    TM_LOAD_BATCH on the writer's own connection. Nothing is visible to
+    lookups until commit(), and rollback() discards the pairs.
+
+    A direct writer holds one write transaction from start to commit, which
+    is fastest for offline bulk loads. A staged writer (used for imports,
+    which can take minutes) commits each batch to pending_pairs and only
+    holds the write lock while moving them into pairs on commit(), so
+    concurrent imports do not block each other.
+    """
+
+    def __init__(self, memory, owner, dataset, source_lang, target_lang, batch_size=TM_LOAD_BATCH, staged=False):
+        if not (owner and dataset):
+            raise ValueError("Pairs need an owner and a dataset")
+        self.memory = memory
+        self.key = (source_lang.lower(), target_lang.lower(), scoped_dataset(owner, dataset))
+        self.batch_size = batch_size
+        self.staged = staged
+        self.load_id = uuid.uuid4().hex
+        self.count = 0
+        self._pending = []
+        self._db = memory.connect()
+        if not staged:
+            self._db.execute("BEGIN")
+
+    def add(self, source, target):
+        """Add one pair; both sides must already be normalized (see normalize_text)."""
+        self._pending.append((self.key[0], self.key[1], source, self.key[2], target))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        if self.staged:
+            self._db.executemany(
+                "INSERT INTO pending_pairs (load_id, source_lang, target_lang, source, dataset, target) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(self.load_id,) + row for row in self._pending]
+            )
+        else:
+            self._db.executemany(UPSERT_PAIR, self._pending)
+        self.count += len(self._pending)
+        self._pending = []
+
+    def commit(self):
+        self._flush()
+        if self.staged:
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.execute(
+                "INSERT INTO pairs (source_lang, target_lang, source, dataset, target) "
+                "SELECT source_lang, target_lang, source, dataset, target FROM pending_pairs "
+                "WHERE load_id = ? ORDER BY rowid "
+                "ON CONFLICT (source_lang, target_lang, source, dataset) DO UPDATE SET target = excluded.target",
+                (self.load_id,)
+            )
+            self._db.execute("DELETE FROM pending_pairs WHERE load_id = ?", (self.load_id,))
+        self._db.execute("COMMIT")
+        self._db.close()
+        self.memory.record_load(self.count)
+        return self.count
+
+    def rollback(self):
+        self._pending = []
+        if self.staged:
+            self._db.execute("DELETE FROM pending_pairs WHERE load_id = ?", (self.load_id,))
+        else:
+            self._db.execute("ROLLBACK")
+        self._db.close()
+
+
+class TranslationMemory:
+    """
+    Exact-match translation memory in SQLite (WAL mode), keyed by language
+    pair, normalized source text and dataset. Datasets are named by the
+    loader (the workspace id for imports) and belong to the credential
+    scope that loaded them; alias() maps an index id or AdaptiveDatasetId
+    onto the dataset it was built from, for that owner only.
+    """
+
+    def __init__(self, path=TRANSLATION_MEMORY_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self.lookups = 0
+        self.hits = 0
+        self.misses = 0
+        self.loaded = 0
+        self.short_circuited = 0
+        # Called with no arguments after pairs are committed or cleared
+        self.on_commit = []
+        self.on_clear = []
+        with self._connection() as db:
+            # Ids only grow, so readers such as the reference index can catch up incrementally
+            db.execute("CREATE TABLE IF NOT EXISTS pairs ("
+                       "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                       "source_lang TEXT NOT NULL, target_lang TEXT NOT NULL, source TEXT NOT NULL, "
+                       "dataset TEXT NOT NULL, target TEXT NOT NULL, "
+                       "UNIQUE (source_lang, target_lang, source, dataset))")
+            db.execute("CREATE TABLE IF NOT EXISTS pending_pairs ("
+                       "load_id TEXT NOT NULL, source_lang TEXT NOT NULL, target_lang TEXT NOT NULL, "
+                       "source TEXT NOT NULL, dataset TEXT NOT NULL, target TEXT NOT NULL)")
+            db.execute("CREATE INDEX IF NOT EXISTS pending_pairs_load_id ON pending_pairs (load_id)")
+            db.execute("CREATE TABLE IF NOT EXISTS aliases (alias TEXT PRIMARY KEY, dataset TEXT NOT NULL)")
+
+    def connect(self):
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def _connection(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = self.connect()
+        return db
+
+    def writer(self, owner, dataset, source_lang, target_lang, staged=False):
+        return MemoryWriter(self, owner, dataset, source_lang, target_lang, staged=staged)
+
+    def bulk_load(self, owner, dataset, source_lang, target_lang, pairs):
+        """Load an iterable of normalized (source, target) pairs in one transaction; returns the count."""
+        writer = self.writer(owner, dataset, source_lang, target_lang)
+        try:
+            for source, target in pairs:
+                writer.add(source, target)
+        except BaseException:
+            writer.rollback()
+            raise
+        return writer.commit()
+
+    def load_tsv(self, stream, owner, dataset, source_lang, target_lang, chunk_size=64 * 1024, staged=False):
+        """Validate and load a TSV byte stream; returns the TsvCleaner report."""
+        writer = self.writer(owner, dataset, source_lang, target_lang, staged=staged)
+        cleaner = TsvCleaner(sink=writer.add)
+        try:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                cleaner.feed(chunk)
+            cleaner.finish()
+        except BaseException:
+            writer.rollback()
+            raise
+        writer.commit()
+        return cleaner.report()
+
+    def record_load(self, count):
+        with self._lock:
+            self.loaded += count
+        for callback in self.on_commit:
+            callback()
+
+    def alias(self, owner, alias, dataset):
+        if owner and alias and dataset:
+            self._connection().execute("INSERT OR REPLACE INTO aliases (alias, dataset) VALUES (?, ?)",
+                                       (scoped_dataset(owner, alias), scoped_dataset(owner, dataset)))
+
+    def datasets(self, owner, dataset):
+        """Stored names of an owner's dataset and of the dataset it aliases; empty without both."""
+        if not (owner and dataset):
+            return ()
+        name = scoped_dataset(owner, dataset)
+        row = self._connection().execute("SELECT dataset FROM aliases WHERE alias = ?", (name,)).fetchone()
+        return (row[0], name) if row and row[0] != name else (name,)
+
+    def lookup(self, source_lang, target_lang, sources, owner, dataset):
+        """
+        Return {normalized source: target} for the sources found in the
+        owner's dataset (or the dataset it aliases). Nothing is found
+        without an owner and an explicit dataset.
+        """
+        datasets = self.datasets(owner, dataset)
+        if not datasets:
+            return {}
+        start = time.perf_counter()
+        db = self._connection()
+        source_lang, target_lang = (source_lang or "").lower(), (target_lang or "").lower()
+        keys = list(dict.fromkeys(sources))
+        found = {}
+        for key in keys:
+            row = db.execute(
+                "SELECT target FROM pairs WHERE source_lang = ? AND target_lang = ? AND source = ? "
+                f"AND dataset IN ({','.join('?' * len(datasets))}) LIMIT 1",
+                (source_lang, target_lang, key) + datasets
+            ).fetchone()
+            if row is not None:
+                found[key] = row[0]
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.lookups += len(keys)
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+            self._latencies.append(elapsed)
+        return found
+
+    def record_short_circuit(self):
+        with self._lock:
+            self.short_circuited += 1
+
+    def clear(self, owner, dataset):
+        """Delete the pairs of one of an owner's datasets, and the aliases pointing to it."""
+        if not (owner and dataset):
+            raise ValueError("Clearing needs an owner and a dataset")
+        name = scoped_dataset(owner, dataset)
+        db = self._connection()
+        db.execute("DELETE FROM pairs WHERE dataset = ?", (name,))
+        db.execute("DELETE FROM aliases WHERE dataset = ?", (name,))
+        for callback in self.on_clear:
+            callback()
+
+    def stats(self):
+        pairs = self._connection().execute("SELECT COUNT(*) FROM pairs").fetchone()[0]
+        with self._lock:
+            latencies = sorted(self._latencies)
+            lookups = self.lookups
+            return {
+                "pairs": pairs,
+                "loaded": self.loaded,
+                "lookups": lookups,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRatio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "shortCircuited": self.short_circuited,
+                "lookupLatencyMs": {
+                    "p50": round(percentile(latencies, 0.50) * 1000, 3),
+                    "p95": round(percentile(latencies, 0.95) * 1000, 3),
+                    "p99": round(percentile(latencies, 0.99) * 1000, 3),
+                },
+            }
+
+
+class ImportMemoryLoader:
+    """
+    Collects the pairs of the TSV files in one import upload into the
+    uploader's dataset. Each FILES part gets its own writer keyed by its
+    FileDetails LanguageCode (or source_lang) and target_lang; files whose
+    language pair is unknown are skipped. commit() once the backend accepted
+    the import, else rollback().
+    """
+
+    def __init__(self, memory, document_details, owner, dataset, source_lang=None, target_lang=None):
+        self.memory = memory
+        self.owner = owner
+        self.dataset = dataset
+        self.source_lang = source_lang
+        self.target_lang = target_lang
+        self.file_details = {}
+        for document in document_details or []:
+            for details in document.get("FileDetails") or []:
+                if isinstance(details, dict) and details.get("Name"):
+                    self.file_details[details["Name"]] = details
+        self.writers = []
+
+    def sink_for(self, filename):
+        details = self.file_details.get(filename, {})
+        source_lang = details.get("LanguageCode") or self.source_lang
+        target_lang = details.get("TargetLanguageCode") or self.target_lang
+        if not (source_lang and target_lang and self.owner and self.dataset):
+            return None
+        writer = self.memory.writer(self.owner, self.dataset, source_lang, target_lang, staged=True)
+        self.writers.append(writer)
+        return writer.add
+
+    def commit(self):
+        return sum(writer.commit() for writer in self.writers)
+
+    def rollback(self):
+        for writer in self.writers:
+            writer.rollback()
+
+
+def is_neutral(field, value):
+    """Whether a shaping field's value leaves the translation as the defaults would."""
+    if not value:
+        return True
+    return isinstance(value, str) and value.strip().lower() in NEUTRAL_VALUES.get(field, ())
+
+
+def memory_can_answer(target):
+    """Only targets naming a dataset and nothing else that shapes the output are looked up."""
+    return (isinstance(target, dict) and bool(target.get("AdaptiveDatasetId"))
+            and all(is_neutral(field, target.get(field)) for field in SHAPING_FIELDS))
+
+
+def split_by_memory(memory, body, params, owner):
+    """
+    Answer what the memory can for a Translator request body sent with the
+    credential scope `owner`.
+
+    Returns (upstream_body, plan, hits): upstream_body holds the elements,
+    with only their missed targets, that still have to be sent (empty when
+    every target was found), and plan is passed to merge_with_memory().
+    Only plain-text elements are looked up, and only for targets that
+    memory_can_answer().
+    """
+    plan, upstream_body, hits = [], [], 0
+    for element in body:
+        targets = element.get("Targets") if isinstance(element, dict) else None
+        text_type = (element.get("TextType") or params.get("texttype") or "Plain") if targets else ""
+        if not (targets and isinstance(element.get("Text"), str) and text_type.lower() == "plain"):
+            plan.append(("upstream", len(upstream_body), None))
+            upstream_body.append(element)
+            continue
+
+        source = normalize_text(element["Text"])
+        source_lang = element.get("Language") or params.get("from")
+        answers = []
+        for target in targets:
+            language = target.get("Language") or params.get("to")
+            found = (memory.lookup(source_lang, language, [source], owner, target["AdaptiveDatasetId"])
+                     if source and memory_can_answer(target) else {})
+            answers.append((language, found.get(source)))
+        found_count = sum(1 for _, text in answers if text is not None)
+        hits += found_count
+        if found_count == len(answers):
+            plan.append(("memory", None, answers))
+            continue
+        if found_count:
+            element = dict(element, Targets=[t for t, (_, text) in zip(targets, answers) if text is None])
+        plan.append(("upstream", len(upstream_body), answers))
+        upstream_body.append(element)
+    return upstream_body, plan, hits
+
+
+def merge_with_memory(plan, upstream_result):
+    """Rebuild the full response from memory answers and the upstream result, in request order."""
+    result = []
+    for source, position, answers in plan:
+        if source == "memory":
+            result.append({"translations": [{"text": text, "to": language} for language, text in answers]})
+            continue
+        upstream_element = upstream_result[position] if position < len(upstream_result) else {}
+        if not answers or all(text is None for _, text in answers):
+            result.append(upstream_element)
+            continue
+        remote = iter(upstream_element.get("translations", []))
+        translations = [{"text": text, "to": language} if text is not None else next(remote, {})
+                        for language, text in answers]
+        result.append(dict(upstream_element, translations=translations))
+    return result
+
+
+def main(argv=None):
+    """Bulk-load TSV files into the translation memory from the command line."""
+    parser = argparse.ArgumentParser(description="Load source<TAB>target TSV files into the translation memory.")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--from", dest="source_lang", required=True)
+    parser.add_argument("--to", dest="target_lang", required=True)
+    parser.add_argument("--dataset", required=True, help="workspace or dataset id the pairs belong to")
+    parser.add_argument("--owner", required=True,
+                        help="credential scope allowed to read the pairs (metadata_cache.credential_scope of its token)")
+    parser.add_argument("--path", default=TRANSLATION_MEMORY_PATH)
+    args = parser.parse_args(argv)
+
+    memory = TranslationMemory(args.path)
+    for name in args.files:
+        start = time.perf_counter()
+        with open(name, "rb") as stream:
+            report = memory.load_tsv(stream, args.owner, args.dataset, args.source_lang, args.target_lang)
+        elapsed = time.perf_counter() - start
+        print(f"{name}: {report['pairs']} pairs, {report['duplicates']} duplicates, {report['errors']} errors"
+              f" in {elapsed:.1f}s ({report['pairs'] / max(elapsed, 1e-9):.0f} pairs/s)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files(the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and / or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions :
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+#------------------------------------------------------------------------------
+
+import os
+import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from translation_batch import BATCH_MAX_ELEMENTS, BATCH_CONCURRENCY
+
+# Lines read and translated together when streaming a file
+STREAM_WINDOW_LINES = int(os.getenv("STREAM_WINDOW_LINES", str(BATCH_MAX_ELEMENTS)))
+
+
+def iter_source_lines(stream, tsv=False):
+    """
+    Yield (line_number, source_text) from a binary stream one line at a time.
+    For TSV input only the first (source) column is translated.
+    """
+    for number, raw in enumerate(stream, start=1):
+        line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+        if number == 1:
+            line = line.lstrip("﻿")
+        if tsv:
+            line = line.split("\t", 1)[0]
+        yield number, line
+
+
+def translate_rows(lines, translate_window, window_size=STREAM_WINDOW_LINES, concurrency=BATCH_CONCURRENCY):
+    """
+    Translate (line_number, text) pairs window by window and yield one row
+    dict per line: {"line", "source", "translation"} or {"line", "source", "error"}.
+
+    `translate_window(texts)` returns one result per text, as produced by
+    translate_batch. Up to `concurrency` windows are in flight at once, the
+    input is only read as fast as results are consumed, and output stays in
+    input order.
+    """
+    def run(window):
+        texts = [text for _, text in window if text.strip()]
+        results = iter(translate_window(texts) if texts else [])
+        rows = []
+        for number, text in window:
+            if not text.strip():
+                rows.append({"line": number, "source": text, "translation": ""})
+                continue
+            result = next(results)
+            if "error" in result:
+                rows.append({"line": number, "source": text, "error": result["error"]})
+            else:
+                translations = result.get("translations") or [{}]
+                rows.append({"line": number, "source": text, "translation": translations[0].get("text", "")})
+        return rows
+
+    lines = iter(lines)
+    in_flight = deque()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        while True:
+            while len(in_flight) < concurrency:
+                window = list(islice(lines, window_size))
+                if not window:
+                    break
+                in_flight.append(pool.submit(run, window))
+            if not in_flight:
+                break
+            yield from in_flight.popleft().result()
+
+
+def stream_translations(lines, translate_window, window_size=STREAM_WINDOW_LINES, concurrency=BATCH_CONCURRENCY):
+    """
+    Translate (line_number, text) pairs like translate_rows and yield NDJSON
+    lines. A final {"summary": ...} line closes the stream.
+    """
+    totals = {"lines": 0, "translated": 0, "errors": 0}
+    for row in translate_rows(lines, translate_window, window_size, concurrency):
+        totals["lines"] += 1
+        totals["errors" if "error" in row else "translated"] += 1
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+    yield json.dumps({"summary": totals}) + "\n"
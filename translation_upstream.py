@@ -0,0 +1,168 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files(the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and / or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions :
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+#------------------------------------------------------------------------------
+"""
+Translator calls shared by the web app and translate_cli.
+
+Holds the keep-alive upstream client, the header factory, the rate
+governor, hedging, the circuit breakers and the translation cache, plus the
+helpers that build and send Translator requests. Importing it opens no
+sessions, databases or background threads, so tools can use it without
+starting the app.
+"""
+
+import os
+
+import requests
+from dotenv import load_dotenv
+from flask import request
+
+from upstream_client import UpstreamClient, HeaderFactory
+from translation_cache import TranslationCache
+from rate_governor import RateGovernor, RateLimited, rate_keys, INTERACTIVE
+from tail_latency import Hedger, CircuitBreakers
+from metrics import in_request
+from client_disconnect import ClientDisconnected, current_scope
+
+load_dotenv()
+
+TRANSLATOR_URL = os.getenv("TRANSLATOR_URL")
+TRANSLATION_KEY = os.getenv("TRANSLATION_KEY")
+GPT_URL = os.getenv("GPT_URL")
+GPT_KEY = os.getenv("GPT_KEY")
+REGION = os.getenv("REGION")
+GPT_DEPLOYMENT_NAME = os.getenv("GPT_DEPLOYMENT_NAME", "gpt-4o-mini")
+
+# Shared keep-alive client used for every call to API_URL and TRANSLATOR_URL
+upstream = UpstreamClient()
+api_headers = HeaderFactory({
+    "Ocp-Apim-Subscription-Key": TRANSLATION_KEY,
+    "Ocp-Apim-Subscription-Region": REGION,
+    "llm-endpoint": GPT_URL,
+    "llm-key": GPT_KEY,
+    "preview-api": "true",
+})
+
+# Flow control for TRANSLATOR_URL per subscription key and GPT deployment
+rate_governor = RateGovernor()
+
+# Tail latency and failure handling for TRANSLATOR_URL
+hedger = Hedger()
+circuit_breakers = CircuitBreakers()
+
+# Server-side cache of successful translate results
+translation_cache = TranslationCache()
+
+
+def get_translate_params(args=None):
+    """Build the Translator query parameters from the current request (or the given query args)."""
+    if args is None:
+        args = request.args
+    params = {
+        'api-version': '2025-05-01-preview',
+        'trackperformance': 'true',
+        'from': args.get('from', 'en'),
+        'to': args.get('to', 'de'),
+        'texttype': args.get('texttype', 'Plain'),
+        'flight': 'experimental',
+        'option': 'nocache',
+    }
+
+    # Add nocache option if specified
+    if args.get('nocache'):
+        params['options'] = 'nocache'
+    return params
+
+
+def post_translation(params, headers, body, priority=INTERACTIVE):
+    """
+    Send a Translator request through the circuit breakers and the rate governor;
+    interactive calls may be hedged. When an open breaker turned GPT targets into
+    plain ones, the returned response carries an X-Translation-Fallback header.
+    Raises ClientDisconnected when the call was cancelled because the client left.
+    """
+    body, keys, fallback = circuit_breakers.admit(body, rate_keys(body))
+
+    def send():
+        return rate_governor.send(
+            keys, priority,
+            lambda: upstream.post(TRANSLATOR_URL, params=params, headers=headers, json=body)
+        )
+
+    def send_hedge():
+        if not rate_governor.try_acquire(keys, priority):
+            return None
+        return upstream.post(TRANSLATOR_URL, params=params, headers=headers, json=body)
+
+    try:
+        response = (hedger.run(send, in_request(send_hedge))
+                    if priority == INTERACTIVE else send())
+    except (RateLimited, ClientDisconnected):
+        circuit_breakers.release(keys)
+        raise
+    except requests.exceptions.RequestException as e:
+        scope = current_scope()
+        if scope is not None and scope.aborted:
+            # We shut the connection down ourselves; not an upstream failure
+            circuit_breakers.release(keys)
+            raise ClientDisconnected() from e
+        circuit_breakers.record(keys, False)
+        raise
+    circuit_breakers.record(keys, response.status_code < 500)
+    if fallback:
+        response.headers['X-Translation-Fallback'] = 'plain'
+    return response
+
+
+def get_translate_target(args=None):
+    """Build a Translator target entry from the query string (or the given args), using the same defaults as the UI."""
+    if args is None:
+        args = request.args
+    target = {
+        'Language': args.get('to', 'de'),
+        'Script': '',
+        'ProfanityAction': 'NoAction',
+        'ProfanityMarker': 'Asterisk',
+        'DeploymentName': args.get('deploymentName', GPT_DEPLOYMENT_NAME),
+        'AllowFallback': True,
+        'Grade': args.get('grade', 'basic'),
+        'Tone': args.get('tone', 'informal'),
+        'Gender': args.get('gender', 'neutral'),
+    }
+    if args.get('datasetId'):
+        target['AdaptiveDatasetId'] = args.get('datasetId')
+    return target
+
+
+def translation_elements(texts, params, target):
+    """Translator request elements for plain source texts, all sent to the same target."""
+    return [{
+        'Text': text,
+        'Script': '',
+        'Language': params['from'],
+        'TextType': params['texttype'],
+        'Targets': [target]
+    } for text in texts]
@@ -0,0 +1,220 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files(the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and / or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions :
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+#------------------------------------------------------------------------------
+import os
+import unicodedata
+from array import array
+
+# Most distinct pairs remembered for duplicate detection; memory stays at 16 bytes per pair
+TSV_DEDUPE_MAX_PAIRS = int(os.getenv("TSV_DEDUPE_MAX_PAIRS", "4000000"))
+# Longest accepted line; longer lines are reported and skipped without being buffered
+TSV_MAX_LINE_BYTES = int(os.getenv("TSV_MAX_LINE_BYTES", str(64 * 1024)))
+# Per-line errors listed in a report; further errors are only counted
+TSV_MAX_ERROR_LINES = int(os.getenv("TSV_MAX_ERROR_LINES", "100"))
+
+ERROR_KINDS = ("columns", "emptySource", "emptyTarget", "encoding", "lineTooLong")
+
+
+def normalize_text(text):
+    """NFC-normalize and collapse every run of Unicode whitespace to one space."""
+    if not text.isascii():
+        text = unicodedata.normalize("NFC", text)
+    return " ".join(text.split())
+
+
+class FingerprintSet:
+    """
+    Set of 64-bit pair fingerprints in an open-addressing table that grows up
+    to 2 * max_items slots, so memory is bounded whatever the input size.
+    Once full, add() stops remembering new fingerprints and sets `saturated`.
+    """
+
+    def __init__(self, max_items=TSV_DEDUPE_MAX_PAIRS, initial_slots=1 << 16):
+        self.max_slots = 1 << max(1, (2 * max_items - 1).bit_length())
+        self._table = array("Q", bytes(8 * min(initial_slots, self.max_slots)))
+        self._mask = len(self._table) - 1
+        self.count = 0
+        self.saturated = False
+
+    def add(self, fingerprint):
+        """Add a fingerprint; returns False if it was already present."""
+        fingerprint = fingerprint or 1
+        table, mask = self._table, self._mask
+        slot = fingerprint & mask
+        while True:
+            current = table[slot]
+            if current == fingerprint:
+                return False
+            if current == 0:
+                break
+            slot = (slot + 1) & mask
+        if 2 * (self.count + 1) > len(table):
+            if len(table) >= self.max_slots:
+                self.saturated = True
+                return True
+            self._grow()
+            return self.add(fingerprint)
+        table[slot] = fingerprint
+        self.count += 1
+        return True
+
+    def _grow(self):
+        old = self._table
+        self._table = array("Q", bytes(16 * len(old)))
+        self._mask = len(self._table) - 1
+        table, mask = self._table, self._mask
+        for fingerprint in old:
+            if fingerprint:
+                slot = fingerprint & mask
+                while table[slot]:
+                    slot = (slot + 1) & mask
+                table[slot] = fingerprint
+
+
+class TsvCleaner:
+    """
+    Single-pass validator and normalizer for source<TAB>target TSV data.
+
+    Bytes are fed in arbitrary chunks and the cleaned TSV for every complete
+    line is returned, so memory is bounded by the chunk and line size plus
+    the duplicate table. Lines with the wrong column count, an empty side,
+    invalid UTF-8 or more than max_line_bytes are dropped and reported; exact duplicate pairs (after
+    normalization) are dropped and counted. Blank lines are skipped. Both
+    sides are NFC-normalized with every run of Unicode whitespace collapsed
+    to one space. `sink(source, target)`, if given, receives every
+    accepted pair.
+    """
+
+    def __init__(self, dedupe_max_pairs=TSV_DEDUPE_MAX_PAIRS, max_line_bytes=TSV_MAX_LINE_BYTES,
+                 max_error_lines=TSV_MAX_ERROR_LINES, sink=None):
+        self.sink = sink
+        self.max_line_bytes = max_line_bytes
+        self.max_error_lines = max_error_lines
+        self._seen = FingerprintSet(dedupe_max_pairs)
+        self._partial = b""
+        self._overlong = False
+        self.lines = 0
+        self.pairs = 0
+        self.blank_lines = 0
+        self.duplicates = 0
+        self.error_counts = dict.fromkeys(ERROR_KINDS, 0)
+        self.error_lines = []
+
+    @property
+    def errors(self):
+        return sum(self.error_counts.values())
+
+    def feed(self, data):
+        """Process a chunk of raw bytes; returns the cleaned output for the lines it completed."""
+        if self._overlong:
+            # Skip the rest of an overlong line; its error is already recorded
+            end = data.find(b"\n")
+            if end < 0:
+                return b""
+            self._overlong = False
+            self.lines += 1
+            data = data[end + 1:]
+        lines = (self._partial + data).split(b"\n") if self._partial else data.split(b"\n")
+        self._partial = lines.pop()
+        out = []
+        for raw in lines:
+            cleaned = self._line(raw)
+            if cleaned is not None:
+                out.append(cleaned)
+        if len(self._partial) > self.max_line_bytes:
+            self._overlong = True
+            self._error(self.lines + 1, "lineTooLong")
+            self._partial = b""
+        return b"".join(out)
+
+    def finish(self):
+        """Process the final unterminated line, if any."""
+        if self._overlong:
+            self._overlong = False
+            self.lines += 1
+            return b""
+        if self._partial:
+            partial, self._partial = self._partial, b""
+            cleaned = self._line(partial)
+            return cleaned or b""
+        return b""
+
+    def _line(self, raw):
+        self.lines += 1
+        if len(raw) > self.max_line_bytes:
+            self._error(self.lines, "lineTooLong")
+            return None
+        if self.lines == 1 and raw.startswith(b"\xef\xbb\xbf"):
+            raw = raw[3:]
+        try:
+            text = raw.decode("utf-8")
+        except UnicodeDecodeError:
+            self._error(self.lines, "encoding")
+            return None
+        text = text.rstrip("\r")
+        if not text.strip():
+            self.blank_lines += 1
+            return None
+        columns = text.split("\t")
+        if len(columns) != 2:
+            self._error(self.lines, "columns")
+            return None
+        if not text.isascii():
+            columns = unicodedata.normalize("NFC", text).split("\t")
+        source, target = " ".join(columns[0].split()), " ".join(columns[1].split())
+        if not source:
+            self._error(self.lines, "emptySource")
+            return None
+        if not target:
+            self._error(self.lines, "emptyTarget")
+            return None
+        cleaned = f"{source}\t{target}\n".encode("utf-8")
+        # Fingerprints only need to be stable within this process
+        fingerprint = hash(cleaned) & 0xFFFFFFFFFFFFFFFF
+        if not self._seen.add(fingerprint):
+            self.duplicates += 1
+            return None
+        self.pairs += 1
+        if self.sink is not None:
+            self.sink(source, target)
+        return cleaned
+
+    def _error(self, line, kind):
+        self.error_counts[kind] += 1
+        if len(self.error_lines) < self.max_error_lines:
+            self.error_lines.append({"line": line, "error": kind})
+
+    def report(self):
+        return {
+            "lines": self.lines,
+            "pairs": self.pairs,
+            "blankLines": self.blank_lines,
+            "duplicates": self.duplicates,
+            "errors": self.errors,
+            "errorCounts": dict(self.error_counts),
+            "errorLines": list(self.error_lines),
+            "dedupeSaturated": self._seen.saturated,
+        }
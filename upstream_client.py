@@ -0,0 +1,122 @@
+#------------------------------------------------------------------------------
+#
+# Copyright (c) Microsoft Corporation 2025.
+# All rights reserved.
+#
+# This code is licensed under the MIT License.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files(the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and / or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions :
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+#------------------------------------------------------------------------------
+
+import os
+import threading
+from collections import OrderedDict
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+
+from client_disconnect import CancellableAdapter
+from metrics import upstream_wait
+
+# Pool and timeout settings, overridable from the environment
+POOL_CONNECTIONS = int(os.getenv("UPSTREAM_POOL_CONNECTIONS", "10"))
+POOL_MAXSIZE = int(os.getenv("UPSTREAM_POOL_MAXSIZE", "32"))
+CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("UPSTREAM_READ_TIMEOUT", "120"))
+
+
+class UpstreamClient:
+    """
+    Keep-alive HTTP client shared by every proxy route.
+
+    Wraps a single requests.Session whose adapter keeps one urllib3
+    connection pool per upstream host (API_URL and TRANSLATOR_URL), so
+    repeated calls reuse open TCP/TLS connections instead of paying the
+    handshake each time. Every call gets separate connect and read
+    timeouts unless the caller passes its own. Calls made inside a
+    client_disconnect cancel scope are aborted when its client leaves.
+    """
+
+    def __init__(self, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE,
+                 connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT):
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        # The session is shared between users, so never keep upstream cookies
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = CancellableAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def request(self, method, url, **kwargs):
+        """Send a request through the shared pool."""
+        kwargs.setdefault("timeout", self.timeout)
+        with upstream_wait():
+            return self.session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+    def close(self):
+        """Close all pooled connections."""
+        self.session.close()
+
+
+class HeaderFactory:
+    """
+    Builds upstream headers from the static service credentials plus the
+    caller's bearer token.
+
+    The static part is assembled once, and the per-token dictionaries are
+    memoized in a small LRU so a route does not rebuild the same headers for
+    every request. Returned dictionaries are shared and must not be mutated.
+    """
+
+    def __init__(self, static_headers, maxsize=256):
+        # Unset credentials are dropped, as requests would do when sending
+        self.static_headers = {name: value for name, value in static_headers.items() if value is not None}
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def for_token(self, token, content_type="application/json"):
+        """Return the headers for a token; pass content_type=None for multipart bodies."""
+        key = (token, content_type)
+        with self._lock:
+            headers = self._cache.get(key)
+            if headers is not None:
+                self._cache.move_to_end(key)
+                return headers
+
+        headers = {"Authorization": f"Bearer {token}"}
+        headers.update(self.static_headers)
+        if content_type:
+            headers["content-type"] = content_type
+
+        with self._lock:
+            self._cache[key] = headers
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return headers
@@ -145,8 +145,9 @@ export class TranslationManager {
                 const controller = new AbortController();
                 const timeoutId = setTimeout(() => controller.abort(), 30000); // 30 second timeout
                 
+                // The incremental endpoint only re-sends the sentences edited since the last request
                 const response = await window.requestQueue.executeRequest(async () => {
-                    return fetch(`/api/translate?${translateParams}`, {
+                    return fetch(`/api/translate/incremental?${translateParams}`, {
                         method: 'POST',
                         headers: { 
                             'Content-Type': 'application/json',